@@ -1,79 +1,129 @@
-import pandas as pd
 import re
 
-def analisar_planilha_preciso():
+from cache_planilha import ler_planilha_com_cache, ler_planilha_em_blocos_com_cache
+from leitura_planilha import CAMINHO_PLANILHA
+from mapeamento_filiais import MAPEAMENTO_IDS, criar_mapeador_ids
+from estatisticas_filiais import EstatisticasFiliais
+from documentos import ARQUIVO_REJEITADOS, resumo_rejeitados, salvar_rejeitados
+from escritor_sql import ESTRATEGIA_LOTE_PADRAO, EscritorSql
+from instrumentacao import Instrumentacao
+from registro_filiais import carregar_registro, exigir_cadastro
+from sql_filiais import concatenar_pares, escrever_sql_por_documento, literal_contem, montar_pares
+
+ARQUIVO_SQL = 'atualizar_filiais_analise_precisa.sql'
+
+def mapear_pares_em_blocos(blocos, mapeador, pares):
+    """Repassa os blocos adiante, guardando em `pares` os CPF/CNPJ → FilialId de cada um"""
+    for bloco in blocos:
+        _, filial_id, _ = mapeador.mapear(bloco['filial'])
+        pares.append(montar_pares(bloco['cpf_cnpj'], filial_id))
+        yield bloco
+
+def analisar_planilha_preciso(caminho_planilha=CAMINHO_PLANILHA, streaming=False, por_documento=False,
+                              por_tipo=False, usar_cache=False, lote=None,
+                              estrategia_lote=ESTRATEGIA_LOTE_PADRAO, comprimir=False, arquivo_filiais=None,
+                              medir_memoria=True, perfilar=None):
+    # Tempo, CPU e memória por etapa (relatório JSON ao lado do .sql)
+    instrumentacao = Instrumentacao('analisar_planilha_preciso', medir_memoria, perfilar)
+    instrumentacao.parametros = {
+        'planilha': str(caminho_planilha), 'streaming': streaming, 'por_documento': por_documento,
+        'por_tipo': por_tipo, 'usar_cache': usar_cache, 'lote': lote, 'estrategia_lote': estrategia_lote,
+        'comprimir': comprimir,
+    }
     try:
-        # Ler a planilha
-        df = pd.read_excel(r"C:\Users\Mauro Benetti\Downloads\CPF E CNPJ - CLIENTES ARRIGHI.xlsx")
+        # Cadastro exportado da tabela Filiais, se houver; senão o mapeamento fixo
+        registro = carregar_registro(arquivo_filiais)
+        if registro is not None:
+            mapeamento = registro.mapeamento('Id')
+            senao = "c.FilialId  -- Mantém a filial atual"
+        else:
+            mapeamento = MAPEAMENTO_IDS
+            senao = "1  -- Rio de Janeiro - RJ (padrão - maioria dos clientes)"
+        
+        # Ler a planilha (apenas colunas A, B e F), inteira ou em blocos
+        if streaming:
+            blocos = instrumentacao.iterar(
+                'carregar', ler_planilha_em_blocos_com_cache(caminho_planilha, usar_cache)
+            )
+        else:
+            with instrumentacao.etapa('carregar'):
+                blocos = [ler_planilha_com_cache(caminho_planilha, usar_cache)]
+        
+        blocos_pares = []
+        if por_documento:
+            mapeador = registro.mapeador('FilialId') if registro is not None else criar_mapeador_ids(mapeamento)
+            blocos = instrumentacao.iterar('mapear', mapear_pares_em_blocos(blocos, mapeador, blocos_pares))
+        
+        # Estatísticas por filial em uma única passada (contagem, exemplos, PF/PJ);
+        # a leitura e o mapeamento dos blocos são medidos nas próprias etapas
+        with instrumentacao.etapa('estatisticas'):
+            estatisticas = EstatisticasFiliais.calcular_em_blocos(blocos, por_tipo=por_tipo)
+        total_registros = estatisticas.total_registros
         
         print("=== ANÁLISE PRECISA DA PLANILHA ===")
-        print(f"Total de registros: {len(df)}")
+        print(f"Total de registros: {total_registros}")
         
         # Verificar filiais únicas na planilha
-        filiais_unicas = df.iloc[:, 5].dropna().unique()  # Coluna F
+        filiais_unicas = estatisticas.filiais  # Coluna F
         print(f"\nFiliais encontradas na planilha:")
-        for filial in sorted(filiais_unicas):
-            count = len(df[df.iloc[:, 5] == filial])
+        for filial, count in estatisticas.contagem.items():
             print(f"  - {filial}: {count} clientes")
         
         # Analisar alguns exemplos de nomes para entender o padrão
         print(f"\n=== EXEMPLOS DE CLIENTES POR FILIAL ===")
-        for filial in sorted(filiais_unicas):
-            clientes_filial = df[df.iloc[:, 5] == filial]
-            print(f"\n{filial} ({len(clientes_filial)} clientes):")
-            for i, (_, row) in enumerate(clientes_filial.head(3).iterrows()):
-                nome = row.iloc[0]  # Coluna A
-                cpf_cnpj = row.iloc[1]  # Coluna B
+        for filial, count in estatisticas.contagem.items():
+            print(f"\n{filial} ({count} clientes):")
+            for i, (nome, cpf_cnpj) in enumerate(estatisticas.exemplos_da_filial(filial)):  # Colunas A e B
                 print(f"  {i+1}. {nome} - {cpf_cnpj}")
         
+        # Com o cadastro, nenhuma filial da planilha pode cair em uma filial padrão
+        if registro is not None:
+            exigir_cadastro(registro.nao_cadastradas(filiais_unicas))
+        
         # Gerar query SQL específica baseada na análise
         print(f"\n=== GERANDO QUERY SQL ESPECÍFICA ===")
         
-        query = """-- Query específica baseada na análise da planilha
--- Análise: Maioria dos clientes é de RIO DE JANEIRO
-
--- Pessoas Físicas - Mapeamento específico
-UPDATE c
-SET c.FilialId = 
-    CASE """
-        
-        # Mapeamento baseado na análise real
-        mapeamento = {
-            'MANAUS': 11,  # Manaus - AM
-            'SALVADOR': 8,  # Salvador - BA
-            'SÃO PAULO': 5,  # São Paulo - SP
-            'RIO DE JANEIRO': 1,  # Rio de Janeiro - RJ
-            'CAMPINAS': 2,  # Campinas - SP
-            'BELO HORIZONTE': 7,  # Belo Horizonte - BH
-            'RIBEIRÃO PRETO': 13  # Ribeirão Preto - SP
-        }
-        
-        for filial_planilha, filial_id in mapeamento.items():
-            query += f"\n        WHEN pf.Nome LIKE '%{filial_planilha.lower()}%' THEN {filial_id}  -- {filial_planilha}"
-        
-        query += """
-        ELSE 1  -- Rio de Janeiro - RJ (padrão - maioria dos clientes)
-    END,
-    c.DataAtualizacao = GETDATE()
-FROM Clientes c
-INNER JOIN PessoasFisicas pf ON c.PessoaFisicaId = pf.Id
-WHERE c.TipoPessoa = 'Fisica' AND c.Ativo = 1;
+        # Gravar o script à medida que é gerado (UPDATEs em lotes separados por GO, se pedido)
+        with instrumentacao.etapa('gerar-sql'), EscritorSql(ARQUIVO_SQL, lote, estrategia_lote, comprimir) as escritor:
+            if por_documento:
+                # Tabela temporária + JOIN por CPF/CNPJ (seek nos índices, sem LIKE)
+                pares, rejeitados = concatenar_pares(blocos_pares)
+                escritor.escrever(estatisticas.comentario_sql() + "\n\n")
+                escrever_sql_por_documento(
+                    escritor, pares, coluna='FilialId',
+                    titulo="Query específica por CPF/CNPJ baseada na análise da planilha"
+                )
+            else:
+                escritor.escrever(f"""-- Query específica baseada na análise da planilha
+{estatisticas.comentario_sql()}
 
--- Pessoas Jurídicas - Mapeamento específico
-UPDATE c
-SET c.FilialId = 
-    CASE """
-        
-        for filial_planilha, filial_id in mapeamento.items():
-            query += f"\n        WHEN pj.RazaoSocial LIKE '%{filial_planilha.lower()}%' THEN {filial_id}  -- {filial_planilha}"
-        
-        query += """
-        ELSE 1  -- Rio de Janeiro - RJ (padrão - maioria dos clientes)
-    END,
-    c.DataAtualizacao = GETDATE()
-FROM Clientes c
-INNER JOIN PessoasJuridicas pj ON c.PessoaJuridicaId = pj.Id
-WHERE c.TipoPessoa = 'Juridica' AND c.Ativo = 1;
+""")
+                casos_pf = "".join(
+                    f"\n        WHEN pf.Nome LIKE {literal_contem(filial_planilha.lower())} THEN {filial_id}"
+                    for filial_planilha, filial_id in mapeamento.items()
+                )
+                escritor.atualizar('FilialId', f"""
+    CASE {casos_pf}
+        ELSE {senao}
+    END""", """FROM Clientes c
+INNER JOIN PessoasFisicas pf ON c.PessoaFisicaId = pf.Id""",
+                    "c.TipoPessoa = 'Fisica' AND c.Ativo = 1",
+                    comentario="-- Pessoas Físicas - Mapeamento específico")
+                
+                escritor.escrever("\n\n")
+                casos_pj = "".join(
+                    f"\n        WHEN pj.RazaoSocial LIKE {literal_contem(filial_planilha.lower())} THEN {filial_id}"
+                    for filial_planilha, filial_id in mapeamento.items()
+                )
+                escritor.atualizar('FilialId', f"""
+    CASE {casos_pj}
+        ELSE {senao}
+    END""", """FROM Clientes c
+INNER JOIN PessoasJuridicas pj ON c.PessoaJuridicaId = pj.Id""",
+                    "c.TipoPessoa = 'Juridica' AND c.Ativo = 1",
+                    comentario="-- Pessoas Jurídicas - Mapeamento específico")
+            
+            escritor.escrever("""
 
 -- Verificar resultado
 SELECT '=== FILIAIS ATUALIZADAS (ANÁLISE PRECISA) ===' as Info;
@@ -84,24 +134,44 @@ FROM Clientes c
 INNER JOIN Filiais f ON c.FilialId = f.Id
 WHERE c.Ativo = 1
 GROUP BY f.Id, f.Nome
-ORDER BY f.Nome;"""
-        
-        # Salvar query
-        with open('atualizar_filiais_analise_precisa.sql', 'w', encoding='utf-8') as f:
-            f.write(query)
+ORDER BY f.Nome;""")
         
-        print(f"✅ Query SQL específica gerada em 'atualizar_filiais_analise_precisa.sql'")
-        print(f"📊 Total de registros na planilha: {len(df)}")
+        print(f"✅ Query SQL específica gerada em '{escritor.caminho}'")
+
+        if por_documento:
+            print(f"📄 CPF/CNPJ rejeitados: {len(rejeitados)}")
+            for motivo, count in resumo_rejeitados(rejeitados).items():
+                print(f"  {motivo}: {count} linhas")
+            if len(rejeitados):
+                with instrumentacao.etapa('rejeitados'):
+                    salvar_rejeitados(rejeitados)
+                print(f"📄 Relatório de rejeitados gerado em '{ARQUIVO_REJEITADOS}'")
+        print(f"📊 Total de registros na planilha: {total_registros}")
         print(f"🏢 Filiais únicas encontradas: {len(filiais_unicas)}")
         
         # Estatísticas por filial
         print(f"\n=== ESTATÍSTICAS POR FILIAL ===")
-        for filial in sorted(filiais_unicas):
-            count = len(df[df.iloc[:, 5] == filial])
-            print(f"  {filial}: {count} clientes")
+        for filial, count in estatisticas.contagem.items():
+            if estatisticas.por_tipo is not None:
+                tipos = estatisticas.por_tipo.loc[filial]
+                detalhe = ", ".join(f"{tipo}: {qtd}" for tipo, qtd in tipos.items() if qtd)
+                print(f"  {filial}: {count} clientes ({detalhe})")
+            else:
+                print(f"  {filial}: {count} clientes")
+        
+        relatorio = instrumentacao.gravar_relatorio(
+            escritor.caminho,
+            registros=total_registros,
+            filiais=len(filiais_unicas),
+            documentos=len(pares) if por_documento else None,
+            rejeitados=len(rejeitados) if por_documento else None,
+        )
+        print(f"\n📈 Relatório de execução gerado em '{relatorio}'")
         
     except Exception as e:
         print(f"❌ Erro: {e}")
+    finally:
+        instrumentacao.encerrar()
 
 if __name__ == "__main__":
     analisar_planilha_preciso()
@@ -0,0 +1,325 @@
+"""
+Aplicação direta das filiais no banco, sem passar pelo script .sql
+- Os pares CPF/CNPJ → filial vão como parâmetros (executemany), nunca
+  interpolados no texto do SQL
+- Lotes: cada lote é carregado em uma tabela temporária da conexão e aplicado
+  com o mesmo UPDATE por JOIN do script (seek em PessoasFisicas.Cpf /
+  PessoasJuridicas.Cnpj), uma transação por lote
+- Pool pequeno de conexões: os lotes são distribuídos entre threads, cada uma
+  com a sua conexão (e a sua tabela temporária)
+- Só os clientes cuja filial muda são atualizados: reaplicar a mesma carga, ou
+  repetir um lote após uma falha, não altera nada
+- Erros transitórios (deadlock, timeout, banco ocupado) repetem o lote com espera
+  crescente; os lotes já confirmados ficam gravados
+- Banco: SQL Server via pyodbc (string ODBC) ou um arquivo SQLite
+  ('sqlite:banco.db', p.ex. o banco substituto de simulacao_sql.py --salvar-banco)
+
+Uso pelo pipeline:
+    python pipeline_filiais.py planilha.xlsx -e mapear gerar-sql aplicar --conexao sqlite:banco.db
+    FILIAIS_CONEXAO="DRIVER={ODBC Driver 18 for SQL Server};SERVER=...;DATABASE=...;UID=...;PWD=..." \\
+        python pipeline_filiais.py planilha.xlsx -e gerar-sql aplicar --lote-aplicacao 5000
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from sql_filiais import TIPOS_COLUNA
+
+try:
+    import pyodbc
+except ImportError:  # pragma: no cover - depende do ambiente
+    pyodbc = None
+
+VARIAVEL_CONEXAO = 'FILIAIS_CONEXAO'
+PREFIXO_SQLITE = 'sqlite:'
+TAMANHO_LOTE_APLICACAO = 5000
+CONEXOES_PADRAO = 4
+TENTATIVAS_PADRAO = 3
+ESPERA_TENTATIVA = 0.5  # segundos antes da 2ª tentativa; dobra a cada nova falha
+
+# SQLSTATEs do SQL Server que valem nova tentativa: deadlock, timeout e conexão
+ESTADOS_TRANSITORIOS = {'40001', 'HYT00', 'HYT01', '08S01', '08001'}
+
+ResultadoAplicacao = namedtuple(
+    'ResultadoAplicacao', ['documentos', 'lotes', 'clientes_alterados', 'clientes_limpos', 'novas_tentativas', 'segundos']
+)
+
+
+class AplicacaoFiliaisError(ValueError):
+    """Lote que continuou falhando depois de todas as tentativas"""
+
+
+class Dialeto:
+    """
+    O que muda entre os bancos por trás da DB-API: como abrir a conexão, a
+    tabela temporária, a data atual e quais erros são transitórios
+    """
+
+    def __init__(self, nome, conectar, tabela, criar_tabela, agora, erro, transitorio):
+        self.nome = nome
+        self.conectar = conectar
+        self.tabela = tabela
+        self.criar_tabela = criar_tabela
+        self.agora = agora
+        self.erro = erro
+        self.transitorio = transitorio
+
+    def preparar(self, conexao, coluna):
+        """Cria a tabela temporária na conexão nova (vale até a conexão fechar)"""
+        cursor = conexao.cursor()
+        cursor.execute(self.criar_tabela.format(tabela=self.tabela, coluna=coluna, tipo=TIPOS_COLUNA[coluna]))
+        conexao.commit()
+
+    def cursor(self, conexao):
+        return conexao.cursor()
+
+
+class _DialetoSqlServer(Dialeto):
+    def cursor(self, conexao):
+        cursor = conexao.cursor()
+        # Envia os parâmetros do lote inteiro em um único round trip
+        cursor.fast_executemany = True
+        return cursor
+
+
+def dialeto_sqlserver(conexao_odbc):
+    if pyodbc is None:
+        raise ValueError("pyodbc não instalado: pip install pyodbc (e o ODBC Driver for SQL Server)")
+    return _DialetoSqlServer(
+        'sqlserver',
+        lambda: pyodbc.connect(conexao_odbc, autocommit=False),
+        tabela='#FiliaisAplicacao',
+        criar_tabela="""IF OBJECT_ID('tempdb..{tabela}') IS NULL
+CREATE TABLE {tabela} (
+    Documento VARCHAR(14) NOT NULL PRIMARY KEY,
+    DocumentoFormatado VARCHAR(18) NOT NULL,
+    TipoPessoa VARCHAR(10) NOT NULL,
+    {coluna} {tipo} NOT NULL
+)""",
+        agora='GETDATE()',
+        erro=pyodbc.Error,
+        transitorio=lambda e: isinstance(e, pyodbc.OperationalError) or (e.args and e.args[0] in ESTADOS_TRANSITORIOS),
+    )
+
+
+def dialeto_sqlite(caminho):
+    return Dialeto(
+        'sqlite',
+        # check_same_thread: a conexão passa entre as threads do pool, uma por vez
+        lambda: sqlite3.connect(caminho, timeout=30, check_same_thread=False),
+        tabela='FiliaisAplicacao',
+        criar_tabela="""CREATE TEMP TABLE IF NOT EXISTS {tabela} (
+    Documento VARCHAR(14) NOT NULL PRIMARY KEY,
+    DocumentoFormatado VARCHAR(18) NOT NULL,
+    TipoPessoa VARCHAR(10) NOT NULL,
+    {coluna} {tipo} NOT NULL
+)""",
+        agora='CURRENT_TIMESTAMP',
+        erro=sqlite3.Error,
+        transitorio=lambda e: isinstance(e, sqlite3.OperationalError) and ('locked' in str(e) or 'busy' in str(e)),
+    )
+
+
+def abrir_dialeto(conexao):
+    """'sqlite:caminho.db' → SQLite; qualquer outra coisa é uma string ODBC do SQL Server"""
+    if not conexao:
+        raise ValueError(f"Informe a conexão do banco (--conexao ou a variável {VARIAVEL_CONEXAO})")
+    if conexao.startswith(PREFIXO_SQLITE):
+        return dialeto_sqlite(conexao[len(PREFIXO_SQLITE):])
+    return dialeto_sqlserver(conexao)
+
+
+class PoolConexoes:
+    """
+    Até `tamanho` conexões abertas sob demanda e reaproveitadas entre os lotes.
+    Uma conexão que falhou é descartada (rollback e close), não volta ao pool.
+    """
+
+    def __init__(self, dialeto, coluna, tamanho=CONEXOES_PADRAO):
+        self.dialeto = dialeto
+        self.coluna = coluna
+        self.tamanho = max(int(tamanho), 1)
+        self.livres = queue.LifoQueue()
+        self.abertas = []
+        self._trava = threading.Lock()
+        self._vagas = threading.Semaphore(self.tamanho)
+
+    @contextmanager
+    def conexao(self):
+        with self._vagas:
+            try:
+                conexao = self.livres.get_nowait()
+            except queue.Empty:
+                conexao = self._abrir()
+            try:
+                yield conexao
+            except BaseException:
+                self._descartar(conexao)
+                raise
+            self.livres.put(conexao)
+
+    def _abrir(self):
+        conexao = self.dialeto.conectar()
+        with self._trava:
+            self.abertas.append(conexao)
+        try:
+            self.dialeto.preparar(conexao, self.coluna)
+        except BaseException:
+            self._descartar(conexao)
+            raise
+        return conexao
+
+    def _descartar(self, conexao):
+        with self._trava:
+            if conexao in self.abertas:
+                self.abertas.remove(conexao)
+        for acao in (conexao.rollback, conexao.close):
+            try:
+                acao()
+            except Exception:
+                pass
+
+    def fechar(self):
+        with self._trava:
+            abertas, self.abertas = self.abertas, []
+        for conexao in abertas:
+            try:
+                conexao.close()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+
+def comandos_update(dialeto, coluna, remover=False):
+    """
+    UPDATEs de Clientes (PF e PJ) pelo JOIN da tabela temporária. `remover`:
+    volta a coluna a NULL nos clientes que ainda têm a filial da carga anterior.
+    """
+    if remover:
+        valor, pendentes = "NULL", f"Clientes.{coluna} = s.{coluna}"
+    else:
+        valor, pendentes = f"s.{coluna}", f"(Clientes.{coluna} IS NULL OR Clientes.{coluna} <> s.{coluna})"
+    comandos = []
+    for tipo, tabela, coluna_documento, chave in (
+        ('Fisica', 'PessoasFisicas', 'Cpf', 'PessoaFisicaId'),
+        ('Juridica', 'PessoasJuridicas', 'Cnpj', 'PessoaJuridicaId'),
+    ):
+        # Clientes fora do FROM: a mesma forma vale no SQL Server e no SQLite
+        comandos.append(f"""UPDATE Clientes
+SET {coluna} = {valor},
+    DataAtualizacao = {dialeto.agora}
+FROM {dialeto.tabela} s
+INNER JOIN {tabela} p ON p.{coluna_documento} IN (s.DocumentoFormatado, s.Documento)
+WHERE Clientes.{chave} = p.Id
+  AND s.TipoPessoa = '{tipo}' AND Clientes.TipoPessoa = '{tipo}' AND Clientes.Ativo = 1
+  AND {pendentes}""")
+    return comandos
+
+
+def _linhas(pares):
+    """Parâmetros de cada par (tipos do Python: o driver não aceita numpy.int64)"""
+    return list(zip(
+        pares['documento'].tolist(), pares['documento_formatado'].tolist(),
+        pares['tipo_pessoa'].tolist(), pares['filial'].tolist(),
+    ))
+
+
+def _aplicar_lote(pool, linhas, comandos, tentativas, espera):
+    """Aplica um lote em uma transação; retorna (clientes alterados, novas tentativas)"""
+    dialeto = pool.dialeto
+    insert = (f"INSERT INTO {dialeto.tabela} (Documento, DocumentoFormatado, TipoPessoa, {pool.coluna}) "
+              "VALUES (?, ?, ?, ?)")
+    for tentativa in range(tentativas):
+        try:
+            with pool.conexao() as conexao:
+                cursor = dialeto.cursor(conexao)
+                cursor.execute(f"DELETE FROM {dialeto.tabela}")
+                cursor.executemany(insert, linhas)
+                alterados = 0
+                for comando in comandos:
+                    cursor.execute(comando)
+                    alterados += max(cursor.rowcount, 0)
+                conexao.commit()
+                return alterados, tentativa
+        except dialeto.erro as e:
+            if not dialeto.transitorio(e):
+                raise
+            if tentativa + 1 == tentativas:
+                raise AplicacaoFiliaisError(f"Lote falhou após {tentativas} tentativas: {e}") from e
+            time.sleep(espera * 2 ** tentativa)
+
+
+def imprimir_progresso(lotes_concluidos, total_lotes, documentos, alterados, segundos):
+    print(f"  lote {lotes_concluidos}/{total_lotes}: {documentos} documentos, "
+          f"{alterados} clientes alterados ({segundos:.1f} s)")
+
+
+def aplicar_pares(dialeto, pares, coluna='FilialId', removidos=None, tamanho_lote=TAMANHO_LOTE_APLICACAO,
+                  conexoes=CONEXOES_PADRAO, tentativas=TENTATIVAS_PADRAO, espera=ESPERA_TENTATIVA,
+                  progresso=imprimir_progresso):
+    """
+    Aplica `pares` (montar_pares()) em Clientes.{coluna}, em lotes de
+    `tamanho_lote` distribuídos por `conexoes` conexões. `removidos` (modo
+    delta): pares da carga anterior que saíram da planilha. `progresso`:
+    chamado a cada 10% dos lotes (e no último) com (lotes concluídos, total,
+    documentos, clientes alterados, segundos); None desliga.
+    Retorna ResultadoAplicacao.
+    """
+    if coluna not in TIPOS_COLUNA:
+        raise ValueError(f"Coluna de destino inválida: {coluna}")
+    tamanho_lote = max(int(tamanho_lote), 1)
+    tentativas = max(int(tentativas), 1)
+
+    tarefas = []
+    for dados, remover in ((pares, False), (removidos, True)):
+        if dados is None or not len(dados):
+            continue
+        comandos = comandos_update(dialeto, coluna, remover)
+        linhas = _linhas(dados)
+        tarefas += [(linhas[i:i + tamanho_lote], comandos, remover) for i in range(0, len(linhas), tamanho_lote)]
+
+    inicio = time.perf_counter()
+    alterados = {False: 0, True: 0}
+    documentos = novas_tentativas = concluidos = 0
+    proximo_aviso = 0
+    with PoolConexoes(dialeto, coluna, conexoes) as pool, \
+            ThreadPoolExecutor(max_workers=pool.tamanho) as executor:
+        futuros = {
+            executor.submit(_aplicar_lote, pool, linhas, comandos, tentativas, espera): (len(linhas), remover)
+            for linhas, comandos, remover in tarefas
+        }
+        try:
+            for futuro in as_completed(futuros):
+                quantidade, remover = futuros[futuro]
+                alterados_lote, repeticoes = futuro.result()
+                alterados[remover] += alterados_lote
+                novas_tentativas += repeticoes
+                documentos += quantidade
+                concluidos += 1
+                if progresso is not None and (concluidos >= proximo_aviso or concluidos == len(tarefas)):
+                    progresso(concluidos, len(tarefas), documentos, alterados[False] + alterados[True],
+                              time.perf_counter() - inicio)
+                    proximo_aviso = concluidos + -(-len(tarefas) // 10)
+        except BaseException:
+            for futuro in futuros:
+                futuro.cancel()
+            raise
+
+    return ResultadoAplicacao(
+        documentos=documentos,
+        lotes=len(tarefas),
+        clientes_alterados=alterados[False],
+        clientes_limpos=alterados[True],
+        novas_tentativas=novas_tentativas,
+        segundos=time.perf_counter() - inicio,
+    )
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark das etapas do processamento de filiais sobre planilhas sintéticas
+- Etapas: carregar (.xlsx), mapear (coluna F), estatisticas (groupby + PF/PJ) e
+  gerar-sql (pares CPF/CNPJ + script por documento)
+- Tempo: melhor de N repetições; memória: pico do tracemalloc em uma execução à parte
+  (o tracemalloc deixa o código mais lento, por isso não entra na medição de tempo)
+- Resultados em JSON para comparar duas versões dos scripts (--comparar)
+
+Uso:
+    python benchmark_filiais.py --linhas 1000 10000 100000 --json antes.json
+    python benchmark_filiais.py --linhas 1000 10000 100000 --comparar antes.json
+    python benchmark_filiais.py --linhas 5000000 --em-memoria
+"""
+
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from escritor_sql import EscritorSql
+from estatisticas_filiais import EstatisticasFiliais
+from leitura_planilha import ler_planilha
+from mapeamento_filiais import contar_filiais, criar_mapeador_ids
+from planilha_sintetica import LIMITE_LINHAS_EXCEL, gerar_clientes, gravar_planilha
+from sql_filiais import escrever_sql_por_documento, montar_pares
+
+TAMANHOS_PADRAO = [1_000, 10_000, 100_000]
+REPETICOES_PADRAO = 3
+COLUNAS_PLANILHA_CARREGADA = ['nome', 'cpf_cnpj', 'filial']
+
+
+def medir(funcao, repeticoes=REPETICOES_PADRAO):
+    """Retorna (resultado, melhor tempo em segundos, pico de memória em MiB)"""
+    melhor = None
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        resultado = funcao()
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+        del resultado
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        resultado = funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, melhor, pico / (1024 * 1024)
+
+
+def executar_etapas(linhas, diretorio, semente=0, em_memoria=False, repeticoes=REPETICOES_PADRAO):
+    """Mede cada etapa para uma planilha sintética de `linhas` clientes"""
+    clientes = gerar_clientes(linhas, semente)
+    medicoes = []
+
+    def registrar(etapa, funcao):
+        resultado, segundos, pico_mib = medir(funcao, repeticoes)
+        medicoes.append({
+            'linhas': linhas,
+            'etapa': etapa,
+            'segundos': round(segundos, 4),
+            'pico_mib': round(pico_mib, 2),
+            'linhas_por_segundo': round(linhas / segundos) if segundos else None,
+        })
+        return resultado
+
+    if em_memoria or linhas > LIMITE_LINHAS_EXCEL:
+        df = clientes[COLUNAS_PLANILHA_CARREGADA]
+    else:
+        caminho = Path(diretorio) / f"clientes_{linhas}.xlsx"
+        gravar_planilha(clientes, caminho)
+        df = registrar('carregar', lambda: ler_planilha(caminho))
+    del clientes
+
+    mapeador = criar_mapeador_ids()
+    _, filial_id, _ = registrar('mapear', lambda: _mapear_e_contar(mapeador, df['filial']))
+    registrar('estatisticas', lambda: EstatisticasFiliais.calcular(df, por_tipo=True))
+    registrar('gerar-sql', lambda: _gerar_sql(df, filial_id, Path(diretorio) / 'benchmark.sql'))
+    return medicoes
+
+
+def _mapear_e_contar(mapeador, filial):
+    filial_planilha, filial_id, nao_mapeadas = mapeador.mapear(filial)
+    contar_filiais(filial_id)
+    return filial_planilha, filial_id, nao_mapeadas
+
+
+def _gerar_sql(df, filial_id, caminho):
+    pares, rejeitados = montar_pares(df['cpf_cnpj'], filial_id)
+    with EscritorSql(caminho) as escritor:
+        escrever_sql_por_documento(escritor, pares, coluna='FilialId')
+    return len(pares), len(rejeitados)
+
+
+def imprimir_medicoes(medicoes, anteriores=None):
+    """Tabela das medições; com `anteriores`, a variação de tempo e memória"""
+    referencia = {(m['linhas'], m['etapa']): m for m in anteriores or []}
+    print(f"\n{'linhas':>10} {'etapa':<13} {'tempo (s)':>10} {'pico (MiB)':>11} {'linhas/s':>12}"
+          + ("  variação" if anteriores else ""))
+    for m in medicoes:
+        linha = (f"{m['linhas']:>10} {m['etapa']:<13} {m['segundos']:>10.4f} {m['pico_mib']:>11.2f} "
+                 f"{m['linhas_por_segundo'] or 0:>12}")
+        anterior = referencia.get((m['linhas'], m['etapa']))
+        if anterior and anterior['segundos'] and anterior['pico_mib']:
+            linha += (f"  tempo {m['segundos'] / anterior['segundos']:.2f}x,"
+                      f" memória {m['pico_mib'] / anterior['pico_mib']:.2f}x")
+        print(linha)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do processamento de filiais")
+    parser.add_argument('-n', '--linhas', type=int, nargs='+', default=TAMANHOS_PADRAO,
+                        help='Tamanhos das planilhas sintéticas (padrão: 1000 10000 100000)')
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO,
+                        help='Repetições por etapa; vale o melhor tempo (padrão: 3)')
+    parser.add_argument('--semente', type=int, default=0, help='Semente do gerador (padrão: 0)')
+    parser.add_argument('--em-memoria', action='store_true',
+                        help='Não grava/lê o .xlsx (sem a etapa carregar); automático acima do limite do Excel')
+    parser.add_argument('--json', help='Grava as medições neste arquivo JSON')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior para comparar')
+    opcoes = parser.parse_args(argv)
+
+    anteriores = None
+    if opcoes.comparar:
+        with open(opcoes.comparar, 'r', encoding='utf-8') as f:
+            anteriores = json.load(f)['medicoes']
+
+    medicoes = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for linhas in opcoes.linhas:
+            print(f"⏱️  {linhas} linhas...")
+            medicoes.extend(executar_etapas(
+                linhas, diretorio, opcoes.semente, opcoes.em_memoria, max(opcoes.repeticoes, 1)
+            ))
+
+    imprimir_medicoes(medicoes, anteriores)
+
+    if opcoes.json:
+        with open(opcoes.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'medicoes': medicoes}, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ Medições gravadas em '{opcoes.json}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""
+Cache colunar da planilha de clientes (Arrow IPC, lido por memory-map)
+- Chave: SHA-256 do conteúdo do .xlsx + colunas projetadas; tamanho e mtime
+  evitam recalcular o hash quando o arquivo não mudou
+- Invalidação automática: qualquer alteração no arquivo gera uma nova chave
+- Descarte dos snapshots menos usados quando o diretório passa do limite
+- Cada célula guarda o texto e o tipo original (texto, inteiro, decimal, data...):
+  cache hit e leitura direta devolvem os mesmos valores e tipos
+Requer pyarrow; sem ele a planilha é lida normalmente (sem cache).
+"""
+
+import datetime
+import hashlib
+import json
+import numbers
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from leitura_planilha import (
+    CAMINHO_PLANILHA,
+    COLUNAS_PLANILHA,
+    TAMANHO_BLOCO_PADRAO,
+    ler_planilha,
+    ler_planilha_em_blocos,
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+    ipc = None
+
+DIRETORIO_CACHE = Path(__file__).parent / ".cache_planilha"
+LIMITE_CACHE_BYTES = 1024 * 1024 * 1024  # 1 GB
+ARQUIVO_INDICE = "indice.json"
+VERSAO_FORMATO = 2
+SUFIXO_TIPO = '__tipo'
+
+# Tipo de cada célula no snapshot (código = posição na lista; nulo = vazio)
+TIPOS_CELULA = ['str', 'int', 'float', 'bool', 'datetime', 'date', 'time']
+_DE_TEXTO = {
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': lambda texto: texto == '1',
+    'datetime': datetime.datetime.fromisoformat,
+    'date': datetime.date.fromisoformat,
+    'time': datetime.time.fromisoformat,
+}
+
+
+class CachePlanilha:
+    """Snapshots colunares da planilha, um por versão do arquivo de origem"""
+
+    def __init__(self, diretorio=DIRETORIO_CACHE, limite_bytes=LIMITE_CACHE_BYTES,
+                 colunas=COLUNAS_PLANILHA):
+        self.diretorio = Path(diretorio)
+        self.limite_bytes = limite_bytes
+        self.colunas = colunas
+
+    @staticmethod
+    def disponivel():
+        return pa is not None
+
+    # ------------------------------------------------------------------
+    # Chave do cache
+    # ------------------------------------------------------------------
+
+    def _caminho_indice(self):
+        return self.diretorio / ARQUIVO_INDICE
+
+    def _ler_indice(self):
+        try:
+            with open(self._caminho_indice(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _gravar_indice(self, indice):
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        _gravar_atomico(
+            self._caminho_indice(),
+            json.dumps(indice, ensure_ascii=False, indent=2).encode('utf-8'),
+        )
+
+    def _hash_arquivo(self, caminho):
+        """SHA-256 do arquivo; reaproveitado do índice se tamanho e mtime não mudaram"""
+        info = os.stat(caminho)
+        origem = str(Path(caminho).resolve())
+        indice = self._ler_indice()
+        registro = indice.get(origem)
+        if registro and registro['tamanho'] == info.st_size and registro['mtime_ns'] == info.st_mtime_ns:
+            return registro['sha256']
+
+        sha = hashlib.sha256()
+        with open(caminho, 'rb') as f:
+            for parte in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(parte)
+
+        indice[origem] = {
+            'tamanho': info.st_size,
+            'mtime_ns': info.st_mtime_ns,
+            'sha256': sha.hexdigest(),
+        }
+        self._gravar_indice(indice)
+        return sha.hexdigest()
+
+    def caminho_snapshot(self, caminho_planilha):
+        """Arquivo .arrow correspondente à versão atual da planilha"""
+        projecao = json.dumps(
+            {'versao': VERSAO_FORMATO, 'colunas': sorted(self.colunas.items())}
+        ).encode('utf-8')
+        sufixo = hashlib.sha256(projecao).hexdigest()[:8]
+        return self.diretorio / f"{self._hash_arquivo(caminho_planilha)}_{sufixo}.arrow"
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def ler(self, caminho_planilha=CAMINHO_PLANILHA):
+        """DataFrame da planilha: do snapshot se existir, senão lê o .xlsx e grava o snapshot"""
+        snapshot = self.caminho_snapshot(caminho_planilha)
+        if snapshot.exists():
+            _tocar(snapshot)
+            return _do_arrow(self._abrir(snapshot).read_all())
+
+        df = ler_planilha(caminho_planilha, self.colunas)
+        self._gravar(snapshot, [_codificar(df)])
+        return df
+
+    def ler_em_blocos(self, caminho_planilha=CAMINHO_PLANILHA, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+        """
+        Blocos da planilha: do snapshot (memory-map) se existir; senão lê o .xlsx
+        em streaming, gravando o snapshot bloco a bloco
+        """
+        snapshot = self.caminho_snapshot(caminho_planilha)
+        if snapshot.exists():
+            _tocar(snapshot)
+            yield from self._blocos_do_snapshot(snapshot, tamanho_bloco)
+            return
+
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+        os.close(fd)
+        try:
+            with ipc.new_file(temporario, self._schema()) as escritor:
+                for bloco in ler_planilha_em_blocos(caminho_planilha, tamanho_bloco, self.colunas):
+                    escritor.write_table(
+                        pa.Table.from_pandas(_codificar(bloco), schema=self._schema(), preserve_index=False)
+                    )
+                    yield bloco
+            os.replace(temporario, snapshot)
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+        self._descartar_antigos(manter=snapshot)
+
+    def _blocos_do_snapshot(self, snapshot, tamanho_bloco):
+        tabela = self._abrir(snapshot).read_all()
+        inicio = 0
+        for lote in tabela.to_batches(max_chunksize=tamanho_bloco):
+            df = _do_arrow(lote)
+            df.index = pd.RangeIndex(inicio, inicio + len(df))
+            inicio += len(df)
+            yield df
+
+    # ------------------------------------------------------------------
+    # Gravação e descarte
+    # ------------------------------------------------------------------
+
+    def _schema(self):
+        campos = []
+        for _, nome in sorted(self.colunas.items()):
+            campos += [(nome, pa.string()), (nome + SUFIXO_TIPO, pa.int8())]
+        return pa.schema(campos)
+
+    def _abrir(self, snapshot):
+        return ipc.open_file(pa.memory_map(str(snapshot), 'r'))
+
+    def _gravar(self, snapshot, dataframes):
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+        os.close(fd)
+        try:
+            with ipc.new_file(temporario, self._schema()) as escritor:
+                for df in dataframes:
+                    escritor.write_table(pa.Table.from_pandas(df, schema=self._schema(), preserve_index=False))
+            os.replace(temporario, snapshot)
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+        self._descartar_antigos(manter=snapshot)
+
+    def _descartar_antigos(self, manter=None):
+        """Remove os snapshots usados há mais tempo até caber no limite de tamanho"""
+        snapshots = sorted(self.diretorio.glob("*.arrow"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in snapshots)
+        for snapshot in snapshots:
+            if total <= self.limite_bytes:
+                break
+            if manter is not None and snapshot == manter:
+                continue
+            total -= snapshot.stat().st_size
+            snapshot.unlink()
+
+    def limpar(self):
+        """Apaga todos os snapshots e o índice"""
+        for arquivo in list(self.diretorio.glob("*.arrow")) + [self._caminho_indice()]:
+            if arquivo.exists():
+                arquivo.unlink()
+
+
+def _codificar_celula(valor):
+    """Célula → (texto, código do tipo); (None, None) para vazios"""
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return None, None
+    if isinstance(valor, str):
+        return valor, 0
+    if isinstance(valor, (bool, np.bool_)):  # antes de int: bool é subclasse
+        return ('1' if valor else '0'), 3
+    if isinstance(valor, numbers.Integral):
+        return str(int(valor)), 1
+    if isinstance(valor, numbers.Real):
+        return repr(float(valor)), 2
+    if isinstance(valor, datetime.datetime):  # antes de date: datetime é subclasse
+        return pd.Timestamp(valor).to_pydatetime().isoformat(), 4
+    if isinstance(valor, datetime.date):
+        return valor.isoformat(), 5
+    if isinstance(valor, datetime.time):
+        return valor.isoformat(), 6
+    return str(valor), 0  # tipo desconhecido: guardado como texto
+
+
+def _codificar(df):
+    """
+    Arrow exige um tipo por coluna e as colunas da planilha misturam tipos
+    (CPF como número ou texto): cada coluna vira o texto da célula mais uma
+    coluna com o código do tipo original
+    """
+    colunas = {}
+    for nome in df.columns:
+        textos, tipos = zip(*map(_codificar_celula, df[nome])) if len(df) else ((), ())
+        colunas[nome] = pd.Series(textos, dtype=object)
+        colunas[nome + SUFIXO_TIPO] = pd.Series(tipos, dtype='float64').astype('Int8')
+    return pd.DataFrame(colunas)
+
+
+def _do_arrow(tabela):
+    """DataFrame com colunas object, os tipos originais e NaN nos vazios, como em ler_planilha()"""
+    dados = tabela.to_pandas()
+    colunas = {}
+    for nome in dados.columns:
+        if nome.endswith(SUFIXO_TIPO):
+            continue
+        valores = dados[nome].to_numpy(dtype=object, na_value=None)
+        tipos = dados[nome + SUFIXO_TIPO].to_numpy(dtype='float64', na_value=np.nan)
+        celulas = np.full(len(valores), np.nan, dtype=object)
+        for codigo, tipo in enumerate(TIPOS_CELULA):
+            posicoes = np.flatnonzero(tipos == codigo)
+            if len(posicoes):
+                converter = _DE_TEXTO[tipo]
+                celulas[posicoes] = [converter(valores[i]) for i in posicoes]
+        colunas[nome] = pd.Series(celulas, dtype=object)
+    return pd.DataFrame(colunas)
+
+
+def _tocar(snapshot):
+    """Marca o snapshot como usado agora (ordem do descarte)"""
+    os.utime(snapshot, None)
+
+
+def _gravar_atomico(caminho, conteudo):
+    fd, temporario = tempfile.mkstemp(dir=Path(caminho).parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def ler_planilha_com_cache(caminho_planilha=CAMINHO_PLANILHA, usar_cache=True, **opcoes_cache):
+    """ler_planilha() usando o cache colunar (leitura direta se desligado ou sem pyarrow)"""
+    if usar_cache and not CachePlanilha.disponivel():
+        print("⚠️  pyarrow não instalado - lendo a planilha sem cache")
+    if not usar_cache or not CachePlanilha.disponivel():
+        return ler_planilha(caminho_planilha)
+    return CachePlanilha(**opcoes_cache).ler(caminho_planilha)
+
+
+def ler_planilha_em_blocos_com_cache(caminho_planilha=CAMINHO_PLANILHA, usar_cache=True,
+                                     tamanho_bloco=TAMANHO_BLOCO_PADRAO, **opcoes_cache):
+    """ler_planilha_em_blocos() usando o cache colunar (leitura direta se desligado ou sem pyarrow)"""
+    if usar_cache and not CachePlanilha.disponivel():
+        print("⚠️  pyarrow não instalado - lendo a planilha sem cache")
+    if not usar_cache or not CachePlanilha.disponivel():
+        return ler_planilha_em_blocos(caminho_planilha, tamanho_bloco)
+    return CachePlanilha(**opcoes_cache).ler_em_blocos(caminho_planilha, tamanho_bloco)
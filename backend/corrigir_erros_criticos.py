@@ -2,220 +2,408 @@
 """
 Script para corrigir erros críticos no backend do CRM Arrighi
 - Substitui DateTime.Now por DateTime.UtcNow
-- Substitui Console.WriteLine por _logger.LogDebug (condicional)
+- Opcional: envolve Console.WriteLine em #if DEBUG e injeta ILogger nos controllers
+- Todas as regras em uma única passada por arquivo (reescrita_csharp.py), sem
+  alterar strings nem comentários
+- Varredura recursiva (varredura_arquivos.py) com padrões no estilo .gitignore:
+  ignora bin/, obj/, snapshots de Migrations e backups; os caminhos vão direto
+  para os processos do pool à medida que são encontrados
+- Arquivos processados em paralelo (um processo por núcleo)
+- Manifesto com tamanho, mtime e hash de cada arquivo já corrigido: arquivos
+  sem alteração desde a última execução são pulados sem serem lidos
+- Backups por hardlink (ou cópia pelo kernel) em .corrigir_erros_criticos/runs/<id>,
+  com um journal dos arquivos alterados; cada arquivo é regravado de forma atômica
+  (temporário + rename) e a execução inteira pode ser desfeita com --rollback
+- Tempo, CPU e memória por etapa (instrumentacao.py) no relatório JSON
+  .corrigir_erros_criticos/corrigir_erros_criticos.relatorio.json
+
+Uso:
+    python corrigir_erros_criticos.py                      # Controllers/
+    python corrigir_erros_criticos.py Controllers Services --jobs 8
+    python corrigir_erros_criticos.py --backend            # backend inteiro
+    python corrigir_erros_criticos.py --backend --excluir "Data/" --excluir "Models/Legado*.cs"
+    python corrigir_erros_criticos.py --sem-manifesto      # reprocessa tudo
+    python corrigir_erros_criticos.py --regras datetime console logger
+    python corrigir_erros_criticos.py --rollback 20250101-120000-4242
+    python corrigir_erros_criticos.py --backend --perfilar corrigir  # cProfile da etapa
 """
 
+import argparse
+import hashlib
+import json
 import os
-import re
+import shutil
+import time
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+from instrumentacao import SUFIXO_RELATORIO, Instrumentacao
+from reescrita_csharp import RULES, RewriteEngine
+from varredura_arquivos import PatternSet, scan
+
 # Configurações
 BACKEND_DIR = Path(__file__).parent
 CONTROLLERS_DIR = BACKEND_DIR / "Controllers"
-BACKUP_SUFFIX = ".backup_critical"
-
-# Contadores
-stats = {
-    "files_processed": 0,
-    "datetime_fixed": 0,
-    "console_fixed": 0,
-    "errors": 0
-}
-
-def backup_file(filepath):
-    """Cria backup do arquivo"""
-    backup_path = str(filepath) + BACKUP_SUFFIX
-    if not os.path.exists(backup_path):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        with open(backup_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        print(f"  ✅ Backup criado: {backup_path}")
-
-def fix_datetime_now(content):
-    """Substitui DateTime.Now por DateTime.UtcNow"""
-    count = content.count("DateTime.Now")
-    if count > 0:
-        content = content.replace("DateTime.Now", "DateTime.UtcNow")
-        stats["datetime_fixed"] += count
-    return content, count
-
-def add_logger_if_needed(content):
-    """Adiciona campo _logger se não existir e houver Console.WriteLine"""
-    if "Console.WriteLine" not in content:
-        return content, False
-
-    if "_logger" in content or "ILogger" in content:
-        return content, False  # Já tem logger
-
-    # Verificar se é um controller
-    if "public class" not in content or "Controller" not in content:
-        return content, False
-
-    # Extrair nome da classe
-    class_match = re.search(r'public class (\w+)', content)
-    if not class_match:
-        return content, False
-
-    class_name = class_match.group(1)
-
-    # Verificar se já tem campo readonly
-    has_readonly = re.search(r'private readonly \w+ ', content)
-    if not has_readonly:
-        return content, False
-
-    # Adicionar using Microsoft.Extensions.Logging se não existir
-    if "using Microsoft.Extensions.Logging;" not in content:
-        # Adicionar após outros usings
-        using_match = re.search(r'(using [^;]+;)\n+namespace', content)
-        if using_match:
-            last_using = using_match.group(1)
-            content = content.replace(
-                last_using,
-                last_using + "\nusing Microsoft.Extensions.Logging;"
-            )
-
-    # Adicionar campo _logger
-    field_pattern = r'(private readonly \w+ \w+;)'
-    field_match = re.search(field_pattern, content)
-    if field_match:
-        last_field = field_match.group(1)
-        content = content.replace(
-            last_field,
-            last_field + f"\n        private readonly ILogger<{class_name}> _logger;"
-        )
-
-    # Adicionar parâmetro no construtor
-    constructor_pattern = rf'public {class_name}\(([^)]*)\)'
-    constructor_match = re.search(constructor_pattern, content)
-    if constructor_match:
-        params = constructor_match.group(1)
-        if params.strip():
-            new_params = params + f", ILogger<{class_name}> logger"
-        else:
-            new_params = f"ILogger<{class_name}> logger"
-
-        old_constructor = constructor_match.group(0)
-        new_constructor = f"public {class_name}({new_params})"
-        content = content.replace(old_constructor, new_constructor)
-
-        # Adicionar atribuição no corpo do construtor
-        constructor_body_pattern = rf'public {class_name}\([^)]*\)\s*\{{'
-        constructor_body_match = re.search(constructor_body_pattern, content)
-        if constructor_body_match:
-            # Encontrar próxima linha após {
-            insert_pos = constructor_body_match.end()
-            # Adicionar atribuição
-            content = content[:insert_pos] + "\n            _logger = logger;" + content[insert_pos:]
-
-    return content, True
-
-def fix_console_writeline(content):
-    """Envolve Console.WriteLine em #if DEBUG (não substitui por logger para manter compatibilidade)"""
-    if "Console.WriteLine" not in content:
-        return content, 0
-
-    count = content.count("Console.WriteLine")
-
-    # Padrão: capturar linhas com Console.WriteLine
-    pattern = r'^(\s*)(Console\.WriteLine\([^)]*\);)$'
-
-    lines = content.split('\n')
-    new_lines = []
-    i = 0
-
-    while i < len(lines):
-        line = lines[i]
-        match = re.match(pattern, line)
-
-        if match:
-            indent = match.group(1)
-            console_line = match.group(2)
-
-            # Adicionar #if DEBUG antes
-            new_lines.append(f"{indent}#if DEBUG")
-            new_lines.append(line)
-            new_lines.append(f"{indent}#endif")
-            stats["console_fixed"] += 1
-        else:
-            new_lines.append(line)
-
-        i += 1
-
-    return '\n'.join(new_lines), count
-
-def process_file(filepath):
-    """Processa um arquivo"""
+STATE_DIR = BACKEND_DIR / ".corrigir_erros_criticos"
+MANIFEST_FILE = STATE_DIR / "manifest.json"
+REPORT_FILE = STATE_DIR / ("corrigir_erros_criticos" + SUFIXO_RELATORIO)
+RUNS_DIR = STATE_DIR / "runs"
+# Incrementar ao mudar as correções aplicadas: invalida o manifesto
+RULES_VERSION = 2
+# Console.WriteLine e logger continuam desligados por padrão (muito invasivos)
+DEFAULT_RULES = ("datetime",)
+
+# Padrões no estilo .gitignore, relativos a cada diretório varrido
+DEFAULT_INCLUDE = ["*.cs"]
+DEFAULT_EXCLUDE = [
+    "[Bb]in/",
+    "[Oo]bj/",
+    ".git/",
+    ".vs/",
+    "node_modules/",
+    ".corrigir_erros_criticos/",
+    "**/Migrations/*.Designer.cs",
+    "*ModelSnapshot.cs",
+    "*.backup*",
+    "*.bak*",
+]
+
+# Contadores de cada arquivo (somados no processo principal)
+STATS_KEYS = ["files_processed", "datetime_fixed", "console_fixed", "logger_added", "errors"]
+
+# Resultado de process_file: mensagens a imprimir, contadores e a nova entrada do manifesto
+FileResult = namedtuple("FileResult", ["path", "messages", "stats", "entry"])
+
+def file_fingerprint(filepath):
+    """Tamanho e mtime do arquivo (sem ler o conteúdo)"""
+    st = os.stat(filepath)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def manifest_key(filepath):
+    """Caminho relativo ao backend: o manifesto continua válido se o repositório mudar de lugar"""
+    return os.path.relpath(filepath, BACKEND_DIR)
+
+def load_manifest(rules=DEFAULT_RULES, path=MANIFEST_FILE):
+    """Entradas do manifesto (vazio se não existir ou se as correções mudaram)"""
     try:
-        print(f"\n📄 Processando: {filepath.name}")
-
-        # Ler conteúdo
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        original_content = content
-
-        # Criar backup
-        backup_file(filepath)
-
-        # Aplicar correções
-        content, datetime_count = fix_datetime_now(content)
-        if datetime_count > 0:
-            print(f"  ✅ {datetime_count} DateTime.Now → DateTime.UtcNow")
-
-        # Adicionar logger se necessário
-        # content, logger_added = add_logger_if_needed(content)
-        # if logger_added:
-        #     print(f"  ✅ Logger adicionado ao controller")
-
-        # Comentar Console.WriteLine (não fazer nada por enquanto - muito invasivo)
-        # content, console_count = fix_console_writeline(content)
-        # if console_count > 0:
-        #     print(f"  ✅ {console_count} Console.WriteLine envoltos em #if DEBUG")
-
-        # Salvar se houve mudanças
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if manifest.get("rules_version") != RULES_VERSION or manifest.get("rules") != sorted(rules):
+        return {}
+    return manifest.get("files", {})
+
+def save_manifest(files, rules=DEFAULT_RULES, path=MANIFEST_FILE):
+    """Grava o manifesto (arquivo temporário + rename)"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = str(path) + ".tmp"
+    manifest = {"rules_version": RULES_VERSION, "rules": sorted(rules), "files": files}
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def is_unchanged(filepath, entry):
+    """Mesmo tamanho e mtime registrados no manifesto"""
+    return entry is not None and {k: entry.get(k) for k in ("size", "mtime_ns")} == file_fingerprint(filepath)
+
+def sha256_of(filepath):
+    with open(filepath, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def new_run_id():
+    """Identificador da execução (nome do diretório dos backups)"""
+    return time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+
+def snapshot_file(filepath, run_dir):
+    """
+    Backup sem copiar o conteúdo em Python: hardlink no diretório da execução.
+    Como o arquivo é regravado com rename (novo inode), o link guarda a versão
+    original. Em outro sistema de arquivos, shutil.copy2 usa a cópia do kernel.
+    """
+    relative = manifest_key(filepath).replace("..", "__")
+    backup_path = Path(run_dir) / "files" / relative
+    backup_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(filepath, backup_path)
+    except OSError:
+        shutil.copy2(filepath, backup_path)
+    return relative
+
+def write_atomic(filepath, data):
+    """Grava em um temporário no mesmo diretório e troca com os.replace"""
+    filepath = Path(filepath)
+    tmp_path = filepath.with_name(f".{filepath.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(filepath, tmp_path)
+        os.replace(tmp_path, filepath)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+def append_journal(run_dir, entry):
+    """Um journal por processo do pool: sem disputa pelo mesmo arquivo"""
+    with open(Path(run_dir) / f"journal-{os.getpid()}.jsonl", 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def read_journal(run_dir):
+    entries = []
+    for journal in sorted(Path(run_dir).glob("journal-*.jsonl")):
+        with open(journal, 'r', encoding='utf-8') as f:
+            entries.extend(json.loads(line) for line in f if line.strip())
+    return entries
+
+@lru_cache(maxsize=None)
+def get_engine(rules):
+    """Motor com as regras indicadas (um por processo do pool)"""
+    return RewriteEngine([RULES[name]() for name in rules])
+
+def process_file(filepath, expected_sha256=None, rules=DEFAULT_RULES, run_dir=None):
+    """
+    Processa um arquivo (executa nos processos do pool). Lê o conteúdo uma única
+    vez; se o hash for o registrado no manifesto (arquivo só foi tocado), não
+    aplica as correções. Antes de regravar, faz o backup em run_dir e registra o
+    arquivo no journal. Retorna FileResult em vez de alterar estado global.
+    """
+    filepath = Path(filepath)
+    messages = [f"\n📄 Processando: {filepath.name}"]
+    stats = Counter()
+    try:
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        sha256 = hashlib.sha256(raw).hexdigest()
+        if sha256 == expected_sha256:
+            messages.append("  ℹ️  Conteúdo igual ao do manifesto")
+            return FileResult(str(filepath), messages, stats, dict(file_fingerprint(filepath), sha256=sha256))
+
+        # Leitura e escrita em bytes: mantém as quebras de linha originais (CRLF)
+        original_content = content = raw.decode('utf-8')
+
+        # Aplicar correções (todas as regras em uma passada)
+        content, counts = get_engine(tuple(rules)).rewrite(content)
+        stats.update(counts)
+        if counts["datetime_fixed"]:
+            messages.append(f"  ✅ {counts['datetime_fixed']} DateTime.Now → DateTime.UtcNow")
+        if counts["logger_added"]:
+            messages.append("  ✅ Logger adicionado ao controller")
+        if counts["console_fixed"]:
+            messages.append(f"  ✅ {counts['console_fixed']} Console.WriteLine envoltos em #if DEBUG")
+
+        # Salvar se houve mudanças (backup só dos arquivos alterados)
         if content != original_content:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            print(f"  💾 Arquivo salvo")
+            encoded = content.encode('utf-8')
+            new_sha256 = hashlib.sha256(encoded).hexdigest()
+            if run_dir is not None:
+                backup = snapshot_file(filepath, run_dir)
+                append_journal(run_dir, {
+                    "path": str(filepath.resolve()),
+                    "backup": backup,
+                    "sha256_before": sha256,
+                    "sha256_after": new_sha256,
+                })
+            write_atomic(filepath, encoded)
+            sha256 = new_sha256
+            messages.append("  💾 Arquivo salvo")
             stats["files_processed"] += 1
         else:
-            print(f"  ℹ️  Nenhuma mudança necessária")
+            messages.append("  ℹ️  Nenhuma mudança necessária")
+
+        return FileResult(str(filepath), messages, stats, dict(file_fingerprint(filepath), sha256=sha256))
 
     except Exception as e:
-        print(f"  ❌ Erro: {e}")
+        messages.append(f"  ❌ Erro: {e}")
         stats["errors"] += 1
+        return FileResult(str(filepath), messages, stats, None)
+
+def find_cs_files(directories, include=(), exclude=()):
+    """Gera os arquivos .cs dos diretórios, recursivamente (exceto bin/, obj/, backups...)"""
+    return scan(
+        directories,
+        PatternSet(DEFAULT_INCLUDE).extend(include),
+        PatternSet(DEFAULT_EXCLUDE).extend(exclude),
+    )
+
+def run(cs_files, jobs=None, manifest=None, rules=DEFAULT_RULES, run_dir=None):
+    """
+    Processa os arquivos em um pool de processos e soma os contadores.
+    Arquivos com tamanho e mtime iguais aos do manifesto são pulados sem leitura.
+    Backups e journal em run_dir (None: sem backup).
+    Retorna (contadores, manifesto atualizado).
+    """
+    manifest = {} if manifest is None else dict(manifest)
+    totals = Counter({key: 0 for key in STATS_KEYS})
+
+    def pending():
+        for filepath in cs_files:
+            totals["found"] += 1
+            entry = manifest.get(manifest_key(filepath))
+            if is_unchanged(filepath, entry):
+                totals["skipped"] += 1
+            else:
+                yield filepath, entry["sha256"] if entry else None
+
+    def collect(result):
+        for message in result.messages:
+            print(message)
+        totals.update(result.stats)
+        key = manifest_key(result.path)
+        if result.entry is None:
+            manifest.pop(key, None)
+        else:
+            manifest[key] = result.entry
 
-def main():
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for filepath, sha256 in pending():
+            collect(process_file(filepath, sha256, rules, run_dir))
+    else:
+        # Cada arquivo vai para o pool assim que a varredura o encontra; no máximo
+        # jobs * 4 em andamento, resultados coletados na ordem da varredura
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for filepath, sha256 in pending():
+                in_flight.append(pool.submit(process_file, filepath, sha256, rules, run_dir))
+                if len(in_flight) >= jobs * 4:
+                    collect(in_flight.popleft().result())
+            while in_flight:
+                collect(in_flight.popleft().result())
+
+    return totals, manifest
+
+def rollback(run_id, force=False):
+    """
+    Restaura os arquivos alterados na execução run_id a partir dos backups.
+    Arquivos modificados depois da execução só são restaurados com force.
+    Retorna (restaurados, ignorados).
+    """
+    run_dir = RUNS_DIR / run_id
+    entries = read_journal(run_dir)
+    if not entries:
+        raise FileNotFoundError(f"Nenhum journal para a execução '{run_id}' em {RUNS_DIR}")
+
+    restored, skipped = [], []
+    for entry in entries:
+        filepath = Path(entry["path"])
+        current = sha256_of(filepath) if filepath.exists() else None
+        if current == entry["sha256_before"]:
+            continue  # Interrompido antes do rename: arquivo ainda é o original
+        if current != entry["sha256_after"] and not force:
+            print(f"  ⚠️  Alterado depois da execução, não restaurado: {filepath}")
+            skipped.append(filepath)
+            continue
+        tmp_path = filepath.with_name(f".{filepath.name}.{os.getpid()}.tmp")
+        shutil.copy2(run_dir / "files" / entry["backup"], tmp_path)
+        os.replace(tmp_path, filepath)
+        print(f"  ↩️  Restaurado: {filepath}")
+        restored.append(filepath)
+
+    # Os arquivos restaurados voltam a ser processados na próxima execução
+    if restored and MANIFEST_FILE.exists():
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        for filepath in restored:
+            manifest.get("files", {}).pop(manifest_key(filepath), None)
+        save_manifest(manifest.get("files", {}), manifest.get("rules", DEFAULT_RULES))
+    return len(restored), len(skipped)
+
+def main(argv=None):
     """Função principal"""
+    parser = argparse.ArgumentParser(description="Corrige erros críticos nos arquivos .cs do backend")
+    parser.add_argument('diretorios', nargs='*', default=[str(CONTROLLERS_DIR)],
+                        help='Diretórios com arquivos .cs, varridos recursivamente (padrão: Controllers/)')
+    parser.add_argument('--backend', action='store_true',
+                        help='Varre o backend inteiro (em vez dos diretórios indicados)')
+    parser.add_argument('--incluir', action='append', default=[], metavar='PADRAO',
+                        help='Padrão .gitignore de arquivos a incluir, além de *.cs (repetível)')
+    parser.add_argument('--excluir', action='append', default=[], metavar='PADRAO',
+                        help='Padrão .gitignore a excluir; "!padrao" reinclui (repetível)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Processos em paralelo (padrão: número de núcleos)')
+    parser.add_argument('--regras', nargs='+', choices=sorted(RULES), default=list(DEFAULT_RULES),
+                        help='Correções a aplicar (padrão: datetime)')
+    parser.add_argument('--sem-manifesto', action='store_true',
+                        help='Ignora o manifesto e reprocessa todos os arquivos')
+    parser.add_argument('--rollback', metavar='RUN_ID',
+                        help='Desfaz a execução indicada (diretório em .corrigir_erros_criticos/runs)')
+    parser.add_argument('--forcar', action='store_true',
+                        help='No rollback, restaura também arquivos alterados depois da execução')
+    parser.add_argument('--perfilar', choices=['manifesto', 'corrigir', 'gravar'], default=None,
+                        help='Grava o cProfile da etapa indicada (.prof ao lado do relatório)')
+    parser.add_argument('--sem-memoria', action='store_true',
+                        help='Não mede o pico de memória por etapa (tracemalloc deixa a execução mais lenta)')
+    opcoes = parser.parse_args(argv)
+
+    if opcoes.rollback:
+        print(f"↩️  Desfazendo a execução {opcoes.rollback}...")
+        try:
+            restored, skipped = rollback(opcoes.rollback, opcoes.forcar)
+        except FileNotFoundError as e:
+            print(f"❌ Erro: {e}")
+            return 1
+        print(f"\n✅ {restored} arquivo(s) restaurado(s), {skipped} ignorado(s)")
+        return 1 if skipped else 0
+
+    diretorios = [str(BACKEND_DIR)] if opcoes.backend else opcoes.diretorios
     print("🔧 Corrigindo erros críticos no backend...")
-    print(f"📁 Diretório: {CONTROLLERS_DIR}")
+    for diretorio in diretorios:
+        print(f"📁 Diretório: {diretorio}")
     print("=" * 60)
 
-    # Processar arquivos .cs (exceto backups)
-    cs_files = [
-        f for f in CONTROLLERS_DIR.glob("*.cs")
-        if not f.name.endswith(".backup") and not f.name.endswith(".bak")
-    ]
-
-    print(f"\n📊 Encontrados {len(cs_files)} arquivos .cs")
-
-    for filepath in sorted(cs_files):
-        process_file(filepath)
+    instrumentacao = Instrumentacao('corrigir_erros_criticos', not opcoes.sem_memoria, opcoes.perfilar)
+    instrumentacao.parametros = {
+        chave: valor for chave, valor in vars(opcoes).items() if chave not in ('sem_memoria', 'perfilar')
+    }
+
+    # Processar arquivos .cs (exceto bin/, obj/, snapshots de Migrations e backups)
+    cs_files = find_cs_files(diretorios, opcoes.incluir, opcoes.excluir)
+
+    rules = tuple(sorted(set(opcoes.regras)))
+    with instrumentacao.etapa('manifesto'):
+        manifest = {} if opcoes.sem_manifesto else load_manifest(rules)
+    run_id = new_run_id()
+    run_dir = RUNS_DIR / run_id
+    # Varredura e correção intercaladas: uma única etapa. Com --jobs > 1 o CPU
+    # da etapa é só o do processo principal (os processos do pool ficam de fora)
+    with instrumentacao.etapa('corrigir'):
+        stats, manifest = run(cs_files, opcoes.jobs, manifest, rules, str(run_dir))
+    with instrumentacao.etapa('gravar'):
+        save_manifest(manifest, rules)
 
     # Estatísticas finais
     print("\n" + "=" * 60)
     print("📊 ESTATÍSTICAS FINAIS:")
+    print(f"  📄 Arquivos .cs encontrados: {stats['found']}")
     print(f"  ✅ Arquivos processados: {stats['files_processed']}")
+    print(f"  ⏭️  Sem alteração desde a última execução: {stats['skipped']}")
     print(f"  🔧 DateTime.Now corrigidos: {stats['datetime_fixed']}")
     print(f"  📝 Console.WriteLine tratados: {stats['console_fixed']}")
+    print(f"  🪵 Loggers adicionados: {stats['logger_added']}")
     print(f"  ❌ Erros: {stats['errors']}")
     print("=" * 60)
 
+    instrumentacao.imprimir()
+    relatorio = instrumentacao.gravar_relatorio(
+        None, destino=REPORT_FILE, execucao=run_id, **{key: stats[key] for key in ['found', 'skipped'] + STATS_KEYS}
+    )
+    print(f"📈 Relatório de execução gerado em '{relatorio}'")
+
+    if run_dir.exists():
+        print(f"\n↩️  Backups em {run_dir}")
+        print(f"   Para desfazer: python corrigir_erros_criticos.py --rollback {run_id}")
+
     if stats['errors'] == 0:
         print("\n✅ Correções concluídas com sucesso!")
     else:
         print(f"\n⚠️  Concluído com {stats['errors']} erro(s)")
+    return 1 if stats['errors'] else 0
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+"""
+Modo delta: SQL só para os clientes cuja filial mudou desde a última carga aplicada
+- Snapshot da última carga: documento (chave) → tipo de pessoa, filial e hash da linha
+- Comparação por um único JOIN de hash (merge pelo documento, compara o hash)
+- Resultado: documentos novos, movidos de filial e removidos da planilha
+- O novo snapshot fica pendente até o script ser aplicado no banco:
+      python delta_filiais.py confirmar snapshot_filiais.csv.gz
+
+Uso pelo pipeline:
+    python pipeline_filiais.py planilha.xlsx --delta snapshot_filiais.csv.gz
+"""
+
+import os
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+import pandas as pd
+
+ARQUIVO_SNAPSHOT = 'snapshot_filiais.csv.gz'
+SUFIXO_PENDENTE = '.pendente'
+COLUNAS_SNAPSHOT = ['documento', 'documento_formatado', 'tipo_pessoa', 'filial', 'hash']
+
+Delta = namedtuple('Delta', ['inseridos', 'movidos', 'removidos', 'inalterados'])
+
+
+def hash_linhas(pares):
+    """Hash de 64 bits de cada linha (tipo de pessoa + filial), independente do índice"""
+    valores = pares[['tipo_pessoa', 'filial']].astype(str)
+    return pd.util.hash_pandas_object(valores, index=False).astype('uint64')
+
+
+class SnapshotFiliais:
+    """Última atribuição documento → filial aplicada no banco (CSV, .gz comprimido)"""
+
+    def __init__(self, caminho=ARQUIVO_SNAPSHOT):
+        self.caminho = Path(caminho)
+        self.pendente = self.caminho.with_name(self.caminho.name + SUFIXO_PENDENTE)
+
+    def existe(self):
+        return self.caminho.exists()
+
+    def carregar(self, coluna='FilialId'):
+        """Pares da última carga (vazio se ainda não houver snapshot)"""
+        if not self.existe():
+            return pd.DataFrame({nome: pd.Series(dtype=object) for nome in COLUNAS_SNAPSHOT})
+        anterior = pd.read_csv(
+            self.caminho, dtype={'documento': str, 'documento_formatado': str, 'tipo_pessoa': str, 'filial': str},
+            compression='infer',
+        )
+        if coluna == 'FilialId':
+            anterior['filial'] = anterior['filial'].astype('int64')
+        anterior['hash'] = anterior['hash'].astype('uint64')
+        return anterior
+
+    def gravar_pendente(self, pares):
+        """Grava a atribuição atual como pendente (vale após confirmar())"""
+        snapshot = pares[COLUNAS_SNAPSHOT[:-1]].assign(hash=hash_linhas(pares))
+        self.pendente.parent.mkdir(parents=True, exist_ok=True)
+        # compression explícito: o sufixo .pendente esconde a extensão .gz
+        compressao = 'gzip' if self.caminho.suffix == '.gz' else None
+        snapshot.to_csv(self.pendente, index=False, encoding='utf-8', compression=compressao)
+        return self.pendente
+
+    def confirmar(self):
+        """Promove o snapshot pendente depois que o script foi aplicado no banco"""
+        if not self.pendente.exists():
+            raise FileNotFoundError(f"Nenhum snapshot pendente em '{self.pendente}'")
+        os.replace(self.pendente, self.caminho)
+        return self.caminho
+
+
+def calcular_delta(anterior, atual):
+    """
+    Compara a carga anterior com a atual (pares de montar_pares()) em um único merge
+    pelo documento. Retorna Delta com os pares inseridos e movidos (da carga atual),
+    os removidos (da carga anterior) e a quantidade de inalterados.
+    """
+    atual = atual.assign(hash=hash_linhas(atual))
+    juncao = atual[['documento', 'hash']].merge(
+        anterior[['documento', 'hash']], on='documento', how='outer',
+        suffixes=('', '_anterior'), indicator=True,
+    )
+
+    novos = set(juncao.loc[juncao['_merge'] == 'left_only', 'documento'])
+    ambos = juncao['_merge'] == 'both'
+    movidos = set(juncao.loc[ambos & (juncao['hash'] != juncao['hash_anterior']), 'documento'])
+    removidos = set(juncao.loc[juncao['_merge'] == 'right_only', 'documento'])
+
+    colunas = COLUNAS_SNAPSHOT[:-1]
+    return Delta(
+        inseridos=atual.loc[atual['documento'].isin(novos), colunas].reset_index(drop=True),
+        movidos=atual.loc[atual['documento'].isin(movidos), colunas].reset_index(drop=True),
+        removidos=anterior.loc[anterior['documento'].isin(removidos), colunas].reset_index(drop=True),
+        inalterados=int(ambos.sum()) - len(movidos),
+    )
+
+
+def pares_alterados(delta):
+    """Inseridos + movidos, no formato de montar_pares() (entrada da tabela temporária)"""
+    return pd.concat([delta.inseridos, delta.movidos], ignore_index=True)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) not in (1, 2) or argv[0] != 'confirmar':
+        print("Uso: python delta_filiais.py confirmar [snapshot_filiais.csv.gz]")
+        return 1
+    snapshot = SnapshotFiliais(argv[1] if len(argv) == 2 else ARQUIVO_SNAPSHOT)
+    try:
+        print(f"✅ Snapshot confirmado em '{snapshot.confirmar()}'")
+    except FileNotFoundError as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
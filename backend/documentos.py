@@ -0,0 +1,161 @@
+"""
+Normalização e validação vetorizada de CPF/CNPJ (coluna B da planilha)
+- Corrige valores que o Excel transformou em número (zeros à esquerda perdidos, ".0")
+- Completa com zeros até 11 (CPF) ou 14 (CNPJ) dígitos e classifica PF/PJ
+- Confere os dois dígitos verificadores com arrays NumPy, sem loop por linha
+- Devolve a coluna de chaves limpas e o relatório das linhas rejeitadas
+"""
+
+import numpy as np
+import pandas as pd
+
+TAMANHO_CPF = 11
+TAMANHO_CNPJ = 14
+
+PESOS_CPF_DV1 = np.arange(10, 1, -1)                                 # 10..2 (9 dígitos)
+PESOS_CPF_DV2 = np.arange(11, 1, -1)                                 # 11..2 (10 dígitos)
+PESOS_CNPJ_DV1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])      # 12 dígitos
+PESOS_CNPJ_DV2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])   # 13 dígitos
+
+# Motivos de rejeição
+MOTIVO_VAZIO = 'vazio'
+MOTIVO_TAMANHO = 'tamanho_invalido'
+MOTIVO_REPETIDOS = 'digitos_repetidos'
+MOTIVO_DIGITO = 'digito_verificador'
+
+ARQUIVO_REJEITADOS = 'documentos_rejeitados.csv'
+
+
+def extrair_digitos(serie):
+    """Texto só com os dígitos de cada célula ('' para nulos; remove o '.0' de floats)"""
+    return (
+        serie.where(serie.notna(), '')
+        .astype(str)
+        .str.strip()
+        .str.replace(r'\.0+$', '', regex=True)
+        .str.replace(r'[^0-9]', '', regex=True)  # \D manteria dígitos Unicode (ex.: '１２３')
+    )
+
+
+def chaves_documentos(serie):
+    """
+    CPF/CNPJ como chave inteira de largura fixa (UInt64, até 14 dígitos) em vez
+    de texto por linha; <NA> para vazios ou valores com mais de 14 dígitos
+    """
+    digitos = extrair_digitos(serie)
+    validos = digitos.str.len().between(1, TAMANHO_CNPJ)
+    return digitos.where(validos).astype('UInt64')
+
+
+def _matriz_digitos(textos, largura):
+    """Converte textos de dígitos com a mesma largura em uma matriz (n, largura) de int"""
+    if len(textos) == 0:
+        return np.zeros((0, largura), dtype=np.int64)
+    buffer = "".join(textos).encode('ascii')
+    return (np.frombuffer(buffer, dtype=np.uint8).reshape(-1, largura) - ord('0')).astype(np.int64)
+
+
+def _digito_verificador(digitos, pesos):
+    resto = (digitos * pesos).sum(axis=1) % 11
+    return np.where(resto < 2, 0, 11 - resto)
+
+
+def _repetidos(matriz):
+    return (matriz == matriz[:, :1]).all(axis=1)
+
+
+def completar_digitos_verificadores(base):
+    """
+    Acrescenta os dois dígitos verificadores a uma matriz de bases: (n, 9) para
+    CPF ou (n, 12) para CNPJ. Retorna a matriz (n, 11) ou (n, 14) de dígitos.
+    """
+    if base.shape[1] == TAMANHO_CPF - 2:
+        pesos_dv1, pesos_dv2 = PESOS_CPF_DV1, PESOS_CPF_DV2
+    elif base.shape[1] == TAMANHO_CNPJ - 2:
+        pesos_dv1, pesos_dv2 = PESOS_CNPJ_DV1, PESOS_CNPJ_DV2
+    else:
+        raise ValueError(f"Base com {base.shape[1]} dígitos (esperado 9 ou 12)")
+    com_dv1 = np.column_stack([base, _digito_verificador(base, pesos_dv1)])
+    return np.column_stack([com_dv1, _digito_verificador(com_dv1, pesos_dv2)])
+
+
+def validar_cpf(matriz):
+    """Máscara dos CPFs válidos em uma matriz (n, 11) de dígitos"""
+    dv1 = _digito_verificador(matriz[:, :9], PESOS_CPF_DV1)
+    dv2 = _digito_verificador(matriz[:, :10], PESOS_CPF_DV2)
+    return (matriz[:, 9] == dv1) & (matriz[:, 10] == dv2)
+
+
+def validar_cnpj(matriz):
+    """Máscara dos CNPJs válidos em uma matriz (n, 14) de dígitos"""
+    dv1 = _digito_verificador(matriz[:, :12], PESOS_CNPJ_DV1)
+    dv2 = _digito_verificador(matriz[:, :13], PESOS_CNPJ_DV2)
+    return (matriz[:, 12] == dv1) & (matriz[:, 13] == dv2)
+
+
+def normalizar_documentos(serie):
+    """
+    Normaliza e valida a coluna de CPF/CNPJ inteira.
+    Retorna (documentos, rejeitados):
+    - documentos: DataFrame com o mesmo índice da série e as colunas
+      'documento' (11 ou 14 dígitos, None se rejeitado) e 'tipo_pessoa'
+      ('Fisica', 'Juridica' ou None)
+    - rejeitados: DataFrame com 'linha_planilha', 'valor_original' e 'motivo'
+
+    Valores com até 11 dígitos são tratados como CPF; se não forem um CPF
+    válido mas formarem um CNPJ válido ao completar 14 dígitos (CNPJ que
+    perdeu os zeros à esquerda no Excel), são aceitos como CNPJ.
+    """
+    digitos = extrair_digitos(serie)
+    tamanho = digitos.str.len().to_numpy(dtype=np.int64)
+    total = len(tamanho)
+
+    documento = np.full(total, None, dtype=object)
+    tipo_pessoa = np.full(total, None, dtype=object)
+    motivo = np.full(total, None, dtype=object)
+
+    motivo[tamanho == 0] = MOTIVO_VAZIO
+    motivo[tamanho > TAMANHO_CNPJ] = MOTIVO_TAMANHO
+
+    candidatos = np.flatnonzero((tamanho > 0) & (tamanho <= TAMANHO_CNPJ))
+    textos_cnpj = digitos.iloc[candidatos].str.zfill(TAMANHO_CNPJ)
+    matriz = _matriz_digitos(textos_cnpj, TAMANHO_CNPJ)
+
+    # Mesma matriz serve para os dois tipos: o CPF são os 11 últimos dígitos
+    pode_ser_cpf = tamanho[candidatos] <= TAMANHO_CPF
+    matriz_cpf = matriz[:, TAMANHO_CNPJ - TAMANHO_CPF:]
+    cpf_valido = pode_ser_cpf & validar_cpf(matriz_cpf) & ~_repetidos(matriz_cpf)
+    cnpj_valido = ~cpf_valido & validar_cnpj(matriz) & ~_repetidos(matriz)
+
+    documento[candidatos[cpf_valido]] = textos_cnpj[cpf_valido].str[TAMANHO_CNPJ - TAMANHO_CPF:].to_numpy(dtype=object)
+    tipo_pessoa[candidatos[cpf_valido]] = 'Fisica'
+    documento[candidatos[cnpj_valido]] = textos_cnpj[cnpj_valido].to_numpy(dtype=object)
+    tipo_pessoa[candidatos[cnpj_valido]] = 'Juridica'
+
+    invalidos = ~cpf_valido & ~cnpj_valido
+    repetidos = np.where(pode_ser_cpf, _repetidos(matriz_cpf), _repetidos(matriz))
+    motivo[candidatos[invalidos & repetidos]] = MOTIVO_REPETIDOS
+    motivo[candidatos[invalidos & ~repetidos]] = MOTIVO_DIGITO
+
+    documentos = pd.DataFrame(
+        {'documento': documento, 'tipo_pessoa': tipo_pessoa},
+        index=serie.index,
+    )
+
+    rejeitado = motivo != None  # noqa: E711 (comparação elemento a elemento)
+    rejeitados = pd.DataFrame({
+        'linha_planilha': np.asarray(serie.index)[rejeitado] + 2,  # +1 cabeçalho, +1 base 1
+        'valor_original': serie.to_numpy(dtype=object)[rejeitado],
+        'motivo': motivo[rejeitado],
+    })
+    return documentos, rejeitados
+
+
+def resumo_rejeitados(rejeitados):
+    """Quantidade de linhas rejeitadas por motivo"""
+    return rejeitados['motivo'].value_counts()
+
+
+def salvar_rejeitados(rejeitados, caminho=ARQUIVO_REJEITADOS):
+    """Grava o relatório de linhas rejeitadas em CSV (abre direto no Excel)"""
+    rejeitados.to_csv(caminho, index=False, encoding='utf-8-sig')
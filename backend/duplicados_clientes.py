@@ -0,0 +1,149 @@
+"""
+Detecção de clientes duplicados na planilha (pessoas físicas e jurídicas)
+- Colisões exatas: índice hash pelo CPF/CNPJ normalizado ('123.456.789-09' e
+  '12345678909' são o mesmo documento)
+- Nomes quase iguais: sorted neighborhood em vez de comparar todos os pares -
+  as linhas são ordenadas por uma chave do nome e cada uma é comparada só com
+  as `janela` - 1 seguintes, em duas passadas (tokens em ordem alfabética e a
+  mesma chave invertida, para erros no início do nome); custo O(n log n + n·janela)
+- Chave do nome sem acentos, caixa, pontuação, preposições e sufixos de empresa
+  ('Araújo Natália LTDA' e 'Natalia Araujo' têm a mesma chave), então PF e PJ do
+  mesmo titular também são comparados
+- Homônimos não são duplicados: dois CPFs (ou dois CNPJs) válidos e diferentes
+  com o mesmo nome não entram no relatório
+"""
+
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+
+from ingestao_planilhas import chaves_filial
+
+JANELA_PADRAO = 5
+LIMIAR_NOME_PADRAO = 0.9
+ARQUIVO_DUPLICADOS_DOCUMENTO = 'duplicados_documento.csv'
+ARQUIVO_DUPLICADOS_NOME = 'duplicados_nome.csv'
+
+# Tokens ignorados na chave do nome (já sem acentos e pontuação)
+PALAVRAS_IGNORADAS = {
+    'de', 'da', 'do', 'das', 'dos', 'e',
+    'ltda', 'me', 'epp', 'eireli', 'sa', 's', 'a', 'cia', 'mei', 'ss',
+}
+
+# Colunas de cada linha levadas para os relatórios (as de origem, se houver)
+COLUNAS_RELATORIO = ['arquivo', 'aba', 'linha_planilha', 'nome', 'cpf_cnpj', 'documento', 'tipo_pessoa', 'filial']
+
+
+def chaves_nome(nome):
+    """Chave de comparação do nome: tokens normalizados em ordem alfabética"""
+    codigos, distintos = pd.factorize(nome.where(nome.notna(), ''), sort=False)
+    tokens = (
+        pd.Series(distintos, dtype=object).astype(str)
+        .str.normalize('NFKD')
+        .str.replace('[\u0300-\u036f]', '', regex=True)  # marcas de acento
+        .str.casefold()
+        .str.replace(r'[^0-9a-z]+', ' ', regex=True)
+        .str.split()
+    )
+    chaves = np.array(
+        [' '.join(sorted(t for t in lista if t not in PALAVRAS_IGNORADAS)) for lista in tokens],
+        dtype=object,
+    )
+    return pd.Series(chaves[codigos] if len(codigos) else [], index=nome.index, dtype=object)
+
+
+def _colunas_relatorio(dados):
+    return [coluna for coluna in COLUNAS_RELATORIO if coluna in dados.columns]
+
+
+def duplicados_por_documento(dados, mapeador=None):
+    """
+    Linhas cujo CPF/CNPJ normalizado aparece mais de uma vez, agrupadas por
+    documento, com 'ocorrencias' e 'filiais_diferentes' (comparadas pela filial
+    do sistema se houver `mapeador`). `dados`: colunas de ler_planilha() mais
+    'documento' e 'tipo_pessoa' (normalizar_documentos) e 'linha_planilha'.
+    """
+    validas = dados[dados['documento'].notna()]
+    # duplicated() usa uma tabela hash: uma passada pela coluna inteira
+    repetidas = validas[validas['documento'].duplicated(keep=False)]
+    documento = repetidas['documento']
+    chave = chaves_filial(repetidas['filial'], mapeador)
+    relatorio = repetidas[_colunas_relatorio(repetidas)].assign(
+        ocorrencias=documento.groupby(documento).transform('size'),
+        filiais_diferentes=chave.groupby(documento).transform('nunique') > 1,
+    )
+    return relatorio.sort_values('documento', kind='stable').reset_index(drop=True)
+
+
+def _pares_vizinhos(chave, janela):
+    """Pares (i, j), i < j, de posições vizinhas na ordenação por `chave`"""
+    ordem = np.argsort(chave, kind='stable')
+    esquerda, direita = [], []
+    for distancia in range(1, janela):
+        esquerda.append(ordem[:-distancia])
+        direita.append(ordem[distancia:])
+    if not esquerda:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    i, j = np.concatenate(esquerda), np.concatenate(direita)
+    return np.minimum(i, j), np.maximum(i, j)
+
+
+def similaridade(chave_a, chave_b):
+    """Razão de semelhança (0 a 1) entre duas chaves de nome"""
+    if chave_a == chave_b:
+        return 1.0
+    return SequenceMatcher(None, chave_a, chave_b).ratio()
+
+
+def nomes_semelhantes(dados, janela=JANELA_PADRAO, limiar=LIMIAR_NOME_PADRAO, mapeador=None):
+    """
+    Pares de linhas com nomes semelhantes (similaridade >= `limiar`) entre as
+    vizinhas de cada linha nas duas ordenações, sem os pares com o mesmo CPF/CNPJ
+    (já em duplicados_por_documento) nem os homônimos. Um par por linha do
+    resultado: colunas de cada lado com sufixo _1/_2, 'similaridade' e
+    'filiais_diferentes'.
+    """
+    chave = chaves_nome(dados['nome'])
+    com_nome = np.flatnonzero(chave.to_numpy() != '')
+    chaves = chave.to_numpy()[com_nome].astype(str)
+
+    # Duas passadas do sorted neighborhood: chave direta e invertida
+    invertidas = np.array([c[::-1] for c in chaves], dtype=str)
+    passadas = [_pares_vizinhos(chaves, janela), _pares_vizinhos(invertidas, janela)]
+    i = com_nome[np.concatenate([p[0] for p in passadas])]
+    j = com_nome[np.concatenate([p[1] for p in passadas])]
+    pares = pd.DataFrame({'i': i, 'j': j}).drop_duplicates(ignore_index=True)
+
+    documento = dados['documento'].to_numpy(dtype=object)
+    tipo = dados['tipo_pessoa'].to_numpy(dtype=object)
+    d_i, d_j = documento[pares['i']], documento[pares['j']]
+    validos = pd.notna(d_i) & pd.notna(d_j)
+    mesmo_documento = validos & (d_i == d_j)
+    homonimos = validos & (d_i != d_j) & (tipo[pares['i']] == tipo[pares['j']])
+    pares = pares[~mesmo_documento & ~homonimos]
+
+    chave_completa = chave.to_numpy()
+    pares = pares.assign(similaridade=[
+        similaridade(chave_completa[a], chave_completa[b])
+        if _limite_superior(chave_completa[a], chave_completa[b]) >= limiar else 0.0
+        for a, b in zip(pares['i'], pares['j'])
+    ])
+    pares = pares[pares['similaridade'] >= limiar]
+
+    colunas = _colunas_relatorio(dados)
+    lado_1 = dados[colunas].iloc[pares['i']].add_suffix('_1').reset_index(drop=True)
+    lado_2 = dados[colunas].iloc[pares['j']].add_suffix('_2').reset_index(drop=True)
+    filial = chaves_filial(dados['filial'], mapeador).to_numpy(dtype=object)
+    f_i, f_j = filial[pares['i']], filial[pares['j']]
+    relatorio = pd.concat([lado_1, lado_2], axis=1).assign(
+        similaridade=pares['similaridade'].round(3).to_numpy(),
+        filiais_diferentes=pd.notna(f_i) & pd.notna(f_j) & (f_i != f_j),
+    )
+    return relatorio.sort_values(['similaridade'], ascending=False, kind='stable').reset_index(drop=True)
+
+
+def _limite_superior(chave_a, chave_b):
+    """Limite superior barato de SequenceMatcher.ratio() pelos tamanhos"""
+    total = len(chave_a) + len(chave_b)
+    return 2 * min(len(chave_a), len(chave_b)) / total if total else 1.0
@@ -0,0 +1,127 @@
+"""
+Gravação do script SQL em disco à medida que os comandos são gerados
+- Sem montar a query inteira em memória (query += ...) antes do f.write
+- UPDATEs opcionalmente divididos em lotes (faixas de Id ou TOP n), cada lote uma
+  transação curta, com os blocos do script separados por GO
+- Saída opcionalmente comprimida (.sql.gz)
+"""
+
+import gzip
+import io
+from pathlib import Path
+
+ESTRATEGIAS_LOTE = ('id', 'top')
+ESTRATEGIA_LOTE_PADRAO = 'id'
+SEPARADOR_LOTE = "GO"
+
+
+def _indentar(texto, espacos=4):
+    prefixo = " " * espacos
+    return "\n".join(prefixo + linha if linha else linha for linha in texto.split("\n"))
+
+
+class EscritorSql:
+    """
+    Escreve o script em `caminho` (ou em memória, se None) como arquivo texto UTF-8.
+    `lote`: quantidade de clientes por transação nos UPDATEs (None = um UPDATE só,
+    como antes); `estrategia_lote`: 'id' (faixas de Clientes.Id) ou 'top' (UPDATE TOP n
+    repetido até não restar cliente a alterar); `comprimir`: grava em gzip (.gz).
+    """
+
+    def __init__(self, caminho=None, lote=None, estrategia_lote=ESTRATEGIA_LOTE_PADRAO, comprimir=False):
+        if estrategia_lote not in ESTRATEGIAS_LOTE:
+            raise ValueError(f"Estratégia de lote inválida: {estrategia_lote}")
+        if lote is not None and int(lote) < 1:
+            raise ValueError(f"Tamanho de lote inválido: {lote}")
+
+        self.caminho = None
+        if caminho is not None:
+            caminho = Path(caminho)
+            comprimir = comprimir or caminho.suffix == '.gz'
+            if comprimir and caminho.suffix != '.gz':
+                caminho = caminho.with_name(caminho.name + '.gz')
+            self.caminho = caminho
+        self.comprimir = comprimir
+        self.lote = None if lote is None else int(lote)
+        self.estrategia_lote = estrategia_lote
+        self.arquivo = None
+
+    def __enter__(self):
+        if self.caminho is None:
+            self.arquivo = io.StringIO()
+        elif self.comprimir:
+            self.arquivo = gzip.open(self.caminho, 'wt', encoding='utf-8', newline='')
+        else:
+            self.arquivo = open(self.caminho, 'w', encoding='utf-8', newline='')
+        return self
+
+    def __exit__(self, *erro):
+        if self.caminho is not None:
+            self.arquivo.close()
+        return False
+
+    @property
+    def em_lotes(self):
+        return self.lote is not None
+
+    def conteudo(self):
+        """Texto escrito até agora (apenas para o escritor em memória)"""
+        return self.arquivo.getvalue()
+
+    def escrever(self, texto):
+        self.arquivo.write(texto)
+
+    def fim_lote(self):
+        """Encerra o bloco atual do script com GO (somente no modo em lotes)"""
+        if self.em_lotes:
+            self.arquivo.write(f"{SEPARADOR_LOTE}\n")
+
+    def atualizar(self, coluna, valor, origem, condicao, comentario=None):
+        """
+        Escreve o UPDATE de Clientes (alias c) que atribui `valor` a c.{coluna}.
+        `origem` é o FROM com os JOINs e `condicao` o WHERE, ambos sem ';'.
+        No modo em lotes o UPDATE é repetido em um WHILE, uma transação por lote,
+        e o bloco termina com GO.
+        """
+        if comentario:
+            self.arquivo.write(comentario + "\n")
+
+        atribuicoes = f"SET c.{coluna} = {valor},\n    c.DataAtualizacao = GETDATE()\n{origem}"
+        if not self.em_lotes:
+            self.arquivo.write(f"UPDATE c\n{atribuicoes}\nWHERE {condicao};")
+            return
+
+        if self.estrategia_lote == 'id':
+            update = (
+                f"UPDATE c\n{atribuicoes}\n"
+                f"WHERE {condicao}\n"
+                f"  AND c.Id > @IdInicial AND c.Id <= @IdInicial + {self.lote};"
+            )
+            self.arquivo.write(
+                "DECLARE @IdInicial INT = 0;\n"
+                "DECLARE @IdFinal INT = (SELECT ISNULL(MAX(Id), 0) FROM Clientes);\n"
+                "WHILE @IdInicial < @IdFinal\n"
+                "BEGIN\n"
+                f"{_indentar(update)}\n"
+                f"    SET @IdInicial = @IdInicial + {self.lote};\n"
+                "END\n"
+            )
+        else:
+            # Só os clientes que ainda mudam de filial entram no próximo TOP n
+            if valor.strip().upper() == 'NULL':
+                pendentes = f"c.{coluna} IS NOT NULL"
+            else:
+                pendentes = f"(c.{coluna} IS NULL OR c.{coluna} <> {valor.strip()})"
+            update = (
+                f"UPDATE TOP ({self.lote}) c\n{atribuicoes}\n"
+                f"WHERE {condicao}\n"
+                f"  AND {pendentes};"
+            )
+            self.arquivo.write(
+                "WHILE 1 = 1\n"
+                "BEGIN\n"
+                f"{_indentar(update)}\n"
+                f"    IF @@ROWCOUNT < {self.lote} BREAK;\n"
+                "END\n"
+            )
+        self.fim_lote()
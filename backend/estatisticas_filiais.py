@@ -0,0 +1,102 @@
+"""
+Estatísticas por filial da planilha (coluna F) calculadas em uma única passada
+- Contagem, exemplos (3 primeiros clientes) e divisão PF/PJ por filial
+- Resultado estruturado, usado tanto no relatório quanto na geração do SQL
+- Resultados de blocos (modo streaming) podem ser combinados
+"""
+
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from documentos import normalizar_documentos
+from sql_filiais import texto_comentario
+
+QUANTIDADE_EXEMPLOS = 3
+TIPO_INVALIDO = 'Invalido'
+
+
+@dataclass
+class EstatisticasFiliais:
+    total_registros: int = 0
+    # filial → quantidade de clientes (ordenada pelo nome da filial)
+    contagem: pd.Series = field(default_factory=lambda: pd.Series(dtype='int64'))
+    # colunas filial, nome, cpf_cnpj (até QUANTIDADE_EXEMPLOS linhas por filial)
+    exemplos: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=['filial', 'nome', 'cpf_cnpj'])
+    )
+    # filial × tipo de pessoa (Fisica / Juridica / Invalido), se calculado
+    por_tipo: pd.DataFrame = None
+
+    @classmethod
+    def calcular(cls, df, por_tipo=False, quantidade_exemplos=QUANTIDADE_EXEMPLOS):
+        """Calcula as estatísticas de um DataFrame de ler_planilha() com um único groupby"""
+        dados = df.dropna(subset=['filial'])
+        grupos = dados.groupby('filial', sort=True)
+
+        contagem = grupos.size().astype('int64')
+        exemplos = grupos.head(quantidade_exemplos)[['filial', 'nome', 'cpf_cnpj']]
+
+        tabela_tipos = None
+        if por_tipo:
+            documentos, _ = normalizar_documentos(dados['cpf_cnpj'])
+            tipos = documentos['tipo_pessoa'].fillna(TIPO_INVALIDO)
+            tabela_tipos = (
+                pd.DataFrame({'filial': dados['filial'], 'tipo_pessoa': tipos})
+                .value_counts()
+                .unstack(fill_value=0)
+            )
+
+        return cls(len(df), contagem, exemplos.reset_index(drop=True), tabela_tipos)
+
+    @classmethod
+    def calcular_em_blocos(cls, blocos, por_tipo=False, quantidade_exemplos=QUANTIDADE_EXEMPLOS):
+        """Calcula bloco a bloco e combina (mesmo resultado da carga completa)"""
+        estatisticas = cls()
+        for bloco in blocos:
+            estatisticas = estatisticas.combinar(
+                cls.calcular(bloco, por_tipo, quantidade_exemplos), quantidade_exemplos
+            )
+        return estatisticas
+
+    def combinar(self, outra, quantidade_exemplos=QUANTIDADE_EXEMPLOS):
+        """Soma as estatísticas de dois blocos consecutivos da planilha"""
+        contagem = self.contagem.add(outra.contagem, fill_value=0).astype('int64').sort_index()
+
+        exemplos = pd.concat([self.exemplos, outra.exemplos], ignore_index=True)
+        exemplos = exemplos.groupby('filial', sort=False).head(quantidade_exemplos).reset_index(drop=True)
+
+        por_tipo = outra.por_tipo
+        if self.por_tipo is not None and outra.por_tipo is not None:
+            por_tipo = self.por_tipo.add(outra.por_tipo, fill_value=0).fillna(0).astype('int64')
+        elif self.por_tipo is not None:
+            por_tipo = self.por_tipo
+
+        return EstatisticasFiliais(
+            self.total_registros + outra.total_registros, contagem, exemplos, por_tipo
+        )
+
+    @property
+    def filiais(self):
+        """Filiais encontradas na planilha, em ordem alfabética"""
+        return list(self.contagem.index)
+
+    @property
+    def filial_majoritaria(self):
+        """Filial com mais clientes (None se a coluna F estiver vazia)"""
+        return self.contagem.idxmax() if len(self.contagem) else None
+
+    def exemplos_da_filial(self, filial):
+        """Lista de (nome, cpf_cnpj) de exemplo da filial"""
+        linhas = self.exemplos[self.exemplos['filial'] == filial]
+        return list(linhas[['nome', 'cpf_cnpj']].itertuples(index=False, name=None))
+
+    def comentario_sql(self):
+        """Cabeçalho de comentários com o resumo da análise para o script SQL gerado"""
+        linhas = []
+        if self.filial_majoritaria is not None:
+            linhas.append(f"-- Análise: Maioria dos clientes é de {texto_comentario(self.filial_majoritaria)}")
+        linhas.append(f"-- Total de registros na planilha: {self.total_registros}")
+        for filial, count in self.contagem.items():
+            linhas.append(f"--   {texto_comentario(filial)}: {count} clientes")
+        return "\n".join(linhas)
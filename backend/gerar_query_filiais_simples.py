@@ -1,20 +1,25 @@
-import pandas as pd
+from cache_planilha import ler_planilha_com_cache, ler_planilha_em_blocos_com_cache
+from leitura_planilha import CAMINHO_PLANILHA, COLUNAS_PLANILHA
+from mapeamento_filiais import MapeadorFiliais
+from documentos import ARQUIVO_REJEITADOS, resumo_rejeitados, salvar_rejeitados
+from escritor_sql import ESTRATEGIA_LOTE_PADRAO, EscritorSql
+from instrumentacao import Instrumentacao
+from registro_filiais import carregar_registro, exigir_cadastro
+from sql_filiais import (concatenar_pares, escrever_sql_por_documento, literal_contem, literal_texto,
+                         montar_pares)
 
-def gerar_query_filiais():
+ARQUIVO_SQL = 'atualizar_filiais_planilha.sql'
+
+def gerar_query_filiais(caminho_planilha=CAMINHO_PLANILHA, streaming=False, por_documento=False,
+                        usar_cache=False, lote=None, estrategia_lote=ESTRATEGIA_LOTE_PADRAO,
+                        comprimir=False, arquivo_filiais=None, medir_memoria=True, perfilar=None):
+    # Tempo, CPU e memória por etapa (relatório JSON ao lado do .sql)
+    instrumentacao = Instrumentacao('gerar_query_filiais_simples', medir_memoria, perfilar)
+    instrumentacao.parametros = {
+        'planilha': str(caminho_planilha), 'streaming': streaming, 'por_documento': por_documento,
+        'usar_cache': usar_cache, 'lote': lote, 'estrategia_lote': estrategia_lote, 'comprimir': comprimir,
+    }
     try:
-        # Ler a planilha
-        df = pd.read_excel(r"C:\Users\Mauro Benetti\Downloads\CPF E CNPJ - CLIENTES ARRIGHI.xlsx")
-        
-        print("=== DADOS DA PLANILHA ===")
-        print(f"Total de registros: {len(df)}")
-        print(f"Colunas: {list(df.columns)}")
-        
-        # Verificar filiais únicas na planilha
-        filiais_unicas = df.iloc[:, 5].dropna().unique()  # Coluna F
-        print(f"\nFiliais encontradas na planilha:")
-        for filial in sorted(filiais_unicas):
-            print(f"  - {filial}")
-        
         # Mapeamento manual baseado nas filiais encontradas
         mapeamento = {
             'rio de janeiro': 'Rio de Janeiro - Copacabana',
@@ -29,39 +34,90 @@ def gerar_query_filiais():
             'manaus': 'Manaus - Centro'
         }
         
-        # Gerar query SQL
-        query = """-- Atualizar filiais dos clientes baseado na planilha
--- Pessoas Físicas
-UPDATE c
-SET c.Filial = 
-    CASE """
+        senao = f"{literal_texto('São Paulo - Centro')} -- Filial padrão"
         
-        for filial_planilha, filial_sistema in mapeamento.items():
-            query += f"\n        WHEN pf.Nome LIKE '%{filial_planilha}%' THEN '{filial_sistema}'"
+        # Cadastro exportado da tabela Filiais substitui o mapeamento manual, se houver
+        registro = carregar_registro(arquivo_filiais)
+        if registro is not None:
+            mapeamento = registro.mapeamento('Nome')
+            senao = "c.Filial -- Mantém a filial atual"
         
-        query += """
-        ELSE 'São Paulo - Centro' -- Filial padrão
-    END,
-    c.DataAtualizacao = GETDATE()
-FROM Clientes c
-INNER JOIN PessoasFisicas pf ON c.PessoaFisicaId = pf.Id
-WHERE c.TipoPessoa = 'Fisica' AND c.Ativo = 1;
-
--- Pessoas Jurídicas
-UPDATE c
-SET c.Filial = 
-    CASE """
+        mapeador = registro.mapeador('Filial') if registro is not None else MapeadorFiliais(mapeamento)
         
-        for filial_planilha, filial_sistema in mapeamento.items():
-            query += f"\n        WHEN pj.RazaoSocial LIKE '%{filial_planilha}%' THEN '{filial_sistema}'"
+        # Ler a planilha (apenas colunas A, B e F)
+        if streaming:
+            total_registros = 0
+            filiais_unicas = set()
+            blocos_pares = []
+            blocos = instrumentacao.iterar(
+                'carregar', ler_planilha_em_blocos_com_cache(caminho_planilha, usar_cache)
+            )
+            for bloco in blocos:
+                with instrumentacao.etapa('mapear'):
+                    total_registros += len(bloco)
+                    filiais_unicas.update(bloco['filial'].dropna().unique())  # Coluna F
+                    if por_documento:
+                        _, filial_sistema, _ = mapeador.mapear(bloco['filial'])
+                        blocos_pares.append(montar_pares(bloco['cpf_cnpj'], filial_sistema))
+            colunas = list(COLUNAS_PLANILHA.values())
+            if por_documento:
+                with instrumentacao.etapa('mapear'):
+                    pares, rejeitados = concatenar_pares(blocos_pares)
+        else:
+            with instrumentacao.etapa('carregar'):
+                df = ler_planilha_com_cache(caminho_planilha, usar_cache)
+            with instrumentacao.etapa('mapear'):
+                total_registros = len(df)
+                filiais_unicas = df['filial'].dropna().unique()  # Coluna F
+                colunas = list(df.columns)
+                if por_documento:
+                    _, filial_sistema, _ = mapeador.mapear(df['filial'])
+                    pares, rejeitados = montar_pares(df['cpf_cnpj'], filial_sistema)
         
-        query += """
-        ELSE 'São Paulo - Centro' -- Filial padrão
-    END,
-    c.DataAtualizacao = GETDATE()
-FROM Clientes c
-INNER JOIN PessoasJuridicas pj ON c.PessoaJuridicaId = pj.Id
-WHERE c.TipoPessoa = 'Juridica' AND c.Ativo = 1;
+        print("=== DADOS DA PLANILHA ===")
+        print(f"Total de registros: {total_registros}")
+        print(f"Colunas: {colunas}")
+        
+        # Verificar filiais únicas na planilha
+        print(f"\nFiliais encontradas na planilha:")
+        for filial in sorted(filiais_unicas):
+            print(f"  - {filial}")
+        
+        # Com o cadastro, nenhuma filial da planilha pode cair em uma filial padrão
+        if registro is not None:
+            exigir_cadastro(registro.nao_cadastradas(filiais_unicas))
+        
+        # Gravar o script à medida que é gerado (UPDATEs em lotes separados por GO, se pedido)
+        with instrumentacao.etapa('gerar-sql'), EscritorSql(ARQUIVO_SQL, lote, estrategia_lote, comprimir) as escritor:
+            if por_documento:
+                # Tabela temporária + JOIN por CPF/CNPJ (seek nos índices, sem LIKE)
+                escrever_sql_por_documento(escritor, pares, coluna='Filial')
+            else:
+                escritor.escrever("-- Atualizar filiais dos clientes baseado na planilha\n")
+                casos_pf = "".join(
+                    f"\n        WHEN pf.Nome LIKE {literal_contem(filial_planilha)} THEN {literal_texto(filial_sistema)}"
+                    for filial_planilha, filial_sistema in mapeamento.items()
+                )
+                escritor.atualizar('Filial', f"""
+    CASE {casos_pf}
+        ELSE {senao}
+    END""", """FROM Clientes c
+INNER JOIN PessoasFisicas pf ON c.PessoaFisicaId = pf.Id""",
+                    "c.TipoPessoa = 'Fisica' AND c.Ativo = 1", comentario="-- Pessoas Físicas")
+                
+                escritor.escrever("\n\n")
+                casos_pj = "".join(
+                    f"\n        WHEN pj.RazaoSocial LIKE {literal_contem(filial_planilha)} THEN {literal_texto(filial_sistema)}"
+                    for filial_planilha, filial_sistema in mapeamento.items()
+                )
+                escritor.atualizar('Filial', f"""
+    CASE {casos_pj}
+        ELSE {senao}
+    END""", """FROM Clientes c
+INNER JOIN PessoasJuridicas pj ON c.PessoaJuridicaId = pj.Id""",
+                    "c.TipoPessoa = 'Juridica' AND c.Ativo = 1", comentario="-- Pessoas Jurídicas")
+            
+            escritor.escrever("""
 
 -- Verificar resultado
 SELECT '=== FILIAIS ATUALIZADAS ===' as Info;
@@ -71,18 +127,34 @@ SELECT
 FROM Clientes c
 WHERE c.Ativo = 1
 GROUP BY c.Filial
-ORDER BY c.Filial;"""
-        
-        # Salvar query
-        with open('atualizar_filiais_planilha.sql', 'w', encoding='utf-8') as f:
-            f.write(query)
+ORDER BY c.Filial;""")
         
-        print(f"\n✅ Query SQL gerada em 'atualizar_filiais_planilha.sql'")
-        print(f"📊 Total de registros na planilha: {len(df)}")
+        print(f"\n✅ Query SQL gerada em '{escritor.caminho}'")
+
+        if por_documento:
+            print(f"📄 CPF/CNPJ rejeitados: {len(rejeitados)}")
+            for motivo, count in resumo_rejeitados(rejeitados).items():
+                print(f"  {motivo}: {count} linhas")
+            if len(rejeitados):
+                with instrumentacao.etapa('rejeitados'):
+                    salvar_rejeitados(rejeitados)
+                print(f"📄 Relatório de rejeitados gerado em '{ARQUIVO_REJEITADOS}'")
+        print(f"📊 Total de registros na planilha: {total_registros}")
         print(f"🏢 Filiais únicas encontradas: {len(filiais_unicas)}")
         
+        relatorio = instrumentacao.gravar_relatorio(
+            escritor.caminho,
+            registros=total_registros,
+            filiais=len(filiais_unicas),
+            documentos=len(pares) if por_documento else None,
+            rejeitados=len(rejeitados) if por_documento else None,
+        )
+        print(f"📈 Relatório de execução gerado em '{relatorio}'")
+        
     except Exception as e:
         print(f"❌ Erro: {e}")
+    finally:
+        instrumentacao.encerrar()
 
 if __name__ == "__main__":
     gerar_query_filiais()
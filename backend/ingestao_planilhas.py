@@ -0,0 +1,228 @@
+"""
+Ingestão de várias planilhas de clientes (p.ex. uma exportação por filial)
+- Entrada: arquivos .xlsx, diretórios (todos os .xlsx) ou padrões glob
+- Cada arquivo é lido em um processo do pool (a leitura do .xlsx é CPU-bound),
+  com todas as abas de uma única carga; o CPF/CNPJ já sai normalizado do processo
+- Cada linha leva a origem: arquivo, aba e linha da planilha
+- Mesclagem por CPF/CNPJ normalizado: um cliente por documento, escolhido por
+  uma regra de conflito explícita; documentos com filiais diferentes entre as
+  origens vão para o relatório de conflitos
+
+Uso:
+    linhas, ignoradas = ler_planilhas(['exportacoes/', 'extra/*.xlsx'], processos=4)
+    mesclagem = mesclar(linhas, regra='recente')
+    mesclagem.clientes  # colunas de ler_planilha() + origem, pronto para as etapas
+"""
+
+import glob
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from documentos import normalizar_documentos
+from leitura_planilha import ler_planilha
+from mapeamento_filiais import normalizar_texto
+
+EXTENSAO_PLANILHA = '.xlsx'
+PREFIXO_BLOQUEIO = '~$'  # arquivo de bloqueio do Excel aberto
+COLUNAS_ORIGEM = ['arquivo', 'aba', 'linha_planilha']
+ARQUIVO_CONFLITOS = 'conflitos_filiais.csv'
+
+# Regra de conflito: qual ocorrência de um documento repetido é mantida
+# - primeira: a primeira na ordem das origens (arquivo, aba, linha), como no
+#   arquivo único
+# - ultima: a última nessa mesma ordem
+# - recente: a do arquivo modificado mais recentemente (empate: a primeira)
+# - maioria: a filial mais frequente entre as ocorrências (empate: a primeira)
+# - erro: interrompe se algum documento tiver filiais diferentes
+REGRAS_CONFLITO = ['primeira', 'ultima', 'recente', 'maioria', 'erro']
+REGRA_CONFLITO_PADRAO = 'primeira'
+
+Mesclagem = namedtuple('Mesclagem', ['clientes', 'duplicados', 'conflitos'])
+
+
+class ConflitoFiliaisError(ValueError):
+    """Documentos com filiais diferentes entre as planilhas (regra 'erro')"""
+
+    def __init__(self, conflitos):
+        self.conflitos = conflitos
+        self.documentos = sorted(conflitos['documento'].unique())
+        super().__init__(
+            f"{len(self.documentos)} CPF/CNPJ com filiais diferentes entre as planilhas "
+            f"(p.ex. {self.documentos[:10]}); escolha outra regra de conflito"
+        )
+
+
+def expandir_entradas(entradas):
+    """
+    Arquivos .xlsx a ler, na ordem das entradas (diretórios e globs em ordem
+    alfabética), sem repetições nem arquivos de bloqueio do Excel
+    """
+    arquivos = []
+    for entrada in entradas:
+        caminho = Path(entrada)
+        if caminho.is_dir():
+            encontrados = sorted(caminho.glob('*' + EXTENSAO_PLANILHA))
+        elif glob.has_magic(entrada):
+            encontrados = sorted(Path(p) for p in glob.glob(entrada, recursive=True))
+        elif caminho.is_file():
+            encontrados = [caminho]
+        else:
+            raise FileNotFoundError(f"Planilha não encontrada: {entrada}")
+        arquivos.extend(
+            p for p in encontrados if p.is_file() and not p.name.startswith(PREFIXO_BLOQUEIO)
+        )
+
+    unicos = list(dict.fromkeys(p.resolve() for p in arquivos))
+    if not unicos:
+        raise FileNotFoundError(f"Nenhuma planilha {EXTENSAO_PLANILHA} em {list(entradas)}")
+    return unicos
+
+
+def ler_planilha_com_origem(arquivo):
+    """
+    Lê todas as abas de um arquivo (executado em um processo do pool).
+    Retorna (linhas, ignoradas): as linhas de ler_planilha() com a origem e as
+    colunas 'documento'/'tipo_pessoa' de normalizar_documentos(); abas sem as
+    colunas A-F (ou vazias) vão para `ignoradas` como (arquivo, aba, motivo).
+    """
+    partes, ignoradas = [], []
+    with pd.ExcelFile(arquivo) as livro:
+        for aba in livro.sheet_names:
+            try:
+                dados = ler_planilha(livro, aba=aba)
+            except ValueError as e:
+                ignoradas.append((str(arquivo), aba, str(e)))
+                continue
+            if dados.empty:
+                ignoradas.append((str(arquivo), aba, 'aba vazia'))
+                continue
+            documentos, _ = normalizar_documentos(dados['cpf_cnpj'])
+            partes.append(dados.assign(
+                arquivo=str(arquivo),
+                aba=aba,
+                linha_planilha=dados.index + 2,  # +1 cabeçalho, +1 base 1
+                documento=documentos['documento'],
+                tipo_pessoa=documentos['tipo_pessoa'],
+            ))
+    return partes, ignoradas
+
+
+def ler_planilhas(entradas, processos=None):
+    """
+    Lê as planilhas de `entradas` em paralelo (`processos`: padrão os.cpu_count()).
+    Retorna (linhas, ignoradas): um DataFrame na ordem das origens, com índice
+    0..n-1, e a lista de abas ignoradas.
+    """
+    arquivos = expandir_entradas(entradas)
+    processos = min(processos or os.cpu_count() or 1, len(arquivos))
+    if processos == 1:
+        resultados = map(ler_planilha_com_origem, arquivos)
+        return _juntar(resultados)
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        # map() devolve na ordem dos arquivos: a ordem das origens é determinística
+        return _juntar(pool.map(ler_planilha_com_origem, arquivos))
+
+
+def _juntar(resultados):
+    partes, ignoradas = [], []
+    for partes_arquivo, ignoradas_arquivo in resultados:
+        partes.extend(partes_arquivo)
+        ignoradas.extend(ignoradas_arquivo)
+    if not partes:
+        raise ValueError("Nenhuma aba com as colunas da planilha de clientes (A, B e F)")
+    return pd.concat(partes, ignore_index=True), ignoradas
+
+
+def chaves_filial(filial, mapeador=None):
+    """
+    Filial usada para comparar ocorrências: a filial do sistema, se houver
+    `mapeador`, senão a forma normalizada do texto; nulo para células vazias
+    """
+    texto = normalizar_texto(filial.where(filial.notna(), ''))
+    chaves = texto.where(texto != '').astype(object)
+    if mapeador is not None:
+        _, filial_sistema, _ = mapeador.mapear(filial)
+        sistema = filial_sistema.astype(object)
+        # Valor não mapeado continua comparável pelo texto
+        chaves = sistema.where(sistema.notna(), chaves)
+    return chaves.where(chaves.notna(), None)
+
+
+def mesclar(linhas, regra=REGRA_CONFLITO_PADRAO, mapeador=None):
+    """
+    Um cliente por CPF/CNPJ normalizado, escolhido por `regra` (REGRAS_CONFLITO).
+    Ocorrências com filial têm prioridade sobre as sem filial; linhas com
+    documento inválido são mantidas (vão para o relatório de rejeitados).
+    `mapeador`: compara as filiais já mapeadas para o sistema, para que grafias
+    diferentes da mesma filial não contem como conflito.
+    Retorna Mesclagem(clientes, duplicados, conflitos):
+    - clientes: linhas mantidas, na ordem das origens, com índice 0..n-1
+    - duplicados: quantidade de linhas descartadas por repetirem um documento
+    - conflitos: ocorrências dos documentos com mais de uma filial, com a
+      coluna 'mantida'
+    """
+    if regra not in REGRAS_CONFLITO:
+        raise ValueError(f"Regra de conflito desconhecida: {regra} (opções: {REGRAS_CONFLITO})")
+
+    validas = linhas[linhas['documento'].notna()]
+    chave = chaves_filial(validas['filial'], mapeador)
+    distintas = chave.groupby(validas['documento']).transform('nunique')
+    em_conflito = distintas > 1
+    conflitos = validas.loc[em_conflito, ['documento', 'tipo_pessoa', 'nome', 'filial'] + COLUNAS_ORIGEM]
+    if regra == 'erro' and len(conflitos):
+        raise ConflitoFiliaisError(conflitos.sort_values('documento', kind='stable').reset_index(drop=True))
+
+    # Ordem de preferência: com filial primeiro, depois o critério da regra e a
+    # ordem das origens; a primeira ocorrência de cada documento é a mantida
+    criterios = {'sem_filial': chave.isna(), 'ordem': pd.Series(validas.index, index=validas.index)}
+    if regra == 'ultima':
+        criterios['ordem'] = -criterios['ordem']
+    elif regra == 'recente':
+        modificacao = {arquivo: os.stat(arquivo).st_mtime for arquivo in validas['arquivo'].unique()}
+        criterios = {'sem_filial': criterios['sem_filial'],
+                     'antiguidade': -validas['arquivo'].map(modificacao), 'ordem': criterios['ordem']}
+    elif regra == 'maioria':
+        frequencia = chave.groupby([validas['documento'], chave]).transform('size')
+        criterios = {'sem_filial': criterios['sem_filial'],
+                     'minoria': -frequencia.fillna(0), 'ordem': criterios['ordem']}
+    preferencia = pd.DataFrame(criterios).sort_values(list(criterios), kind='stable').index
+    mantidas = validas.loc[preferencia, 'documento'].drop_duplicates(keep='first').index
+
+    manter = np.ones(len(linhas), dtype=bool)
+    manter[validas.index] = False
+    manter[mantidas] = True
+    clientes = linhas[manter].reset_index(drop=True)
+
+    conflitos = conflitos.assign(mantida=conflitos.index.isin(mantidas))
+    conflitos = conflitos.sort_values('documento', kind='stable').reset_index(drop=True)
+    return Mesclagem(clientes, len(validas) - len(mantidas), conflitos)
+
+
+def origem_rejeitados(rejeitados, clientes):
+    """
+    Troca a 'linha_planilha' de rejeitados calculados sobre `clientes` (posição
+    no DataFrame mesclado) pela origem: arquivo, aba e linha da planilha
+    """
+    posicoes = rejeitados['linha_planilha'].to_numpy(dtype=np.int64) - 2
+    origem = clientes[COLUNAS_ORIGEM].iloc[posicoes].reset_index(drop=True)
+    return pd.concat([origem, rejeitados.drop(columns='linha_planilha').reset_index(drop=True)], axis=1)
+
+
+def resumo_origens(linhas, clientes):
+    """Registros lidos e mantidos após a mesclagem, por arquivo e aba"""
+    lidos = linhas.groupby(['arquivo', 'aba'], sort=False).size().rename('registros')
+    mantidos = clientes.groupby(['arquivo', 'aba'], sort=False).size().rename('mantidos')
+    resumo = pd.concat([lidos, mantidos], axis=1).fillna(0).astype('int64')
+    resumo['descartados'] = resumo['registros'] - resumo['mantidos']
+    return resumo
+
+
+def salvar_conflitos(conflitos, caminho=ARQUIVO_CONFLITOS):
+    """Grava o relatório de conflitos de filial em CSV (abre direto no Excel)"""
+    Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+    conflitos.to_csv(caminho, index=False, encoding='utf-8-sig')
@@ -0,0 +1,190 @@
+"""
+Instrumentação por etapa dos scripts de filiais e do corrigir_erros_criticos.py
+- Cada etapa é um context manager que registra tempo de parede, tempo de CPU e
+  pico de memória (tracemalloc) da etapa
+- Etapas podem ser aninhadas (p.ex. a leitura em blocos dentro do mapeamento): o
+  tempo de cada etapa exclui o das etapas internas, então a soma é o total
+- cProfile opcional de uma etapa, gravado em <script>.<etapa>.prof
+  (python -m pstats arquivo.prof)
+- Relatório JSON da execução ao lado do .sql gerado (ou em um destino
+  indicado), para comparar execuções
+
+Uso:
+    instrumentacao = Instrumentacao('processar_planilha_filiais', perfilar='mapear')
+    with instrumentacao.etapa('carregar'):
+        df = ler_planilha(caminho)
+    for bloco in instrumentacao.iterar('carregar', ler_planilha_em_blocos(caminho)):
+        ...
+    instrumentacao.gravar_relatorio('atualizar_filiais_planilha.sql', registros=len(df))
+"""
+
+import cProfile
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MIB = 1024 * 1024
+SUFIXO_RELATORIO = '.relatorio.json'
+_FIM = object()
+
+
+def caminho_relatorio(caminho_sql):
+    """'saida/atualizar.sql' ou 'saida/atualizar.sql.gz' → 'saida/atualizar.relatorio.json'"""
+    caminho = Path(caminho_sql)
+    nome = caminho.name
+    for sufixo in ('.gz', '.sql'):
+        if nome.endswith(sufixo):
+            nome = nome[:-len(sufixo)]
+    return caminho.with_name(nome + SUFIXO_RELATORIO)
+
+
+def pico_rss_mib():
+    """Pico de memória residente do processo (None se indisponível)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: KiB no Linux, bytes no macOS
+    return round(pico / (MIB if sys.platform == 'darwin' else 1024), 2)
+
+
+class Instrumentacao:
+    """
+    Medições por etapa de uma execução. `medir_memoria`: liga o tracemalloc
+    (deixa o código mais lento; a memória dos arrays Arrow do pandas não entra
+    no tracemalloc, o pico RSS do processo vai no relatório); `perfilar`: nome
+    da etapa a perfilar com cProfile.
+    """
+
+    def __init__(self, script, medir_memoria=True, perfilar=None):
+        self.script = script
+        self.medir_memoria = medir_memoria
+        self.perfilar = perfilar
+        self.parametros = {}
+        self.etapas = {}
+        self.inicio = datetime.now()
+        self._inicio_parede = time.perf_counter()
+        self._inicio_cpu = time.process_time()
+        self._pilha = []
+        self._perfil = cProfile.Profile() if perfilar else None
+        self._iniciou_tracemalloc = False
+
+    @contextmanager
+    def etapa(self, nome):
+        """Mede o bloco `with` como a etapa `nome` (acumula se repetida)"""
+        quadro = {'filhos_parede': 0.0, 'filhos_cpu': 0.0, 'pico': 0, 'base': 0}
+        if self.medir_memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._iniciou_tracemalloc = True
+            atual, pico = tracemalloc.get_traced_memory()
+            # O pico até aqui pertence à etapa externa, antes de zerar para esta
+            if self._pilha:
+                self._pilha[-1]['pico'] = max(self._pilha[-1]['pico'], pico)
+            tracemalloc.reset_peak()
+            quadro['base'] = atual
+
+        perfilando = self._perfil is not None and nome == self.perfilar
+        self._pilha.append(quadro)
+        inicio_parede, inicio_cpu = time.perf_counter(), time.process_time()
+        if perfilando:
+            self._perfil.enable()
+        try:
+            yield
+        finally:
+            if perfilando:
+                self._perfil.disable()
+            parede = time.perf_counter() - inicio_parede
+            cpu = time.process_time() - inicio_cpu
+            self._pilha.pop()
+
+            medicao = self.etapas.setdefault(
+                nome, {'segundos': 0.0, 'cpu_segundos': 0.0, 'pico_mib': 0.0, 'chamadas': 0}
+            )
+            medicao['segundos'] += parede - quadro['filhos_parede']
+            medicao['cpu_segundos'] += cpu - quadro['filhos_cpu']
+            medicao['chamadas'] += 1
+            if self.medir_memoria:
+                pico = max(quadro['pico'], tracemalloc.get_traced_memory()[1])
+                medicao['pico_mib'] = max(medicao['pico_mib'], (pico - quadro['base']) / MIB)
+                if self._pilha:
+                    self._pilha[-1]['pico'] = max(self._pilha[-1]['pico'], pico)
+            if self._pilha:
+                self._pilha[-1]['filhos_parede'] += parede
+                self._pilha[-1]['filhos_cpu'] += cpu
+
+    def iterar(self, nome, iteravel):
+        """Repassa os itens de `iteravel`, medindo cada next() como a etapa `nome`"""
+        iterador = iter(iteravel)
+        while True:
+            with self.etapa(nome):
+                item = next(iterador, _FIM)
+            if item is _FIM:
+                return
+            yield item
+
+    def resumo(self):
+        """Medições por etapa, arredondadas, na ordem em que as etapas começaram"""
+        return [
+            {
+                'etapa': nome,
+                'segundos': round(medicao['segundos'], 4),
+                'cpu_segundos': round(medicao['cpu_segundos'], 4),
+                'pico_mib': round(medicao['pico_mib'], 2) if self.medir_memoria else None,
+                'chamadas': medicao['chamadas'],
+            }
+            for nome, medicao in self.etapas.items()
+        ]
+
+    def imprimir(self):
+        print("\n=== TEMPO POR ETAPA ===")
+        for medicao in self.resumo():
+            memoria = f"{medicao['pico_mib']:9.2f} MiB" if medicao['pico_mib'] is not None else ""
+            print(f"  {medicao['etapa']:<12} {medicao['segundos']:8.3f} s  "
+                  f"(CPU {medicao['cpu_segundos']:8.3f} s){memoria}")
+        print(f"  {'total':<12} {time.perf_counter() - self._inicio_parede:8.3f} s")
+
+    def encerrar(self):
+        """Desliga o tracemalloc, se foi ligado aqui"""
+        if self._iniciou_tracemalloc:
+            tracemalloc.stop()
+            self._iniciou_tracemalloc = False
+
+    def gravar_relatorio(self, caminho_sql, destino=None, **contadores):
+        """
+        Grava o relatório JSON ao lado de `caminho_sql` ou em `destino` (e o .prof
+        da etapa perfilada). `contadores`: totais da execução (registros,
+        documentos...). Retorna o caminho do relatório.
+        """
+        destino = caminho_relatorio(caminho_sql) if destino is None else Path(destino)
+        relatorio = {
+            'script': self.script,
+            'inicio': self.inicio.isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'parametros': self.parametros,
+            'arquivo_sql': str(caminho_sql) if caminho_sql is not None else None,
+            'total_segundos': round(time.perf_counter() - self._inicio_parede, 4),
+            'total_cpu_segundos': round(time.process_time() - self._inicio_cpu, 4),
+            'pico_rss_mib': pico_rss_mib(),
+            'etapas': self.resumo(),
+            'contadores': contadores,
+        }
+        if self._perfil is not None and self.perfilar in self.etapas:
+            arquivo_perfil = destino.with_name(f"{self.script}.{self.perfilar}.prof")
+            self._perfil.dump_stats(arquivo_perfil)
+            relatorio['perfil'] = str(arquivo_perfil)
+        self.encerrar()
+
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        with open(destino, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2, default=str)
+        return destino
@@ -0,0 +1,90 @@
+"""
+Leitura da planilha de clientes (CPF E CNPJ - CLIENTES ARRIGHI.xlsx)
+- Carga completa projetando apenas as colunas usadas (A, B e F)
+- Modo streaming: lê a planilha em modo read-only e entrega blocos de linhas,
+  mantendo o consumo de memória constante independente do tamanho da base
+- Primeira aba por padrão; `aba` escolhe outra pelo nome ou pela posição
+"""
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+CAMINHO_PLANILHA = r"C:\Users\Mauro Benetti\Downloads\CPF E CNPJ - CLIENTES ARRIGHI.xlsx"
+
+# Colunas utilizadas pelos scripts: A (nome), B (CPF/CNPJ) e F (filial)
+COLUNAS_PLANILHA = {
+    0: 'nome',
+    1: 'cpf_cnpj',
+    5: 'filial',
+}
+
+TAMANHO_BLOCO_PADRAO = 50_000
+
+
+def ler_planilha(caminho=CAMINHO_PLANILHA, colunas=COLUNAS_PLANILHA, aba=0):
+    """
+    Carrega a planilha inteira, apenas com as colunas A, B e F. `caminho` também
+    pode ser um pd.ExcelFile já aberto (várias abas lidas de uma única carga)
+    """
+    indices = sorted(colunas)
+    df = pd.read_excel(caminho, sheet_name=aba, usecols=indices, dtype=object)
+    df.columns = [colunas[i] for i in indices]
+    return df
+
+
+def ler_planilha_em_blocos(caminho=CAMINHO_PLANILHA, tamanho_bloco=TAMANHO_BLOCO_PADRAO,
+                           colunas=COLUNAS_PLANILHA, aba=0):
+    """
+    Lê a planilha linha a linha (openpyxl read-only) e produz DataFrames de até
+    `tamanho_bloco` linhas com as mesmas colunas e tipos de ler_planilha()
+    """
+    indices = sorted(colunas)
+    nomes = [colunas[i] for i in indices]
+    ultimo = indices[-1] + 1
+
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        ws = wb[aba] if isinstance(aba, str) else wb.worksheets[aba]
+        linhas = ws.iter_rows(min_row=2, values_only=True)
+        inicio = 0
+        bloco = []
+        vazias_pendentes = 0
+
+        for linha in linhas:
+            # Linhas vazias no fim da planilha são descartadas, como no read_excel;
+            # as intermediárias só são emitidas quando aparece uma linha com dados
+            if all(v is None or v == '' for v in linha):
+                vazias_pendentes += 1
+                continue
+            for _ in range(vazias_pendentes):
+                bloco.append([np.nan] * len(indices))
+            vazias_pendentes = 0
+
+            linha = tuple(linha) + (None,) * (ultimo - len(linha))
+            bloco.append([_converter_celula(linha[i]) for i in indices])
+
+            if len(bloco) >= tamanho_bloco:
+                yield _montar_bloco(bloco, nomes, inicio)
+                inicio += len(bloco)
+                bloco = []
+
+        if bloco:
+            yield _montar_bloco(bloco, nomes, inicio)
+    finally:
+        wb.close()
+
+
+def _converter_celula(valor):
+    """Mesma conversão do leitor openpyxl do pandas (float inteiro → int, vazio → NaN)"""
+    if valor is None or (isinstance(valor, str) and valor == ''):
+        return np.nan
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+def _montar_bloco(bloco, nomes, inicio):
+    df = pd.DataFrame(bloco, columns=nomes, dtype=object)
+    df.index = pd.RangeIndex(inicio, inicio + len(df))
+    return df
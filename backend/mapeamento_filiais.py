@@ -0,0 +1,303 @@
+"""
+Mapeamento vetorizado das filiais da planilha (coluna F) para o padrão do sistema
+- Normaliza uma vez cada valor distinto da coluna (strip + lower)
+- Resolve cada valor distinto uma única vez com uma regex pré-compilada
+- Mantém a semântica "primeira chave do mapeamento vence" e a filial padrão
+- Resultados categóricos: um código por linha em vez de um texto por linha
+"""
+
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Mapeamento de filiais da planilha para o padrão do sistema (ordem = prioridade)
+MAPEAMENTO_FILIAIS = {
+    'rio de janeiro': 'Rio de Janeiro - Copacabana',
+    'são paulo': 'São Paulo - Centro',
+    'belo horizonte': 'Belo Horizonte - Centro',
+    'salvador': 'Salvador - Barra',
+    'brasília': 'Brasília - Centro',
+    'curitiba': 'Curitiba - Centro',
+    'porto alegre': 'Porto Alegre - Centro',
+    'fortaleza': 'Fortaleza - Centro',
+    'recife': 'Recife - Centro',
+    'manaus': 'Manaus - Centro',
+    'goiânia': 'Goiânia - Centro',
+    'campo grande': 'Campo Grande - Centro',
+    'maceió': 'Maceió - Centro',
+    'natal': 'Natal - Centro',
+    'joão pessoa': 'João Pessoa - Centro',
+    'teresina': 'Teresina - Centro',
+    'são luís': 'São Luís - Centro',
+    'palmas': 'Palmas - Centro',
+    'aracaju': 'Aracaju - Centro',
+    'vitória': 'Vitória - Centro',
+    'florianópolis': 'Florianópolis - Centro',
+    'cuiabá': 'Cuiabá - Centro',
+    'porto velho': 'Porto Velho - Centro',
+    'rio branco': 'Rio Branco - Centro',
+    'boavista': 'Boa Vista - Centro',
+    'macapá': 'Macapá - Centro'
+}
+
+FILIAL_PADRAO = 'São Paulo - Centro'
+
+# Mapeamento baseado na análise real (coluna F → Filiais.Id)
+MAPEAMENTO_IDS = {
+    'MANAUS': 11,  # Manaus - AM
+    'SALVADOR': 8,  # Salvador - BA
+    'SÃO PAULO': 5,  # São Paulo - SP
+    'RIO DE JANEIRO': 1,  # Rio de Janeiro - RJ
+    'CAMPINAS': 2,  # Campinas - SP
+    'BELO HORIZONTE': 7,  # Belo Horizonte - BH
+    'RIBEIRÃO PRETO': 13  # Ribeirão Preto - SP
+}
+
+FILIAL_PADRAO_ID = 1  # Rio de Janeiro - RJ (padrão - maioria dos clientes)
+
+LIMIAR_SIMILARIDADE = 0.85  # confiança mínima para aceitar uma correspondência aproximada
+# Chaves mais curtas (forma normalizada) só casam exatamente: uma edição em
+# 'natal' ou 'palmas' já é outra cidade ('nata', 'palmares')
+TAMANHO_MINIMO_APROXIMADO = 7
+
+
+def normalizar_coluna(serie):
+    """Equivalente vetorizado de str(valor).strip().lower() (vazio para nulos)"""
+    return serie.where(serie.notna(), '').astype(str).str.strip().str.lower()
+
+
+def normalizar_texto(serie):
+    """
+    Forma canônica para comparação: NFKD sem acentos, casefold e sem espaços nem
+    pontuação ('Boa  Vista/RR' → 'boavistarr', 'São Paulo' → 'saopaulo')
+    """
+    return (
+        serie.astype(str)
+        .str.normalize('NFKD')
+        .str.replace('[\u0300-\u036f]', '', regex=True)  # marcas de acento
+        .str.casefold()
+        .str.replace(r'[^0-9a-z]', '', regex=True)
+    )
+
+
+def trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def tokens_normalizados(valor):
+    """Palavras do valor na forma de normalizar_texto ('Boa Vista/RR' → ['boa', 'vista', 'rr'])"""
+    # Um valor por vez (só os não resolvidos): unicodedata evita o custo do .str por chamada
+    texto = unicodedata.normalize('NFKD', str(valor))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return re.findall(r'[0-9a-z]+', texto)
+
+
+def distancia_edicao(a, b):
+    """
+    Distância de edição entre dois textos inteiros; a troca de duas letras
+    vizinhas ('janiero' × 'janeiro') conta como uma edição
+    """
+    antepenultima, anterior = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        atual = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                atual[j] = min(atual[j], antepenultima[j - 2] + 1)
+        antepenultima, anterior = anterior, atual
+    return anterior[-1]
+
+
+def similaridade_palavras(chave, tokens_chave, tokens):
+    """
+    Maior semelhança entre a chave e uma sequência de palavras inteiras do valor
+    (com uma palavra a menos ou a mais que a chave, para 'boa vista' × 'boavista').
+    Semelhança: 1 - distância / tamanho do maior dos dois textos.
+    """
+    melhor = 0.0
+    for tamanho in range(max(len(tokens_chave) - 1, 1), len(tokens_chave) + 2):
+        for inicio in range(len(tokens) - tamanho + 1):
+            trecho = ''.join(tokens[inicio:inicio + tamanho])
+            maior = max(len(chave), len(trecho))
+            if abs(len(chave) - len(trecho)) / maior > 1 - melhor:
+                continue  # nem com distância mínima supera a melhor
+            melhor = max(melhor, 1 - distancia_edicao(chave, trecho) / maior)
+    return melhor
+
+
+class MapeadorFiliais:
+    """
+    Resolve a filial do sistema para uma coluna inteira da planilha.
+    Cada valor distinto é resolvido uma única vez (memória compartilhada entre
+    blocos): primeiro por trecho exato na forma normalizada, na ordem do
+    mapeamento; se nada casar, pela chave mais parecida com palavras inteiras do
+    valor (distância de edição), desde que a confiança atinja
+    `limiar_similaridade` (None desliga) e a chave tenha pelo menos
+    TAMANHO_MINIMO_APROXIMADO caracteres.
+    """
+
+    def __init__(self, mapeamento=None, filial_padrao=FILIAL_PADRAO,
+                 limiar_similaridade=LIMIAR_SIMILARIDADE):
+        self.mapeamento = dict(MAPEAMENTO_FILIAIS if mapeamento is None else mapeamento)
+        self.filial_padrao = filial_padrao
+        self.limiar_similaridade = limiar_similaridade
+        self.chaves = list(self.mapeamento)
+
+        # Índice pré-calculado: forma normalizada → chave original do mapeamento
+        normalizadas = normalizar_texto(pd.Series(self.chaves, dtype=object)).tolist()
+        self.indice = dict(zip(normalizadas, self.chaves))
+        self.tokens_chaves = {normalizada: tokens_normalizados(chave)
+                              for normalizada, chave in zip(normalizadas, self.chaves)}
+        self.indice_trigramas = {}
+        for normalizada in self.indice:
+            if len(normalizada) < TAMANHO_MINIMO_APROXIMADO:
+                continue  # chave curta: só correspondência exata
+            for trigrama in trigramas(normalizada):
+                self.indice_trigramas.setdefault(trigrama, []).append(normalizada)
+
+        # Uma alternativa por chave, cada uma ancorada no início com lookahead:
+        # a regex testa as chaves na ordem do dicionário e a primeira que aparecer
+        # em qualquer posição vence (mesma semântica do loop `for ... in items()`)
+        alternativas = "|".join(
+            f"(?=.*?({re.escape(normalizada)}))" for normalizada in self.indice
+        )
+        self.regex = re.compile(f"^(?:{alternativas})", re.DOTALL)
+
+        # valor (strip + lower) → chave do mapeamento (None = não mapeado)
+        self.memoria = {'': None}
+        # valor → (chave, confiança) das correspondências aproximadas
+        self.aproximadas = {}
+
+    def _resolver_aproximado(self, valor, normalizado):
+        """Chave mais parecida com o valor, se a confiança atingir o limiar"""
+        if self.limiar_similaridade is None or len(normalizado) < 3:
+            return None
+
+        candidatas = set()
+        for trigrama in trigramas(normalizado):
+            candidatas.update(self.indice_trigramas.get(trigrama, ()))
+
+        tokens = tokens_normalizados(valor)
+        melhor, melhor_confianca = None, 0.0
+        for normalizada in self.indice:  # ordem do mapeamento desempata
+            if normalizada not in candidatas:
+                continue
+            confianca = similaridade_palavras(normalizada, self.tokens_chaves[normalizada], tokens)
+            if confianca > melhor_confianca:
+                melhor, melhor_confianca = normalizada, confianca
+
+        if melhor is None or melhor_confianca < self.limiar_similaridade:
+            return None
+        chave = self.indice[melhor]
+        self.aproximadas[valor] = (chave, round(melhor_confianca, 3))
+        return chave
+
+    def _resolver_novos(self, valores):
+        """Resolve e memoriza os valores distintos ainda não vistos"""
+        novos = pd.Series([v for v in valores if v not in self.memoria], dtype=object)
+        if novos.empty:
+            return
+
+        normalizados = normalizar_texto(novos)
+        if self.chaves:
+            grupos = normalizados.str.extract(self.regex, expand=True)
+            encontradas = grupos.bfill(axis=1).iloc[:, 0]
+        else:
+            encontradas = pd.Series([np.nan] * len(novos), dtype=object)
+
+        for valor, normalizado, encontrada in zip(novos, normalizados, encontradas):
+            if isinstance(encontrada, str):
+                self.memoria[valor] = self.indice[encontrada]
+            else:
+                self.memoria[valor] = self._resolver_aproximado(valor, normalizado)
+
+    def mapear(self, serie):
+        """
+        Mapeia a coluna F inteira.
+        Retorna (filial_planilha, filial_sistema, filiais_nao_mapeadas):
+        - filial_planilha: coluna normalizada (strip + lower), categórica
+        - filial_sistema: filial mapeada, categórica (nulo para células vazias)
+        - filiais_nao_mapeadas: valores não vazios que caíram na filial padrão
+        As duas colunas guardam um código por linha e cada texto uma única vez.
+        """
+        # Normalizar apenas os valores distintos da coluna; vazios/nulos viram ''
+        codigos_brutos, brutos = pd.factorize(serie, sort=False)
+        normalizados = normalizar_coluna(pd.Series(brutos, dtype=object))
+        codigos_normalizados, distintos = pd.factorize(
+            pd.concat([normalizados, pd.Series([''], dtype=object)], ignore_index=True), sort=False
+        )
+        codigos = np.where(codigos_brutos >= 0, codigos_normalizados[codigos_brutos], codigos_normalizados[-1])
+        distintos = pd.Series(distintos, dtype=object)
+
+        # Resolver apenas os valores distintos e espalhar o resultado pelas linhas
+        self._resolver_novos(distintos)
+
+        chave_encontrada = distintos.map(self.memoria)
+        # Lista em vez de Series.map: Ids inteiros não viram float quando há nulos
+        mapeados = pd.Series(
+            [self.mapeamento.get(chave) for chave in chave_encontrada], dtype=object
+        )
+        vazios = distintos == ''
+        sem_mapeamento = mapeados.isna() & ~vazios
+
+        filiais_nao_mapeadas = set(distintos[sem_mapeamento])
+        mapeados[sem_mapeamento] = self.filial_padrao
+        mapeados[vazios] = None
+
+        codigos_filial, filiais = pd.factorize(mapeados, sort=False)
+        filial_planilha = pd.Series(
+            pd.Categorical.from_codes(codigos, categories=pd.Index(distintos, dtype=object)),
+            index=serie.index,
+        )
+        filial_sistema = pd.Series(
+            pd.Categorical.from_codes(codigos_filial[codigos], categories=filiais),
+            index=serie.index,
+        )
+        return filial_planilha, filial_sistema, filiais_nao_mapeadas
+
+    def contar_em_blocos(self, blocos, coluna='filial', ao_mapear=None):
+        """
+        Mapeia blocos produzidos por ler_planilha_em_blocos() sem manter as linhas.
+        Retorna (contagem_filiais, filiais_nao_mapeadas, total_registros) com os
+        mesmos valores do caminho de carga completa.
+        `ao_mapear(bloco, filial_sistema)` é chamado para cada bloco já mapeado.
+        """
+        contagem_filiais = pd.Series(dtype='int64')
+        filiais_nao_mapeadas = set()
+        total_registros = 0
+
+        for bloco in blocos:
+            _, filial_sistema, nao_mapeadas = self.mapear(bloco[coluna])
+            if ao_mapear is not None:
+                ao_mapear(bloco, filial_sistema)
+            contagem_filiais = contagem_filiais.add(contar_filiais(filial_sistema), fill_value=0)
+            filiais_nao_mapeadas |= nao_mapeadas
+            total_registros += len(bloco)
+
+        return contagem_filiais.astype('int64'), filiais_nao_mapeadas, total_registros
+
+
+def contar_filiais(filial_sistema):
+    """
+    value_counts() da coluna categórica de filiais, com índice de texto simples
+    (sort_index() em ordem alfabética, não na ordem das categorias)
+    """
+    contagem = filial_sistema.value_counts()
+    contagem.index = contagem.index.astype(object)
+    return contagem
+
+
+def mapear_filiais(serie, mapeamento=None, filial_padrao=FILIAL_PADRAO):
+    """Atalho para MapeadorFiliais(...).mapear(serie)"""
+    return MapeadorFiliais(mapeamento, filial_padrao).mapear(serie)
+
+
+def criar_mapeador_ids(mapeamento=None, filial_padrao=FILIAL_PADRAO_ID):
+    """MapeadorFiliais para FilialId a partir de MAPEAMENTO_IDS (chaves em maiúsculas)"""
+    mapeamento = MAPEAMENTO_IDS if mapeamento is None else mapeamento
+    return MapeadorFiliais(
+        {chave.lower(): filial_id for chave, filial_id in mapeamento.items()},
+        filial_padrao=filial_padrao,
+    )
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Pipeline único das filiais: lê a planilha de clientes uma vez e executa as etapas
+- analisar: contagem, exemplos e divisão PF/PJ por filial (analisar_planilha_preciso)
+- mapear: filial da planilha → filial do sistema (processar_planilha_filiais)
+- duplicados (opcional): CPF/CNPJ repetidos e nomes quase iguais, PF e PJ
+  (duplicados_clientes)
+- gerar-sql: script por CPF/CNPJ (tabela temporária + JOIN) para Clientes.Filial ou FilialId
+- aplicar (opcional): grava os mesmos pares direto no banco, em lotes parametrizados
+  por um pool de conexões (aplicacao_filiais); o .sql continua sendo gerado
+- Várias planilhas (arquivos, diretórios ou globs): lidas em paralelo e mescladas
+  por CPF/CNPJ antes das etapas (ingestao_planilhas), com um único SQL e relatório
+
+Uso:
+    python pipeline_filiais.py "CPF E CNPJ - CLIENTES ARRIGHI.xlsx" --saida ./saida
+    python pipeline_filiais.py planilha.xlsx --etapas analisar --streaming --cache
+    python pipeline_filiais.py planilha.xlsx --lote 5000 --estrategia-lote top --gzip
+    python pipeline_filiais.py planilha.xlsx --delta snapshot_filiais.csv.gz
+    python pipeline_filiais.py planilha.xlsx --perfilar mapear   # cProfile da etapa
+    python pipeline_filiais.py planilha.xlsx --etapas mapear duplicados --limiar-nome 0.85
+    python pipeline_filiais.py exportacoes/ "extras/*.xlsx" --conflito recente --processos 4
+    python pipeline_filiais.py planilha.xlsx -e gerar-sql aplicar --conexao sqlite:banco.db
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from aplicacao_filiais import (CONEXOES_PADRAO, TAMANHO_LOTE_APLICACAO, TENTATIVAS_PADRAO, VARIAVEL_CONEXAO,
+                               abrir_dialeto, aplicar_pares)
+from cache_planilha import ler_planilha_com_cache, ler_planilha_em_blocos_com_cache
+from delta_filiais import SnapshotFiliais, calcular_delta, pares_alterados
+from documentos import ARQUIVO_REJEITADOS, normalizar_documentos, resumo_rejeitados, salvar_rejeitados
+from duplicados_clientes import (ARQUIVO_DUPLICADOS_DOCUMENTO, ARQUIVO_DUPLICADOS_NOME, COLUNAS_RELATORIO,
+                                 JANELA_PADRAO, LIMIAR_NOME_PADRAO, duplicados_por_documento, nomes_semelhantes)
+from escritor_sql import ESTRATEGIA_LOTE_PADRAO, ESTRATEGIAS_LOTE, EscritorSql
+from estatisticas_filiais import EstatisticasFiliais
+from ingestao_planilhas import (ARQUIVO_CONFLITOS, REGRA_CONFLITO_PADRAO, REGRAS_CONFLITO, ConflitoFiliaisError,
+                                ler_planilhas, mesclar, origem_rejeitados, resumo_origens, salvar_conflitos)
+from instrumentacao import Instrumentacao
+from leitura_planilha import TAMANHO_BLOCO_PADRAO
+from mapeamento_filiais import MapeadorFiliais, contar_filiais, criar_mapeador_ids
+from registro_filiais import carregar_registro, exigir_cadastro
+from sql_filiais import concatenar_pares, consulta_verificacao, escrever_sql_por_documento, montar_pares
+
+ETAPAS = ['analisar', 'mapear', 'duplicados', 'gerar-sql', 'aplicar']
+ETAPAS_PADRAO = ['analisar', 'mapear', 'gerar-sql']
+ARQUIVO_SQL = 'atualizar_filiais_planilha.sql'
+
+
+def criar_mapeador(coluna, registro=None):
+    """Mapeador da coluna F para a coluna de Clientes atualizada (Filial ou FilialId)"""
+    if registro is not None:
+        return registro.mapeador(coluna)
+    return criar_mapeador_ids() if coluna == 'FilialId' else MapeadorFiliais()
+
+
+class EtapaAnalise:
+    """Estatísticas por filial da coluna F"""
+
+    nome = 'analisar'
+
+    def __init__(self, opcoes, registro=None):
+        self.por_tipo = opcoes.por_tipo
+        self.estatisticas = EstatisticasFiliais()
+
+    def consumir(self, bloco, resultado_bloco):
+        self.estatisticas = self.estatisticas.combinar(
+            EstatisticasFiliais.calcular(bloco, por_tipo=self.por_tipo)
+        )
+
+    def concluir(self, contexto):
+        estatisticas = self.estatisticas
+        contexto['estatisticas'] = estatisticas
+
+        print("=== ANÁLISE DA PLANILHA ===")
+        print(f"Total de registros: {estatisticas.total_registros}")
+        print(f"🏢 Filiais únicas encontradas: {len(estatisticas.filiais)}")
+        for filial, count in estatisticas.contagem.items():
+            if estatisticas.por_tipo is not None:
+                tipos = estatisticas.por_tipo.loc[filial]
+                detalhe = ", ".join(f"{tipo}: {qtd}" for tipo, qtd in tipos.items() if qtd)
+                print(f"  - {filial}: {count} clientes ({detalhe})")
+            else:
+                print(f"  - {filial}: {count} clientes")
+            for i, (nome, cpf_cnpj) in enumerate(estatisticas.exemplos_da_filial(filial)):
+                print(f"      {i+1}. {nome} - {cpf_cnpj}")
+
+
+class EtapaMapeamento:
+    """Filial da planilha → filial do sistema (MAPEAMENTO_FILIAIS)"""
+
+    nome = 'mapear'
+
+    def __init__(self, opcoes, registro=None):
+        self.registro = registro
+        self.mapeador = registro.mapeador('Filial') if registro is not None else MapeadorFiliais()
+        self.contagem = None
+        self.filiais_nao_mapeadas = set()
+
+    def consumir(self, bloco, resultado_bloco):
+        _, filial_sistema, nao_mapeadas = self.mapeador.mapear(bloco['filial'])
+        resultado_bloco['filial_sistema'] = filial_sistema
+
+        contagem = contar_filiais(filial_sistema)
+        self.contagem = contagem if self.contagem is None else self.contagem.add(contagem, fill_value=0)
+        self.filiais_nao_mapeadas |= nao_mapeadas
+
+    def concluir(self, contexto):
+        contexto['filiais_nao_mapeadas'] = self.filiais_nao_mapeadas
+
+        print("\n=== MAPEAMENTO DE FILIAIS ===")
+        print(f"Filiais não mapeadas encontradas: {len(self.filiais_nao_mapeadas)}")
+        if self.filiais_nao_mapeadas:
+            print(f"Filiais não mapeadas: {sorted(self.filiais_nao_mapeadas)}")
+        if self.mapeador.aproximadas:
+            print(f"Filiais mapeadas por similaridade: {len(self.mapeador.aproximadas)}")
+            for valor, (chave, confianca) in sorted(self.mapeador.aproximadas.items()):
+                print(f"  '{valor}' → '{chave}' (confiança {confianca:.0%})")
+
+        print("\nDistribuição por filial:")
+        if self.contagem is not None:
+            for filial, count in self.contagem.astype('int64').sort_index().items():
+                print(f"  {filial}: {count} clientes")
+
+        if self.registro is not None:
+            exigir_cadastro(self.filiais_nao_mapeadas)
+
+
+class EtapaDuplicados:
+    """
+    CPF/CNPJ repetidos e nomes quase iguais (duplicados_clientes). Guarda as
+    colunas do relatório de todas as linhas, também no modo streaming.
+    """
+
+    nome = 'duplicados'
+
+    def __init__(self, opcoes, registro=None):
+        self.saida = Path(opcoes.saida)
+        self.janela = opcoes.janela_duplicados
+        self.limiar = opcoes.limiar_nome
+        self.mapeador = criar_mapeador(opcoes.coluna, registro)
+        self.blocos = []
+
+    def consumir(self, bloco, resultado_bloco):
+        if 'documento' not in bloco.columns:
+            documentos, _ = normalizar_documentos(bloco['cpf_cnpj'])
+            bloco = bloco.assign(
+                linha_planilha=bloco.index + 2,  # +1 cabeçalho, +1 base 1
+                documento=documentos['documento'],
+                tipo_pessoa=documentos['tipo_pessoa'],
+            )
+        self.blocos.append(bloco[[c for c in COLUNAS_RELATORIO if c in bloco.columns]])
+
+    def concluir(self, contexto):
+        if not self.blocos:
+            return
+        dados = pd.concat(self.blocos, ignore_index=True)
+        por_documento = duplicados_por_documento(dados, self.mapeador)
+        por_nome = nomes_semelhantes(dados, self.janela, self.limiar, self.mapeador)
+        documentos = por_documento['documento'].nunique()
+        conflitos_documento = por_documento.loc[por_documento['filiais_diferentes'], 'documento'].nunique()
+        contexto.update(documentos_repetidos=documentos, pares_nomes_semelhantes=len(por_nome))
+
+        print("\n=== CLIENTES DUPLICADOS ===")
+        print(f"🔁 CPF/CNPJ repetidos: {documentos} documentos em {len(por_documento)} linhas "
+              f"({conflitos_documento} com filiais diferentes)")
+        print(f"🔁 Nomes semelhantes (≥ {self.limiar:.0%}): {len(por_nome)} pares "
+              f"({int(por_nome['filiais_diferentes'].sum())} com filiais diferentes)")
+        self.saida.mkdir(parents=True, exist_ok=True)
+        for relatorio, arquivo in ((por_documento, ARQUIVO_DUPLICADOS_DOCUMENTO), (por_nome, ARQUIVO_DUPLICADOS_NOME)):
+            if len(relatorio):
+                relatorio.to_csv(self.saida / arquivo, index=False, encoding='utf-8-sig')
+                print(f"📄 Relatório gerado em '{self.saida / arquivo}'")
+
+
+class EtapaSql:
+    """Pares CPF/CNPJ → filial e script SQL por documento"""
+
+    nome = 'gerar-sql'
+
+    def __init__(self, opcoes, registro=None):
+        self.coluna = opcoes.coluna
+        self.saida = Path(opcoes.saida)
+        self.lote = opcoes.lote
+        self.estrategia_lote = opcoes.estrategia_lote
+        self.comprimir = opcoes.gzip
+        self.snapshot = SnapshotFiliais(opcoes.delta) if opcoes.delta else None
+        self.aplicar = 'aplicar' in opcoes.etapas
+        # FilialId usa o mapeamento por Id; Filial reaproveita o resultado da etapa mapear
+        self.registro = registro
+        self.mapeador = criar_mapeador(self.coluna, registro)
+        self.blocos_pares = []
+        self.filiais_nao_mapeadas = set()
+
+    def consumir(self, bloco, resultado_bloco):
+        if self.coluna == 'Filial' and 'filial_sistema' in resultado_bloco:
+            filial = resultado_bloco['filial_sistema']
+        else:
+            _, filial, nao_mapeadas = self.mapeador.mapear(bloco['filial'])
+            self.filiais_nao_mapeadas |= nao_mapeadas
+        pares, rejeitados = montar_pares(bloco['cpf_cnpj'], filial)
+        if 'arquivo' in bloco.columns:
+            # Planilhas mescladas: rejeitados com o arquivo, a aba e a linha de origem
+            rejeitados = origem_rejeitados(rejeitados, bloco)
+        self.blocos_pares.append((pares, rejeitados))
+
+    def concluir(self, contexto):
+        # Sem filial padrão: o SQL só é gerado se toda a coluna F estiver cadastrada
+        if self.registro is not None:
+            exigir_cadastro(self.filiais_nao_mapeadas | contexto.get('filiais_nao_mapeadas', set()))
+        pares, rejeitados = concatenar_pares(self.blocos_pares)
+
+        # Modo delta: só os documentos novos, movidos ou removidos desde a última carga
+        pares_sql, removidos, delta = pares, None, None
+        if self.snapshot is not None:
+            delta = calcular_delta(self.snapshot.carregar(self.coluna), pares)
+            pares_sql, removidos = pares_alterados(delta), delta.removidos
+
+        self.saida.mkdir(parents=True, exist_ok=True)
+        with EscritorSql(self.saida / ARQUIVO_SQL, self.lote, self.estrategia_lote, self.comprimir) as escritor:
+            if 'estatisticas' in contexto:
+                escritor.escrever(contexto['estatisticas'].comentario_sql() + "\n\n")
+            escrever_sql_por_documento(escritor, pares_sql, coluna=self.coluna, removidos=removidos)
+            escritor.escrever("\n\n" + consulta_verificacao(self.coluna))
+        arquivo_sql = escritor.caminho
+        contexto.update(arquivo_sql=arquivo_sql, documentos=len(pares_sql), rejeitados=len(rejeitados),
+                        pares=pares_sql, removidos=removidos, snapshot=self.snapshot)
+
+        print("\n=== GERANDO QUERY SQL ===")
+        print(f"✅ Query SQL gerada em '{arquivo_sql}' ({len(pares_sql)} documentos)")
+        if delta is not None:
+            print(f"🔁 Delta: {len(delta.inseridos)} novos, {len(delta.movidos)} movidos, "
+                  f"{len(delta.removidos)} removidos, {delta.inalterados} inalterados")
+            pendente = self.snapshot.gravar_pendente(pares)
+            if not self.aplicar:
+                print(f"📌 Snapshot pendente em '{pendente}' - depois de aplicar o script:")
+                print(f"   python delta_filiais.py confirmar {self.snapshot.caminho}")
+        print(f"📄 CPF/CNPJ rejeitados: {len(rejeitados)}")
+        for motivo, count in resumo_rejeitados(rejeitados).items():
+            print(f"  {motivo}: {count} linhas")
+        if len(rejeitados):
+            arquivo_rejeitados = self.saida / ARQUIVO_REJEITADOS
+            salvar_rejeitados(rejeitados, arquivo_rejeitados)
+            print(f"📄 Relatório de rejeitados gerado em '{arquivo_rejeitados}'")
+
+
+class EtapaAplicacao:
+    """Aplica no banco os pares da etapa gerar-sql (aplicacao_filiais)"""
+
+    nome = 'aplicar'
+
+    def __init__(self, opcoes, registro=None):
+        if 'gerar-sql' not in opcoes.etapas:
+            raise ValueError("A etapa aplicar usa os pares da etapa gerar-sql: inclua as duas em --etapas")
+        # Conexão aberta só no fim: erros de configuração aparecem antes da leitura
+        self.dialeto = abrir_dialeto(opcoes.conexao or os.environ.get(VARIAVEL_CONEXAO))
+        self.coluna = opcoes.coluna
+        self.tamanho_lote = opcoes.lote_aplicacao
+        self.conexoes = opcoes.conexoes
+        self.tentativas = opcoes.tentativas
+
+    def consumir(self, bloco, resultado_bloco):
+        pass
+
+    def concluir(self, contexto):
+        pares, removidos = contexto['pares'], contexto['removidos']
+        print(f"\n=== APLICANDO NO BANCO ({self.dialeto.nome}) ===")
+        print(f"🗄️  {len(pares)} documentos em lotes de {self.tamanho_lote}, {self.conexoes} conexões")
+        resultado = aplicar_pares(self.dialeto, pares, self.coluna, removidos, self.tamanho_lote,
+                                  self.conexoes, self.tentativas)
+        contexto.update(clientes_alterados=resultado.clientes_alterados, clientes_limpos=resultado.clientes_limpos)
+
+        print(f"✅ {resultado.clientes_alterados} clientes com {self.coluna} alterado "
+              f"({resultado.documentos} documentos, {resultado.lotes} lotes, {resultado.segundos:.2f} s)")
+        if removidos is not None:
+            print(f"🔁 {resultado.clientes_limpos} clientes com {self.coluna} removido (saíram da planilha)")
+        if resultado.novas_tentativas:
+            print(f"⚠️  Lotes repetidos após erro transitório: {resultado.novas_tentativas}")
+        if contexto.get('snapshot') is not None:
+            print(f"📌 Snapshot confirmado em '{contexto['snapshot'].confirmar()}'")
+
+
+CLASSES_ETAPAS = {
+    'analisar': EtapaAnalise,
+    'mapear': EtapaMapeamento,
+    'duplicados': EtapaDuplicados,
+    'gerar-sql': EtapaSql,
+    'aplicar': EtapaAplicacao,
+}
+
+
+def planilhas_multiplas(planilhas):
+    """True se a entrada não for um único arquivo (vários, diretório ou glob)"""
+    return len(planilhas) > 1 or not Path(planilhas[0]).is_file()
+
+
+def carregar_mescladas(opcoes, registro, instrumentacao):
+    """Lê as planilhas em paralelo e mescla por CPF/CNPJ; retorna (clientes, contadores)"""
+    with instrumentacao.etapa('carregar'):
+        linhas, ignoradas = ler_planilhas(opcoes.planilha, opcoes.processos)
+    arquivo_conflitos = Path(opcoes.saida) / ARQUIVO_CONFLITOS
+    with instrumentacao.etapa('mesclar'):
+        try:
+            mesclagem = mesclar(linhas, opcoes.conflito, criar_mapeador(opcoes.coluna, registro))
+        except ConflitoFiliaisError as e:
+            salvar_conflitos(e.conflitos, arquivo_conflitos)
+            print(f"📄 Relatório de conflitos gerado em '{arquivo_conflitos}'")
+            raise
+        resumo = resumo_origens(linhas, mesclagem.clientes)
+
+    arquivos = resumo.index.get_level_values('arquivo').unique()
+    print("=== MESCLAGEM DAS PLANILHAS ===")
+    print(f"📄 {len(arquivos)} planilha(s), {len(resumo)} aba(s), {len(linhas)} registros")
+    for (arquivo, aba), origem in resumo.iterrows():
+        print(f"  - {Path(arquivo).name} / {aba}: {origem['registros']} registros, "
+              f"{origem['mantidos']} mantidos")
+    for arquivo, aba, motivo in ignoradas:
+        print(f"⚠️  Aba ignorada: {Path(arquivo).name} / {aba} ({motivo})")
+    print(f"🔁 CPF/CNPJ repetidos descartados: {mesclagem.duplicados} (regra: {opcoes.conflito})")
+    documentos_em_conflito = mesclagem.conflitos['documento'].nunique()
+    if documentos_em_conflito:
+        salvar_conflitos(mesclagem.conflitos, arquivo_conflitos)
+        print(f"⚠️  CPF/CNPJ com filiais diferentes entre as planilhas: {documentos_em_conflito}")
+        print(f"📄 Relatório de conflitos gerado em '{arquivo_conflitos}'")
+    print()
+
+    contadores = {
+        'planilhas': len(arquivos),
+        'abas': len(resumo),
+        'registros_lidos': len(linhas),
+        'duplicados': mesclagem.duplicados,
+        'conflitos': documentos_em_conflito,
+    }
+    return mesclagem.clientes, contadores
+
+
+def executar_pipeline(opcoes):
+    """Lê a planilha uma única vez e passa cada bloco por todas as etapas escolhidas"""
+    instrumentacao = Instrumentacao('pipeline_filiais', not opcoes.sem_memoria, opcoes.perfilar)
+    # A string de conexão pode ter a senha do banco: fica fora do relatório
+    instrumentacao.parametros = {
+        chave: valor for chave, valor in vars(opcoes).items() if chave not in ('sem_memoria', 'perfilar', 'conexao')
+    }
+    try:
+        registro = carregar_registro(opcoes.filiais)
+        etapas = [CLASSES_ETAPAS[nome](opcoes, registro) for nome in ETAPAS if nome in opcoes.etapas]
+
+        # Leitura única: a planilha inteira (um bloco), blocos em streaming ou
+        # várias planilhas mescladas em um bloco
+        contadores_mesclagem = {}
+        if planilhas_multiplas(opcoes.planilha):
+            if opcoes.streaming or opcoes.cache:
+                print("⚠️  --streaming e --cache valem só para uma planilha; ignorados na mesclagem")
+            clientes, contadores_mesclagem = carregar_mescladas(opcoes, registro, instrumentacao)
+            blocos = [clientes]
+        elif opcoes.streaming:
+            # Cada bloco é lido sob demanda: a leitura é medida a cada next()
+            blocos = instrumentacao.iterar('carregar', ler_planilha_em_blocos_com_cache(
+                opcoes.planilha[0], opcoes.cache, opcoes.tamanho_bloco
+            ))
+        else:
+            with instrumentacao.etapa('carregar'):
+                blocos = [ler_planilha_com_cache(opcoes.planilha[0], opcoes.cache)]
+
+        total_registros = 0
+        for bloco in blocos:
+            total_registros += len(bloco)
+            resultado_bloco = {}
+            for etapa in etapas:
+                with instrumentacao.etapa(etapa.nome):
+                    etapa.consumir(bloco, resultado_bloco)
+
+        contexto = {}
+        for etapa in etapas:
+            with instrumentacao.etapa(etapa.nome):
+                etapa.concluir(contexto)
+
+        instrumentacao.imprimir()
+        relatorio = instrumentacao.gravar_relatorio(
+            contexto.get('arquivo_sql', Path(opcoes.saida) / ARQUIVO_SQL),
+            registros=total_registros,
+            documentos=contexto.get('documentos'),
+            rejeitados=contexto.get('rejeitados'),
+            documentos_repetidos=contexto.get('documentos_repetidos'),
+            pares_nomes_semelhantes=contexto.get('pares_nomes_semelhantes'),
+            clientes_alterados=contexto.get('clientes_alterados'),
+            **contadores_mesclagem,
+        )
+        print(f"📈 Relatório de execução gerado em '{relatorio}'")
+        return contexto
+    finally:
+        instrumentacao.encerrar()
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        description="Analisa a planilha de clientes e gera o SQL de atualização das filiais"
+    )
+    parser.add_argument('planilha', nargs='+',
+                        help='Caminho do .xlsx (CPF E CNPJ - CLIENTES ARRIGHI.xlsx); vários arquivos, '
+                             'diretórios ou globs são lidos em paralelo e mesclados por CPF/CNPJ')
+    parser.add_argument('-s', '--saida', default='.', help='Diretório dos arquivos gerados (padrão: atual)')
+    parser.add_argument('-e', '--etapas', nargs='+', choices=ETAPAS, default=ETAPAS_PADRAO,
+                        help='Etapas a executar (padrão: analisar, mapear e gerar-sql)')
+    parser.add_argument('--coluna', choices=['FilialId', 'Filial'], default='FilialId',
+                        help='Coluna de Clientes atualizada pelo SQL (padrão: FilialId)')
+    parser.add_argument('--filiais', default=None,
+                        help='Exportação da tabela Filiais (.json/.csv); padrão: filiais.json, se existir')
+    parser.add_argument('--lote', type=int, default=None,
+                        help='Clientes por transação nos UPDATEs, com blocos separados por GO (padrão: um UPDATE só)')
+    parser.add_argument('--estrategia-lote', choices=ESTRATEGIAS_LOTE, default=ESTRATEGIA_LOTE_PADRAO,
+                        help='Lotes por faixa de Clientes.Id (id) ou UPDATE TOP n (top)')
+    parser.add_argument('--gzip', action='store_true', help='Grava o script SQL comprimido (.sql.gz)')
+    parser.add_argument('--delta', metavar='SNAPSHOT', default=None,
+                        help='Gera SQL só para as mudanças desde o snapshot da última carga aplicada')
+    parser.add_argument('--por-tipo', action='store_true', help='Divide a análise em PF/PJ')
+    parser.add_argument('--streaming', action='store_true', help='Lê a planilha em blocos (memória constante)')
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO_PADRAO,
+                        help='Linhas por bloco no modo streaming')
+    parser.add_argument('--cache', action='store_true', help='Usa o cache colunar da planilha')
+    parser.add_argument('--janela-duplicados', type=int, default=JANELA_PADRAO,
+                        help='Vizinhos comparados por linha na busca de nomes semelhantes (padrão: 5)')
+    parser.add_argument('--limiar-nome', type=float, default=LIMIAR_NOME_PADRAO,
+                        help='Similaridade mínima (0 a 1) entre nomes duplicados (padrão: 0.9)')
+    parser.add_argument('--conflito', choices=REGRAS_CONFLITO, default=REGRA_CONFLITO_PADRAO,
+                        help='CPF/CNPJ em mais de uma planilha: ocorrência mantida (padrão: primeira)')
+    parser.add_argument('--processos', type=int, default=None,
+                        help='Processos de leitura das planilhas (padrão: um por CPU)')
+    parser.add_argument('--conexao', default=None,
+                        help='Banco da etapa aplicar: string ODBC do SQL Server ou sqlite:arquivo.db '
+                             '(padrão: variável FILIAIS_CONEXAO)')
+    parser.add_argument('--lote-aplicacao', type=int, default=TAMANHO_LOTE_APLICACAO,
+                        help='Documentos por lote (e transação) na etapa aplicar (padrão: 5000)')
+    parser.add_argument('--conexoes', type=int, default=CONEXOES_PADRAO,
+                        help='Conexões simultâneas na etapa aplicar (padrão: 4)')
+    parser.add_argument('--tentativas', type=int, default=TENTATIVAS_PADRAO,
+                        help='Tentativas por lote após erro transitório (padrão: 3)')
+    parser.add_argument('--perfilar', choices=['carregar', 'mesclar'] + ETAPAS, default=None,
+                        help='Grava o cProfile da etapa indicada (.prof ao lado do relatório)')
+    parser.add_argument('--sem-memoria', action='store_true',
+                        help='Não mede o pico de memória por etapa (tracemalloc deixa a execução mais lenta)')
+    return parser
+
+
+def main(argv=None):
+    opcoes = criar_parser().parse_args(argv)
+    try:
+        executar_pipeline(opcoes)
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
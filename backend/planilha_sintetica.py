@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Gerador de planilhas sintéticas no formato "CPF E CNPJ - CLIENTES ARRIGHI.xlsx"
+- Coluna A nome, B CPF/CNPJ, F filial (C a E preenchidas como na planilha real)
+- CPFs e CNPJs com dígitos verificadores válidos, em formatos variados (com
+  máscara, só dígitos e número sem zeros à esquerda, como o Excel grava)
+- Distribuição de filiais concentrada no Rio de Janeiro, variações de acento,
+  caixa, espaços e erros de digitação, células vazias e documentos inválidos
+- Reprodutível pela semente; de 1 mil a milhões de linhas (acima do limite de
+  linhas do Excel use gerar_clientes() direto, em memória)
+
+Uso:
+    python planilha_sintetica.py clientes_sinteticos.xlsx --linhas 100000 --semente 42
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from documentos import TAMANHO_CNPJ, TAMANHO_CPF, completar_digitos_verificadores
+from sql_filiais import formatar_documentos
+
+LIMITE_LINHAS_EXCEL = 1_048_575  # 1.048.576 linhas por aba, menos o cabeçalho
+CABECALHO = ['NOME', 'CPF/CNPJ', 'TELEFONE', 'EMAIL', 'DATA CADASTRO', 'FILIAL']
+
+# Filial (forma canônica) → peso e variações encontradas na coluna F
+FILIAIS_SINTETICAS = {
+    'RIO DE JANEIRO': (0.55, ['RIO DE JANEIRO', 'Rio de Janeiro', 'rio de janeiro ', 'RIO  DE JANEIRO',
+                              'Rio de Janiero', 'Rio de Janeiro - RJ']),
+    'SÃO PAULO': (0.12, ['SÃO PAULO', 'São Paulo', 'SAO PAULO', 'Sao Paulo', 'são paulo']),
+    'CAMPINAS': (0.07, ['CAMPINAS', 'Campinas']),
+    'BELO HORIZONTE': (0.06, ['BELO HORIZONTE', 'Belo Horizonte', 'BELO HORIZONT']),
+    'SALVADOR': (0.05, ['SALVADOR', 'Salvador']),
+    'MANAUS': (0.05, ['MANAUS', 'Manaus']),
+    'RIBEIRÃO PRETO': (0.04, ['RIBEIRÃO PRETO', 'Ribeirão Preto', 'RIBEIRAO PRETO']),
+    'BOA VISTA': (0.02, ['BOA VISTA', 'Boa Vista', 'boavista']),
+    'BRASÍLIA': (0.02, ['BRASÍLIA', 'Brasilia']),
+    'FORTALEZA': (0.02, ['FORTALEZA', 'Fortaleza']),
+}
+
+PROPORCAO_CNPJ = 0.25
+PROPORCAO_FILIAL_VAZIA = 0.02
+PROPORCAO_DOCUMENTO_VAZIO = 0.03
+PROPORCAO_DOCUMENTO_INVALIDO = 0.02
+
+NOMES = ['Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela',
+         'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Patrícia', 'Rafael', 'Sofia', 'Thiago',
+         'Vanessa', 'Wagner']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira',
+              'Lima', 'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Araújo', 'Melo']
+SUFIXOS_EMPRESA = ['LTDA', 'ME', 'EIRELI', 'S/A', 'Comércio LTDA', 'Serviços ME']
+
+
+def _documentos(rng, quantidade, cnpj):
+    """Textos de CPF (11) ou CNPJ (14) válidos, só com dígitos"""
+    tamanho_base = (TAMANHO_CNPJ if cnpj else TAMANHO_CPF) - 2
+    matriz = completar_digitos_verificadores(rng.integers(0, 10, (quantidade, tamanho_base)))
+    # Sequências repetidas (000.000.000-00) são rejeitadas: troca o primeiro dígito
+    repetidos = (matriz == matriz[:, :1]).all(axis=1)
+    if repetidos.any():
+        matriz[repetidos] = completar_digitos_verificadores(
+            np.column_stack([(matriz[repetidos, :1] + 1) % 10, matriz[repetidos, 1:tamanho_base]])
+        )
+    largura = matriz.shape[1]
+    textos = (matriz.astype(np.uint8) + ord('0')).view(f'S{largura}').ravel()
+    return pd.Series(textos.astype(f'U{largura}'), dtype=object)
+
+
+def gerar_clientes(linhas, semente=0):
+    """
+    DataFrame com as colunas da planilha (nome, cpf_cnpj, telefone, email,
+    data_cadastro, filial), na mesma ordem das colunas A-F
+    """
+    rng = np.random.default_rng(semente)
+
+    # Tipo de pessoa e documento válido (só dígitos)
+    cnpj = rng.random(linhas) < PROPORCAO_CNPJ
+    digitos = pd.Series(np.empty(linhas, dtype=object))
+    digitos[~cnpj] = _documentos(rng, int((~cnpj).sum()), cnpj=False).to_numpy()
+    digitos[cnpj] = _documentos(rng, int(cnpj.sum()), cnpj=True).to_numpy()
+
+    # Formatos como chegam do Excel: com máscara, só dígitos ou número (sem zeros à esquerda)
+    formato = rng.integers(0, 3, linhas)
+    cpf_cnpj = digitos.where(formato != 0, formatar_documentos(digitos)).astype(object)
+    numericos = formato == 2
+    cpf_cnpj[numericos] = digitos[numericos].astype('int64').to_numpy(dtype=object)
+
+    # Documentos inválidos (um dígito trocado) e vazios
+    invalidos = rng.random(linhas) < PROPORCAO_DOCUMENTO_INVALIDO
+    if invalidos.any():
+        # Os dois lados como 'str': object + str falha no pandas 3
+        originais = digitos[invalidos].astype('str')
+        trocado = pd.Series((originais.str[-1].astype(int) + 1) % 10, dtype='str', index=originais.index)
+        cpf_cnpj[invalidos] = (originais.str[:-1] + trocado).to_numpy(dtype=object)
+    cpf_cnpj[rng.random(linhas) < PROPORCAO_DOCUMENTO_VAZIO] = None
+
+    # Nomes: pessoas físicas e razões sociais
+    nome = pd.Series(np.array(NOMES, dtype=object)[rng.integers(0, len(NOMES), linhas)], dtype='str')
+    sobrenome = pd.Series(np.array(SOBRENOMES, dtype=object)[rng.integers(0, len(SOBRENOMES), linhas)], dtype='str')
+    sufixo = pd.Series(np.array(SUFIXOS_EMPRESA, dtype=object)[rng.integers(0, len(SUFIXOS_EMPRESA), linhas)], dtype='str')
+    nome_completo = (nome + ' ' + sobrenome).where(~cnpj, sobrenome + ' ' + nome + ' ' + sufixo)
+
+    # Filial: distribuição concentrada no Rio de Janeiro, com variações de escrita
+    canonicas = list(FILIAIS_SINTETICAS)
+    pesos = np.array([FILIAIS_SINTETICAS[f][0] for f in canonicas])
+    escolhidas = rng.choice(len(canonicas), size=linhas, p=pesos / pesos.sum())
+    filial = np.empty(linhas, dtype=object)
+    for i, canonica in enumerate(canonicas):
+        linhas_filial = np.flatnonzero(escolhidas == i)
+        variacoes = np.array(FILIAIS_SINTETICAS[canonica][1], dtype=object)
+        # Forma canônica na maioria das linhas, variações no restante
+        pesos_variacoes = np.full(len(variacoes), 0.3 / max(len(variacoes) - 1, 1))
+        pesos_variacoes[0] = 0.7 if len(variacoes) > 1 else 1.0
+        filial[linhas_filial] = rng.choice(variacoes, size=len(linhas_filial), p=pesos_variacoes)
+    filial[rng.random(linhas) < PROPORCAO_FILIAL_VAZIA] = None
+
+    telefone = pd.Series(rng.integers(11_900_000_000, 99_999_999_999, linhas)).astype(str)
+    sequencia = pd.Series(np.arange(linhas)).astype(str)
+    email = nome.str.lower() + '.' + sobrenome.str.lower() + sequencia + '@exemplo.com.br'
+    data_cadastro = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 3650, linhas), unit='D')
+
+    return pd.DataFrame({
+        'nome': nome_completo.astype(object),
+        'cpf_cnpj': cpf_cnpj,
+        'telefone': telefone.astype(object),
+        'email': email.astype(object),
+        'data_cadastro': data_cadastro,
+        'filial': filial,
+    })
+
+
+def gravar_planilha(clientes, caminho):
+    """Grava o DataFrame como .xlsx (openpyxl em modo write-only, memória constante)"""
+    if len(clientes) > LIMITE_LINHAS_EXCEL:
+        raise ValueError(
+            f"{len(clientes)} linhas excedem o limite de {LIMITE_LINHAS_EXCEL} linhas por aba do Excel"
+        )
+    livro = Workbook(write_only=True)
+    aba = livro.create_sheet('Clientes')
+    aba.append(CABECALHO)
+    for linha in clientes.itertuples(index=False, name=None):
+        aba.append([None if valor is None or valor is pd.NaT else valor for valor in linha])
+    livro.save(caminho)
+
+
+def gerar_planilha(caminho, linhas, semente=0):
+    """Gera e grava uma planilha sintética com `linhas` clientes"""
+    clientes = gerar_clientes(linhas, semente)
+    gravar_planilha(clientes, caminho)
+    return clientes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera uma planilha sintética de clientes (CPF/CNPJ e filial)")
+    parser.add_argument('saida', help='Arquivo .xlsx a gerar')
+    parser.add_argument('-n', '--linhas', type=int, default=10_000, help='Quantidade de clientes (padrão: 10000)')
+    parser.add_argument('--semente', type=int, default=0, help='Semente do gerador aleatório (padrão: 0)')
+    opcoes = parser.parse_args(argv)
+
+    try:
+        gerar_planilha(opcoes.saida, opcoes.linhas, opcoes.semente)
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    print(f"✅ Planilha sintética gerada em '{opcoes.saida}' ({opcoes.linhas} clientes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,155 +1,184 @@
 import pandas as pd
 import re
 
-def processar_planilha_filiais():
-    # Caminho da planilha
-    caminho_planilha = r"C:\Users\Mauro Benetti\Downloads\CPF E CNPJ - CLIENTES ARRIGHI.xlsx"
-    
+from cache_planilha import ler_planilha_com_cache, ler_planilha_em_blocos_com_cache
+from leitura_planilha import CAMINHO_PLANILHA, COLUNAS_PLANILHA
+from mapeamento_filiais import MAPEAMENTO_FILIAIS, MapeadorFiliais, contar_filiais, normalizar_coluna
+from documentos import ARQUIVO_REJEITADOS, chaves_documentos, resumo_rejeitados, salvar_rejeitados
+from escritor_sql import ESTRATEGIA_LOTE_PADRAO, EscritorSql
+from instrumentacao import Instrumentacao
+from registro_filiais import carregar_registro, exigir_cadastro
+from sql_filiais import (concatenar_pares, escrever_sql_por_documento, literal_contem, literal_texto,
+                         montar_pares)
+
+ARQUIVO_SQL = 'atualizar_filiais_planilha.sql'
+
+def processar_planilha_filiais(caminho_planilha=CAMINHO_PLANILHA, streaming=False, por_documento=False,
+                               usar_cache=False, lote=None, estrategia_lote=ESTRATEGIA_LOTE_PADRAO,
+                               comprimir=False, arquivo_filiais=None, medir_memoria=True, perfilar=None):
+    # Tempo, CPU e memória por etapa (relatório JSON ao lado do .sql)
+    instrumentacao = Instrumentacao('processar_planilha_filiais', medir_memoria, perfilar)
+    instrumentacao.parametros = {
+        'planilha': str(caminho_planilha), 'streaming': streaming, 'por_documento': por_documento,
+        'usar_cache': usar_cache, 'lote': lote, 'estrategia_lote': estrategia_lote, 'comprimir': comprimir,
+    }
     try:
-        # Ler a planilha
-        df = pd.read_excel(caminho_planilha)
-        
-        print("=== DADOS DA PLANILHA ===")
-        print(f"Total de registros: {len(df)}")
-        print(f"Colunas: {list(df.columns)}")
-        
         # Mapeamento de filiais da planilha para o padrão do sistema
-        mapeamento_filiais = {
-            'rio de janeiro': 'Rio de Janeiro - Copacabana',
-            'são paulo': 'São Paulo - Centro',
-            'belo horizonte': 'Belo Horizonte - Centro',
-            'salvador': 'Salvador - Barra',
-            'brasília': 'Brasília - Centro',
-            'curitiba': 'Curitiba - Centro',
-            'porto alegre': 'Porto Alegre - Centro',
-            'fortaleza': 'Fortaleza - Centro',
-            'recife': 'Recife - Centro',
-            'manaus': 'Manaus - Centro',
-            'goiânia': 'Goiânia - Centro',
-            'campo grande': 'Campo Grande - Centro',
-            'maceió': 'Maceió - Centro',
-            'natal': 'Natal - Centro',
-            'joão pessoa': 'João Pessoa - Centro',
-            'teresina': 'Teresina - Centro',
-            'são luís': 'São Luís - Centro',
-            'palmas': 'Palmas - Centro',
-            'aracaju': 'Aracaju - Centro',
-            'vitória': 'Vitória - Centro',
-            'florianópolis': 'Florianópolis - Centro',
-            'cuiabá': 'Cuiabá - Centro',
-            'porto velho': 'Porto Velho - Centro',
-            'rio branco': 'Rio Branco - Centro',
-            'boavista': 'Boa Vista - Centro',
-            'macapá': 'Macapá - Centro'
-        }
-        
-        # Processar dados
-        resultados = []
-        filiais_nao_mapeadas = set()
-        
-        for index, row in df.iterrows():
-            try:
-                nome = str(row.iloc[0]).strip().lower() if pd.notna(row.iloc[0]) else ''  # Coluna A
-                cpf_cnpj = str(row.iloc[1]).strip() if pd.notna(row.iloc[1]) else ''      # Coluna B
-                filial_planilha = str(row.iloc[5]).strip().lower() if pd.notna(row.iloc[5]) else ''  # Coluna F
-                
-                # Encontrar filial mapeada
-                filial_mapeada = None
-                for filial_planilha_key, filial_sistema in mapeamento_filiais.items():
-                    if filial_planilha_key in filial_planilha:
-                        filial_mapeada = filial_sistema
-                        break
-                
-                if not filial_mapeada and filial_planilha:
-                    filiais_nao_mapeadas.add(filial_planilha)
-                    filial_mapeada = 'São Paulo - Centro'  # Filial padrão
+        # (cadastro exportado da tabela Filiais, se houver; senão o mapeamento fixo)
+        registro = carregar_registro(arquivo_filiais)
+        if registro is not None:
+            mapeamento_filiais = registro.mapeamento('Nome')
+            mapeador = registro.mapeador('Filial')
+            senao = "c.Filial -- Mantém a filial atual"
+        else:
+            mapeamento_filiais = MAPEAMENTO_FILIAIS
+            mapeador = MapeadorFiliais(mapeamento_filiais)
+            senao = f"{literal_texto('São Paulo - Centro')} -- Filial padrão"
+        
+        if streaming:
+            # Blocos de linhas: memória constante, apenas contagens são mantidas
+            # (e os pares CPF/CNPJ → filial, no modo por documento)
+            blocos_pares = []
+            
+            def guardar_pares(bloco, filial_sistema):
+                blocos_pares.append(montar_pares(bloco['cpf_cnpj'], filial_sistema))
+            
+            blocos = instrumentacao.iterar(
+                'carregar', ler_planilha_em_blocos_com_cache(caminho_planilha, usar_cache)
+            )
+            with instrumentacao.etapa('mapear'):
+                contagem_filiais, filiais_nao_mapeadas, total_registros = mapeador.contar_em_blocos(
+                    blocos, ao_mapear=guardar_pares if por_documento else None
+                )
+                if por_documento:
+                    pares, rejeitados = concatenar_pares(blocos_pares)
+            
+            print("=== DADOS DA PLANILHA (STREAMING) ===")
+            print(f"Total de registros: {total_registros}")
+            print(f"Colunas: {list(COLUNAS_PLANILHA.values())}")
+        else:
+            # Ler a planilha (apenas colunas A, B e F)
+            with instrumentacao.etapa('carregar'):
+                df = ler_planilha_com_cache(caminho_planilha, usar_cache)
+            
+            print("=== DADOS DA PLANILHA ===")
+            print(f"Total de registros: {len(df)}")
+            print(f"Colunas: {list(df.columns)}")
+            
+            # Processar dados (coluna F resolvida em uma única passada vetorizada;
+            # filiais categóricas e CPF/CNPJ como chave numérica de largura fixa)
+            with instrumentacao.etapa('mapear'):
+                filial_planilha, filial_sistema, filiais_nao_mapeadas = mapeador.mapear(df['filial'])
                 
-                resultados.append({
-                    'nome': nome,
-                    'cpf_cnpj': cpf_cnpj,
+                resultados = pd.DataFrame({
+                    'nome': normalizar_coluna(df['nome']),                                      # Coluna A
+                    'cpf_cnpj': chaves_documentos(df['cpf_cnpj']),                               # Coluna B
                     'filial_planilha': filial_planilha,
-                    'filial_sistema': filial_mapeada
+                    'filial_sistema': filial_sistema
                 })
-            except Exception as e:
-                print(f"Erro ao processar linha {index}: {e}")
-                continue
+                total_registros = len(resultados)
+                
+                # Contar por filial
+                contagem_filiais = contar_filiais(resultados['filial_sistema'])
+                
+                if por_documento:
+                    pares, rejeitados = montar_pares(df['cpf_cnpj'], filial_sistema)
+        
+        # Com o cadastro, nenhuma filial da planilha pode cair em uma filial padrão
+        if registro is not None:
+            exigir_cadastro(filiais_nao_mapeadas)
         
         # Gerar query SQL
         print("\n=== GERANDO QUERY SQL ===")
         
-        # Query para pessoas físicas (CPF)
-        query_pf = """-- Atualizar filiais de Pessoas Físicas baseado na planilha
-UPDATE c
-SET c.Filial = 
-    CASE """
-        
-        for filial_planilha_key, filial_sistema in mapeamento_filiais.items():
-            query_pf += f"\n        WHEN pf.Nome LIKE '%{filial_planilha_key}%' THEN '{filial_sistema}'"
-        
-        query_pf += """
-        ELSE 'São Paulo - Centro' -- Filial padrão
-    END,
-    c.DataAtualizacao = GETDATE()
-FROM Clientes c
-INNER JOIN PessoasFisicas pf ON c.PessoaFisicaId = pf.Id
-WHERE c.TipoPessoa = 'Fisica' AND c.Ativo = 1;"""
-        
-        # Query para pessoas jurídicas (CNPJ)
-        query_pj = """-- Atualizar filiais de Pessoas Jurídicas baseado na planilha
-UPDATE c
-SET c.Filial = 
-    CASE """
-        
-        for filial_planilha_key, filial_sistema in mapeamento_filiais.items():
-            query_pj += f"\n        WHEN pj.RazaoSocial LIKE '%{filial_planilha_key}%' THEN '{filial_sistema}'"
-        
-        query_pj += """
-        ELSE 'São Paulo - Centro' -- Filial padrão
-    END,
-    c.DataAtualizacao = GETDATE()
-FROM Clientes c
-INNER JOIN PessoasJuridicas pj ON c.PessoaJuridicaId = pj.Id
-WHERE c.TipoPessoa = 'Juridica' AND c.Ativo = 1;"""
-        
-        # Salvar queries em arquivo
-        with open('atualizar_filiais_planilha.sql', 'w', encoding='utf-8') as f:
-            f.write("-- Query gerada automaticamente baseada na planilha\n")
-            f.write("-- Arquivo: CPF E CNPJ - CLIENTES ARRIGHI.xlsx\n\n")
-            f.write(query_pf)
-            f.write("\n\n")
-            f.write(query_pj)
-            f.write("\n\n-- Verificar resultado\n")
-            f.write("SELECT '=== FILIAIS ATUALIZADAS ===' as Info;\n")
-            f.write("SELECT \n")
-            f.write("    c.Filial,\n")
-            f.write("    COUNT(*) as TotalClientes\n")
-            f.write("FROM Clientes c\n")
-            f.write("WHERE c.Ativo = 1\n")
-            f.write("GROUP BY c.Filial\n")
-            f.write("ORDER BY c.Filial;")
-        
-        print("✅ Query SQL gerada em 'atualizar_filiais_planilha.sql'")
+        # Salvar queries em arquivo, à medida que são geradas
+        # (UPDATEs em lotes separados por GO, se pedido)
+        with instrumentacao.etapa('gerar-sql'), EscritorSql(ARQUIVO_SQL, lote, estrategia_lote, comprimir) as escritor:
+            escritor.escrever("-- Query gerada automaticamente baseada na planilha\n")
+            escritor.escrever("-- Arquivo: CPF E CNPJ - CLIENTES ARRIGHI.xlsx\n\n")
+            if por_documento:
+                # Tabela temporária + JOIN por CPF/CNPJ (seek nos índices, sem LIKE)
+                escrever_sql_por_documento(
+                    escritor, pares, coluna='Filial', titulo="Atualizar filiais dos clientes por CPF/CNPJ da planilha"
+                )
+            else:
+                # Query para pessoas físicas (CPF)
+                casos_pf = "".join(
+                    f"\n        WHEN pf.Nome LIKE {literal_contem(filial_planilha_key)} THEN {literal_texto(filial_sistema)}"
+                    for filial_planilha_key, filial_sistema in mapeamento_filiais.items()
+                )
+                escritor.atualizar('Filial', f"""
+    CASE {casos_pf}
+        ELSE {senao}
+    END""", """FROM Clientes c
+INNER JOIN PessoasFisicas pf ON c.PessoaFisicaId = pf.Id""",
+                    "c.TipoPessoa = 'Fisica' AND c.Ativo = 1",
+                    comentario="-- Atualizar filiais de Pessoas Físicas baseado na planilha")
+                escritor.escrever("\n\n")
+                
+                # Query para pessoas jurídicas (CNPJ)
+                casos_pj = "".join(
+                    f"\n        WHEN pj.RazaoSocial LIKE {literal_contem(filial_planilha_key)} THEN {literal_texto(filial_sistema)}"
+                    for filial_planilha_key, filial_sistema in mapeamento_filiais.items()
+                )
+                escritor.atualizar('Filial', f"""
+    CASE {casos_pj}
+        ELSE {senao}
+    END""", """FROM Clientes c
+INNER JOIN PessoasJuridicas pj ON c.PessoaJuridicaId = pj.Id""",
+                    "c.TipoPessoa = 'Juridica' AND c.Ativo = 1",
+                    comentario="-- Atualizar filiais de Pessoas Jurídicas baseado na planilha")
+            escritor.escrever("\n\n-- Verificar resultado\n")
+            escritor.escrever("SELECT '=== FILIAIS ATUALIZADAS ===' as Info;\n")
+            escritor.escrever("SELECT \n")
+            escritor.escrever("    c.Filial,\n")
+            escritor.escrever("    COUNT(*) as TotalClientes\n")
+            escritor.escrever("FROM Clientes c\n")
+            escritor.escrever("WHERE c.Ativo = 1\n")
+            escritor.escrever("GROUP BY c.Filial\n")
+            escritor.escrever("ORDER BY c.Filial;")
+        
+        print(f"✅ Query SQL gerada em '{escritor.caminho}'")
+
+        if por_documento:
+            print(f"📄 CPF/CNPJ rejeitados: {len(rejeitados)}")
+            for motivo, count in resumo_rejeitados(rejeitados).items():
+                print(f"  {motivo}: {count} linhas")
+            if len(rejeitados):
+                with instrumentacao.etapa('rejeitados'):
+                    salvar_rejeitados(rejeitados)
+                print(f"📄 Relatório de rejeitados gerado em '{ARQUIVO_REJEITADOS}'")
         
         # Estatísticas
         print(f"\n=== ESTATÍSTICAS ===")
-        print(f"Total de registros processados: {len(resultados)}")
+        print(f"Total de registros processados: {total_registros}")
         print(f"Filiais não mapeadas encontradas: {len(filiais_nao_mapeadas)}")
         
         if filiais_nao_mapeadas:
             print(f"Filiais não mapeadas: {sorted(filiais_nao_mapeadas)}")
         
-        # Contar por filial
-        contagem_filiais = {}
-        for r in resultados:
-            filial = r['filial_sistema']
-            contagem_filiais[filial] = contagem_filiais.get(filial, 0) + 1
+        if mapeador.aproximadas:
+            print(f"Filiais mapeadas por similaridade: {len(mapeador.aproximadas)}")
+            for valor, (chave, confianca) in sorted(mapeador.aproximadas.items()):
+                print(f"  '{valor}' → '{chave}' (confiança {confianca:.0%})")
         
         print(f"\nDistribuição por filial:")
-        for filial, count in sorted(contagem_filiais.items()):
+        for filial, count in contagem_filiais.sort_index().items():
             print(f"  {filial}: {count} clientes")
+        
+        relatorio = instrumentacao.gravar_relatorio(
+            escritor.caminho,
+            registros=total_registros,
+            filiais_nao_mapeadas=len(filiais_nao_mapeadas),
+            documentos=len(pares) if por_documento else None,
+            rejeitados=len(rejeitados) if por_documento else None,
+        )
+        print(f"\n📈 Relatório de execução gerado em '{relatorio}'")
             
     except Exception as e:
         print(f"❌ Erro ao processar planilha: {e}")
+    finally:
+        instrumentacao.encerrar()
 
 if __name__ == "__main__":
     processar_planilha_filiais()
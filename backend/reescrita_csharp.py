@@ -0,0 +1,413 @@
+"""
+Motor de reescrita de código C# em uma única passada
+- Lexer leve: comentários (// e /* */), strings ("...", @"...", $"...", $@"..." e
+  raw strings com três ou mais aspas), literais de char e diretivas (#if, #region)
+- As regras só enxergam código: o conteúdo de strings e comentários é mascarado
+  com espaços (mesmos offsets do arquivo original); os trechos {expr} de strings
+  interpoladas continuam sendo código
+- Todas as regras registradas compartilham uma única expressão regular combinada,
+  percorrida uma vez por arquivo: custo linear no tamanho do arquivo
+- Cada regra devolve edições como faixas de offset (Edit), aplicadas de uma vez
+  no fim
+
+Uso:
+    engine = RewriteEngine([DateTimeNowRule(), ConsoleWriteLineRule()])
+    new_source, counts = engine.rewrite(source)
+"""
+
+import re
+from collections import Counter, defaultdict, namedtuple
+
+# Substitui source[start:end] por text (start == end: inserção)
+Edit = namedtuple("Edit", ["start", "end", "text"])
+
+# Início de cada trecho que não é código
+_TOKEN_START = re.compile(r'''
+    (?P<line_comment>//)
+  | (?P<block_comment>/\*)
+  | (?P<raw_string>\$*"{3,})
+  | (?P<string>\$@"|@\$"|\$"|@")
+  | (?P<plain_string>")
+  | (?P<char>')
+  | (?P<directive>^[ \t]*\#)
+''', re.M | re.X)
+# Dentro de {expr} de string interpolada: também acompanha as chaves
+_HOLE_TOKEN_START = re.compile(_TOKEN_START.pattern + r'|(?P<open>\{)|(?P<close>\})', re.M | re.X)
+
+_LINE_END = re.compile(r'[^\n]*')
+_BLOCK_COMMENT = re.compile(r'/\*.*?(?:\*/|\Z)', re.S)
+_PLAIN_STRING = re.compile(r'"(?:[^"\\\n]|\\.)*"?')
+_VERBATIM_STRING = re.compile(r'@"(?:[^"]|"")*"?')
+_CHAR = re.compile(r"'(?:[^'\\\n]|\\.)*'?")
+_INTERPOLATED_TEXT = re.compile(r'(?:[^"\\{}\n]|\\.|\{\{|\}\})*')
+_INTERPOLATED_VERBATIM_TEXT = re.compile(r'(?:[^"{}]|""|\{\{|\}\})*')
+_PARENS = re.compile(r'[()]')
+
+
+def _scan_code(source, pos, spans, in_hole=False):
+    """
+    Percorre código a partir de pos, acrescentando em spans os trechos que não são
+    código. Em um {expr} de string interpolada (in_hole), para na '}' que fecha o
+    trecho e retorna a posição dela; senão retorna len(source).
+    """
+    pattern = _HOLE_TOKEN_START if in_hole else _TOKEN_START
+    depth = 0
+    while True:
+        m = pattern.search(source, pos)
+        if m is None:
+            return len(source)
+        kind, start = m.lastgroup, m.start()
+        if kind == 'open':
+            depth += 1
+            pos = m.end()
+        elif kind == 'close':
+            if depth == 0:
+                return start
+            depth -= 1
+            pos = m.end()
+        elif kind == 'line_comment':
+            end = _LINE_END.match(source, start).end()
+            spans.append(('comment', start, end))
+            pos = end
+        elif kind == 'block_comment':
+            end = _BLOCK_COMMENT.match(source, start).end()
+            spans.append(('comment', start, end))
+            pos = end
+        elif kind == 'directive':
+            end = _LINE_END.match(source, start).end()
+            spans.append(('directive', start, end))
+            pos = end
+        elif kind == 'char':
+            end = _CHAR.match(source, start).end()
+            spans.append(('char', start, end))
+            pos = end
+        elif kind == 'plain_string':
+            end = _PLAIN_STRING.match(source, start).end()
+            spans.append(('string', start, end))
+            pos = end
+        elif kind == 'raw_string':
+            # """...""" (C# 11): termina na mesma quantidade de aspas; {expr} de
+            # raw strings interpoladas ficam mascarados junto com o texto
+            quotes = m.group().lstrip('$')
+            close = source.find(quotes, m.end())
+            end = len(source) if close < 0 else close + len(quotes)
+            spans.append(('string', start, end))
+            pos = end
+        else:
+            prefix = m.group()
+            if '$' not in prefix:
+                end = _VERBATIM_STRING.match(source, start + prefix.index('@')).end()
+                spans.append(('string', start, end))
+                pos = end
+            else:
+                pos = _scan_interpolated(source, start, m.end(), '@' in prefix, spans)
+
+
+def _scan_interpolated(source, start, pos, verbatim, spans):
+    """String interpolada: o texto é mascarado, cada {expr} é lido como código"""
+    text = _INTERPOLATED_VERBATIM_TEXT if verbatim else _INTERPOLATED_TEXT
+    while True:
+        pos = text.match(source, pos).end()
+        if pos >= len(source):
+            spans.append(('string', start, pos))
+            return pos
+        ch = source[pos]
+        if ch == '"':
+            spans.append(('string', start, pos + 1))
+            return pos + 1
+        if ch == '{':
+            spans.append(('string', start, pos + 1))
+            close = _scan_code(source, pos + 1, spans, in_hole=True)
+            start = close
+            pos = close + 1
+        elif ch == '}':
+            # '}' isolada (string malformada): texto
+            pos += 1
+        else:
+            # Quebra de linha em string interpolada comum: não terminada
+            spans.append(('string', start, pos))
+            return pos
+
+
+def non_code_spans(source):
+    """Trechos (tipo, início, fim) que não são código: comment, string, char, directive"""
+    spans = []
+    _scan_code(source, 0, spans)
+    return spans
+
+
+def code_view(source, spans=None):
+    """
+    Cópia do código com strings, comentários e diretivas trocados por espaços
+    (quebras de linha preservadas): mesmos offsets do original
+    """
+    spans = non_code_spans(source) if spans is None else spans
+    parts = []
+    pos = 0
+    for _, start, end in spans:
+        parts.append(source[pos:start])
+        parts.append(re.sub(r'[^\r\n]', ' ', source[start:end]))
+        pos = end
+    parts.append(source[pos:])
+    return ''.join(parts)
+
+
+def matching_paren(code, open_pos):
+    """Posição do ')' que fecha o '(' em open_pos na code_view (-1 se não fechar)"""
+    depth = 0
+    for m in _PARENS.finditer(code, open_pos):
+        depth += 1 if m.group() == '(' else -1
+        if depth == 0:
+            return m.start()
+    return -1
+
+
+def newline_of(source):
+    """Quebra de linha usada no arquivo (mantém CRLF nas inserções)"""
+    return '\r\n' if '\r\n' in source else '\n'
+
+
+def line_bounds(code, pos):
+    """(início da linha, fim do conteúdo da linha sem \\r\\n) da posição pos"""
+    start = code.rfind('\n', 0, pos) + 1
+    end = code.find('\n', pos)
+    end = len(code) if end < 0 else end
+    if end > start and code[end - 1] == '\r':
+        end -= 1
+    return start, end
+
+
+class Rule:
+    """
+    Regra de reescrita. `heads` mapeia nome → regex do início de cada construção
+    que a regra observa (sem grupos de captura nomeados; heads com o mesmo nome
+    são compartilhados entre regras). Para cada ocorrência no código, o motor chama
+    on_match; finish é chamado no fim do arquivo. Ambos retornam listas de Edit.
+    """
+
+    name = None
+    stat = None
+    heads = {}
+
+    def begin(self, source, code):
+        """Reinicia o estado da regra para um novo arquivo"""
+        self.count = 0
+
+    def on_match(self, head, match, source, code):
+        return []
+
+    def finish(self, source, code):
+        return []
+
+
+class DateTimeNowRule(Rule):
+    """DateTime.Now → DateTime.UtcNow"""
+
+    name = "datetime"
+    stat = "datetime_fixed"
+    heads = {"datetime_now": r"\bDateTime\.Now\b"}
+
+    def on_match(self, head, match, source, code):
+        self.count += 1
+        return [Edit(match.start(), match.end(), "DateTime.UtcNow")]
+
+
+class ConsoleWriteLineRule(Rule):
+    """
+    Envolve em #if DEBUG as instruções Console.WriteLine(...); que ocupam linhas
+    inteiras, inclusive chamadas com ')' nos argumentos ou em várias linhas
+    """
+
+    name = "console"
+    stat = "console_fixed"
+    heads = {"console_writeline": r"\bConsole\.WriteLine\b"}
+
+    _OPEN = re.compile(r'\s*\(')
+    _SEMICOLON = re.compile(r'\s*;')
+
+    def on_match(self, head, match, source, code):
+        line_start, _ = line_bounds(code, match.start())
+        if code[line_start:match.start()].strip():
+            return []  # Não é o início da linha (p.ex. dentro de um if sem chaves)
+
+        open_match = self._OPEN.match(code, match.end())
+        if not open_match:
+            return []
+        close = matching_paren(code, open_match.end() - 1)
+        if close < 0:
+            return []
+        semicolon = self._SEMICOLON.match(code, close + 1)
+        if not semicolon:
+            return []
+        _, line_end = line_bounds(code, semicolon.end())
+        if code[semicolon.end():line_end].strip():
+            return []  # Mais código depois do ';' na mesma linha
+
+        # Já envolvido em uma execução anterior
+        previous_end = line_start - 1
+        if previous_end > 0:
+            previous_start, previous_end = line_bounds(source, previous_end)
+            if source[previous_start:previous_end].strip() == "#if DEBUG":
+                return []
+
+        indent = source[line_start:match.start()]
+        newline = newline_of(source)
+        self.count += 1
+        return [
+            Edit(line_start, line_start, f"{indent}#if DEBUG{newline}"),
+            Edit(line_end, line_end, f"{newline}{indent}#endif"),
+        ]
+
+
+class LoggerRule(Rule):
+    """
+    Injeta ILogger<Controller> em controllers com Console.WriteLine e sem logger:
+    using Microsoft.Extensions.Logging, campo _logger depois do primeiro campo
+    private readonly, parâmetro e atribuição no construtor
+    """
+
+    name = "logger"
+    stat = "logger_added"
+    heads = {
+        "console_writeline": r"\bConsole\.WriteLine\b",
+        "logger_ref": r"\b(?:_logger|ILogger)\b",
+        "using": r"^[ \t]*using\b",
+        "namespace": r"\bnamespace\b",
+        "public": r"\bpublic\b",
+        "private_readonly": r"\bprivate\s+readonly\b",
+    }
+
+    _USING = re.compile(r'[ \t]*using\s+(?:static\s+)?([\w.]+)(?:\s*=\s*[\w.<>, ]+)?\s*;')
+    _CLASS = re.compile(r'public\s+(?:(?:sealed|abstract|partial|static)\s+)*class\s+(\w+)')
+    _CONSTRUCTOR = re.compile(r'public\s+(\w+)\s*\(')
+    _FIELD = re.compile(r'private\s+readonly\s+\w+\s+\w+\s*;')
+    _BODY = re.compile(r'\s*\{')
+    _LOGGING_NAMESPACE = "Microsoft.Extensions.Logging"
+
+    def begin(self, source, code):
+        super().begin(source, code)
+        self.has_console = False
+        self.has_logger = False
+        self.has_logging_using = False
+        self.in_namespace = False
+        self.last_using_end = None
+        self.class_name = None
+        self.field_end = None
+        self.constructor = None
+
+    def on_match(self, head, match, source, code):
+        pos = match.start()
+        if head == "console_writeline":
+            self.has_console = True
+        elif head == "logger_ref":
+            self.has_logger = True
+        elif head == "namespace":
+            self.in_namespace = True
+        elif head == "using" and not self.in_namespace and self.class_name is None:
+            using = self._USING.match(code, pos)
+            if using:
+                self.last_using_end = using.end()
+                self.has_logging_using |= using.group(1) == self._LOGGING_NAMESPACE
+        elif head == "private_readonly" and self.field_end is None:
+            field = self._FIELD.match(code, pos)
+            if field:
+                self.field_end = field.end()
+        elif head == "public":
+            if self.class_name is None:
+                declaration = self._CLASS.match(code, pos)
+                if declaration:
+                    self.class_name = declaration.group(1)
+            elif self.constructor is None:
+                constructor = self._CONSTRUCTOR.match(code, pos)
+                if constructor and constructor.group(1) == self.class_name:
+                    self.constructor = constructor.end() - 1
+        return []
+
+    def finish(self, source, code):
+        if not self.has_console or self.has_logger:
+            return []
+        if self.class_name is None or "Controller" not in code or self.field_end is None:
+            return []
+
+        newline = newline_of(source)
+        logger_type = f"ILogger<{self.class_name}>"
+        edits = []
+        if not self.has_logging_using and self.last_using_end is not None:
+            edits.append(Edit(self.last_using_end, self.last_using_end,
+                              f"{newline}using {self._LOGGING_NAMESPACE};"))
+        edits.append(Edit(self.field_end, self.field_end,
+                          f"{newline}        private readonly {logger_type} _logger;"))
+
+        if self.constructor is not None:
+            close = matching_paren(code, self.constructor)
+            if close >= 0:
+                separator = ", " if code[self.constructor + 1:close].strip() else ""
+                edits.append(Edit(close, close, f"{separator}{logger_type} logger"))
+                body = self._BODY.match(code, close + 1)
+                if body:
+                    edits.append(Edit(body.end(), body.end(), f"{newline}            _logger = logger;"))
+
+        self.count += 1
+        return edits
+
+
+RULES = {rule.name: rule for rule in (DateTimeNowRule, ConsoleWriteLineRule, LoggerRule)}
+
+
+def apply_edits(source, edits):
+    """
+    Aplica as edições em uma única montagem do texto. Edições sobrepostas a uma
+    anterior são descartadas; inserções na mesma posição mantêm a ordem.
+    """
+    parts = []
+    pos = 0
+    for edit in sorted(edits, key=lambda edit: edit.start):
+        if edit.start < pos:
+            continue
+        parts.append(source[pos:edit.start])
+        parts.append(edit.text)
+        pos = edit.end
+    parts.append(source[pos:])
+    return ''.join(parts)
+
+
+class RewriteEngine:
+    """Aplica um conjunto de regras em uma única passada sobre o código de cada arquivo"""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        heads = {}
+        self.listeners = defaultdict(list)
+        for rule in self.rules:
+            for head, pattern in rule.heads.items():
+                if heads.setdefault(head, pattern) != pattern:
+                    raise ValueError(f"Head '{head}' definido com padrões diferentes")
+                self.listeners[head].append(rule)
+        self.pattern = re.compile(
+            '|'.join(f'(?P<{head}>{pattern})' for head, pattern in heads.items()), re.M
+        ) if heads else None
+
+    def edits(self, source):
+        """Edições de todas as regras (offsets em source) e a contagem por contador"""
+        code = code_view(source)
+        edits = []
+        for rule in self.rules:
+            rule.begin(source, code)
+        if self.pattern is not None:
+            for match in self.pattern.finditer(code):
+                head = match.lastgroup
+                for rule in self.listeners[head]:
+                    edits.extend(rule.on_match(head, match, source, code))
+        for rule in self.rules:
+            edits.extend(rule.finish(source, code))
+
+        counts = Counter()
+        for rule in self.rules:
+            if rule.count:
+                counts[rule.stat] += rule.count
+        return edits, counts
+
+    def rewrite(self, source):
+        """(novo conteúdo, contagem por contador)"""
+        edits, counts = self.edits(source)
+        return apply_edits(source, edits), counts
@@ -0,0 +1,165 @@
+"""
+Cadastro de filiais compilado a partir de uma exportação da tabela Filiais
+- Arquivo CSV ou JSON com as colunas de Models/Filial.cs (Id, Nome, DataInclusao,
+  UsuarioImportacao), p.ex. o resultado de
+      SELECT Id, Nome, DataInclusao, UsuarioImportacao FROM Filiais FOR JSON PATH
+- Consultas O(1) por Id, pelo nome completo e pela cidade ('Manaus - AM' → Manaus)
+- Cidades da planilha sem filial cadastrada interrompem a geração do SQL, em vez
+  de caírem em uma filial padrão
+"""
+
+import json
+from collections import namedtuple
+from pathlib import Path
+
+import pandas as pd
+
+from mapeamento_filiais import MapeadorFiliais, normalizar_texto
+
+ARQUIVO_FILIAIS = Path(__file__).parent / "filiais.json"
+COLUNAS_FILIAL = ['Id', 'Nome', 'DataInclusao', 'UsuarioImportacao']
+SEPARADOR_CIDADE = ' - '
+
+Filial = namedtuple('Filial', ['id', 'nome', 'data_inclusao', 'usuario_importacao'])
+
+
+class FilialNaoCadastradaError(ValueError):
+    """Valores da coluna F que não correspondem a nenhuma filial do cadastro"""
+
+    def __init__(self, valores):
+        self.valores = sorted(valores)
+        super().__init__(
+            f"{len(self.valores)} filial(is) da planilha sem cadastro em Filiais: {self.valores}"
+        )
+
+
+def cidade_da_filial(nome):
+    """'Rio de Janeiro - RJ' → 'Rio de Janeiro' (o nome inteiro se não houver ' - ')"""
+    return nome.split(SEPARADOR_CIDADE, 1)[0].strip()
+
+
+class RegistroFiliais:
+    """Filiais cadastradas, indexadas por Id, nome e cidade"""
+
+    def __init__(self, filiais):
+        self.filiais = sorted(filiais, key=lambda filial: filial.id)
+        self.por_id = {}
+        for filial in self.filiais:
+            if filial.id in self.por_id:
+                raise ValueError(f"Id de filial repetido na exportação: {filial.id}")
+            self.por_id[filial.id] = filial
+
+        nomes = normalizar_texto(pd.Series([f.nome for f in self.filiais], dtype=object))
+        cidades = normalizar_texto(pd.Series([cidade_da_filial(f.nome) for f in self.filiais], dtype=object))
+        self.por_nome = dict(zip(nomes, self.filiais))
+
+        # Cidade com mais de uma filial só é resolvida pelo nome completo
+        repetidas = cidades[cidades.duplicated(keep=False)]
+        self.cidades_ambiguas = set(repetidas)
+        self.por_cidade = {
+            cidade: filial for cidade, filial in zip(cidades, self.filiais)
+            if cidade not in self.cidades_ambiguas
+        }
+
+    @classmethod
+    def carregar(cls, caminho=ARQUIVO_FILIAIS):
+        """Lê a exportação da tabela Filiais (.json ou .csv)"""
+        caminho = Path(caminho)
+        if caminho.suffix.lower() == '.json':
+            with open(caminho, 'r', encoding='utf-8-sig') as f:
+                dados = json.load(f)
+            if isinstance(dados, dict):
+                # {"Filiais": [...]} ou resposta da API com a lista em uma chave
+                dados = next((v for v in dados.values() if isinstance(v, list)), [])
+            tabela = pd.DataFrame(dados)
+        else:
+            # Separador detectado (',' ou ';', como exporta o SSMS/Excel em pt-BR)
+            tabela = pd.read_csv(caminho, sep=None, engine='python', dtype=object, encoding='utf-8-sig')
+        return cls.de_tabela(tabela)
+
+    @classmethod
+    def de_tabela(cls, tabela):
+        """Monta o registro a partir de um DataFrame com as colunas de Filial"""
+        # Aceita Id/Nome (SQL) e id/nome (JSON da API) sem diferenciar maiúsculas
+        renomear = {}
+        for coluna in tabela.columns:
+            for esperada in COLUNAS_FILIAL:
+                if str(coluna).strip().lower() == esperada.lower():
+                    renomear[coluna] = esperada
+        tabela = tabela.rename(columns=renomear)
+
+        faltando = [coluna for coluna in ('Id', 'Nome') if coluna not in tabela.columns]
+        if faltando:
+            raise ValueError(f"Exportação de Filiais sem as colunas: {faltando}")
+        for coluna in ('DataInclusao', 'UsuarioImportacao'):
+            if coluna not in tabela.columns:
+                tabela[coluna] = None
+
+        tabela = tabela.dropna(subset=['Id', 'Nome'])
+        tabela = tabela.astype({'Id': 'int64'})
+        tabela = tabela.astype(object).where(tabela.notna(), None)
+        return cls(
+            Filial(int(id_), str(nome).strip(), data, usuario)
+            for id_, nome, data, usuario in tabela[COLUNAS_FILIAL].itertuples(index=False, name=None)
+        )
+
+    def __len__(self):
+        return len(self.filiais)
+
+    def filial(self, filial_id):
+        """Filial pelo Id (KeyError se não existir)"""
+        return self.por_id[int(filial_id)]
+
+    def buscar(self, valor):
+        """Filial pelo nome completo ou pela cidade (None se não cadastrada ou ambígua)"""
+        if valor is None or pd.isna(valor):
+            return None
+        chave = normalizar_texto(pd.Series([valor], dtype=object)).iloc[0]
+        return self.por_nome.get(chave) or self.por_cidade.get(chave)
+
+    def mapeamento(self, campo='Id'):
+        """
+        Mapeamento valor da planilha → Id (campo='Id') ou Nome (campo='Nome') no
+        formato de MAPEAMENTO_FILIAIS: nomes completos primeiro, depois as cidades
+        com uma única filial
+        """
+        valor = (lambda filial: filial.id) if campo == 'Id' else (lambda filial: filial.nome)
+        mapeamento = {filial.nome.lower(): valor(filial) for filial in self.filiais}
+        for filial in self.por_cidade.values():
+            mapeamento.setdefault(cidade_da_filial(filial.nome).lower(), valor(filial))
+        return mapeamento
+
+    def nao_cadastradas(self, valores):
+        """Valores da coluna F (strip + lower) que não resolvem para nenhuma filial"""
+        _, _, nao_mapeadas = self.mapeador().mapear(pd.Series(list(valores), dtype=object))
+        return nao_mapeadas
+
+    def mapeador(self, coluna='FilialId'):
+        """
+        MapeadorFiliais sem filial padrão para Clientes.FilialId ou Clientes.Filial.
+        Sem correspondência aproximada: com o cadastro, um valor desconhecido é
+        reportado (exigir_cadastro) em vez de adivinhado.
+        """
+        return MapeadorFiliais(self.mapeamento('Id' if coluna == 'FilialId' else 'Nome'), filial_padrao=None,
+                               limiar_similaridade=None)
+
+
+def exigir_cadastro(filiais_nao_mapeadas):
+    """Interrompe a geração se alguma filial da planilha não estiver cadastrada"""
+    if filiais_nao_mapeadas:
+        raise FilialNaoCadastradaError(filiais_nao_mapeadas)
+
+
+def carregar_registro(caminho=None):
+    """
+    Registro da exportação indicada; sem caminho, usa ARQUIVO_FILIAIS se existir.
+    None quando não há exportação (os scripts voltam ao mapeamento fixo).
+    """
+    if caminho is None:
+        if not ARQUIVO_FILIAIS.exists():
+            print(f"⚠️  Exportação da tabela Filiais não encontrada ({ARQUIVO_FILIAIS.name}) - usando o mapeamento fixo")
+            return None
+        caminho = ARQUIVO_FILIAIS
+    registro = RegistroFiliais.carregar(caminho)
+    print(f"🏢 Cadastro de filiais carregado de '{caminho}': {len(registro)} filiais")
+    return registro
@@ -0,0 +1,914 @@
+#!/usr/bin/env python3
+"""
+Simulação local (SQLite) dos scripts de filiais gerados (atualizar_filiais_*.sql)
+- Esquema substituto de Clientes, PessoasFisicas, PessoasJuridicas e Filiais com
+  os índices da produção (adicionar_indices_performance.sql), populado com os
+  clientes da planilha (ou sintéticos) e clientes que só existem no banco
+- Tradução do T-SQL usado pelos geradores: UPDATE alias ... FROM ... JOIN,
+  UPDATE TOP (n), GETDATE(), ISNULL, N'...', tabelas #temporárias,
+  OBJECT_ID('tempdb..#t'), blocos GO e os laços DECLARE/WHILE/SET/BREAK dos lotes
+- Por comando: linhas afetadas, execuções (laços) e tempo; no fim, os clientes
+  alterados por filial e o resultado dos SELECTs de conferência
+- Alertas de custo: varreduras completas de tabelas do banco no plano do SQLite
+  (EXPLAIN QUERY PLAN) e predicados que impedem o uso de índice (LIKE '%...',
+  função sobre a coluna)
+- Vários scripts rodam sobre cópias do mesmo banco, para comparar estratégias
+
+O SQLite não é o SQL Server: os tempos servem para comparar scripts entre si, não
+para prever a duração na janela de manutenção.
+
+Uso:
+    python simulacao_sql.py saida/atualizar_filiais_planilha.sql --planilha planilha.xlsx
+    python simulacao_sql.py lote_id.sql lote_top.sql --linhas 100000 --semente 42 --json simulacao.json
+    python simulacao_sql.py --planilha planilha.xlsx --salvar-banco banco.db   # para aplicacao_filiais
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from documentos import normalizar_documentos
+from leitura_planilha import ler_planilha
+from mapeamento_filiais import FILIAL_PADRAO_ID, MAPEAMENTO_IDS
+from planilha_sintetica import gerar_clientes
+from registro_filiais import carregar_registro
+from sql_filiais import formatar_documentos
+
+LINHAS_PADRAO = 10_000
+PROPORCAO_CADASTRADOS = 0.95  # clientes da planilha que existem no banco
+PROPORCAO_INATIVOS = 0.03
+PROPORCAO_DOCUMENTO_SEM_MASCARA = 0.2  # Cpf/Cnpj gravados só com dígitos
+PROPORCAO_SEM_FILIAL = 0.4
+LIMITE_ITERACOES = 1_000_000
+LIMITE_LINHAS_RESULTADO = 50
+LINHAS_MINIMAS_VARREDURA = 1_000  # varreduras de tabelas menores não são alertadas
+
+# Esquema substituto: só as colunas usadas pelos scripts e os índices da produção
+ESQUEMA = """
+CREATE TABLE Filiais (
+    Id INTEGER PRIMARY KEY,
+    Nome NVARCHAR(100) NOT NULL,
+    DataInclusao DATETIME,
+    UsuarioImportacao NVARCHAR(100)
+);
+CREATE TABLE PessoasFisicas (
+    Id INTEGER PRIMARY KEY,
+    Nome NVARCHAR(200) NOT NULL,
+    Cpf VARCHAR(14) NOT NULL,
+    DataAtualizacao DATETIME
+);
+CREATE TABLE PessoasJuridicas (
+    Id INTEGER PRIMARY KEY,
+    RazaoSocial NVARCHAR(200) NOT NULL,
+    Cnpj VARCHAR(18) NOT NULL,
+    DataAtualizacao DATETIME
+);
+CREATE TABLE Clientes (
+    Id INTEGER PRIMARY KEY,
+    TipoPessoa NVARCHAR(10) NOT NULL,
+    PessoaFisicaId INT REFERENCES PessoasFisicas (Id),
+    PessoaJuridicaId INT REFERENCES PessoasJuridicas (Id),
+    FilialId INT REFERENCES Filiais (Id),
+    Filial NVARCHAR(100),
+    DataAtualizacao DATETIME,
+    Ativo BIT NOT NULL DEFAULT 1
+);
+CREATE INDEX IX_PessoasFisicas_Cpf ON PessoasFisicas (Cpf);
+CREATE INDEX IX_PessoasFisicas_Nome ON PessoasFisicas (Nome);
+CREATE INDEX IX_PessoaJuridica_Cnpj ON PessoasJuridicas (Cnpj);
+CREATE INDEX IX_PessoaJuridica_RazaoSocial ON PessoasJuridicas (RazaoSocial);
+CREATE INDEX IX_Clientes_Ativo_TipoPessoa ON Clientes (Ativo, TipoPessoa);
+CREATE INDEX IX_Clientes_PessoaFisicaId ON Clientes (PessoaFisicaId);
+CREATE INDEX IX_Clientes_PessoaJuridicaId ON Clientes (PessoaJuridicaId);
+"""
+
+Instrucao = namedtuple('Instrucao', ['tokens', 'rotulo'])
+Laco = namedtuple('Laco', ['condicao', 'corpo'])
+Condicional = namedtuple('Condicional', ['condicao', 'corpo', 'senao'])
+Interromper = namedtuple('Interromper', [])
+Token = namedtuple('Token', ['tipo', 'texto'])
+
+_TOKEN = re.compile(r"""
+    (?P<comentario>--[^\n]*|/\*.*?\*/)
+  | (?P<texto>[Nn]?'(?:[^']|'')*')
+  | (?P<colchete>\[[^\]]*\])
+  | (?P<identificador>"[^"]*")
+  | (?P<palavra>@@\w+|[@#]*\w+)
+  | (?P<espaco>\s+)
+  | (?P<outro>.)
+""", re.VERBOSE | re.DOTALL)
+
+# Palavras que começam uma instrução: terminam a condição de um IF/WHILE
+INICIO_INSTRUCAO = {
+    'BEGIN', 'BREAK', 'CONTINUE', 'DROP', 'UPDATE', 'INSERT', 'DELETE', 'SELECT', 'PRINT',
+    'SET', 'CREATE', 'ALTER', 'RETURN', 'DECLARE', 'TRUNCATE', 'WHILE', 'IF',
+}
+FUNCOES_EQUIVALENTES = {'ISNULL': 'IFNULL', 'LEN': 'LENGTH', 'GETDATE': 'CURRENT_TIMESTAMP',
+                        'SYSDATETIME': 'CURRENT_TIMESTAMP'}
+SEM_PARENTESES = {'CURRENT_TIMESTAMP'}
+TIPOS_JUNCAO = {'INNER', 'LEFT', 'RIGHT', 'FULL', 'CROSS', 'OUTER'}
+
+LIKE_CURINGA_INICIAL = re.compile(r"(\S+)\s+LIKE\s+(N?'%[^']*')", re.IGNORECASE)
+FUNCAO_SOBRE_COLUNA = re.compile(
+    r"\b((?:LOWER|UPPER|LTRIM|RTRIM|TRIM|REPLACE|SUBSTRING|LEFT|RIGHT|CAST|CONVERT|ISNULL|COALESCE)"
+    r"\s*\(\s*[A-Za-z_]\w*(?:\.\w+)?)", re.IGNORECASE
+)
+APELIDOS = re.compile(
+    r"\b(?:UPDATE|FROM|JOIN)\s+(\"[^\"]+\"|\w+)(?:\s+AS)?\s+"
+    r"(?!(?:ON|WHERE|SET|INNER|LEFT|RIGHT|JOIN|GROUP|ORDER)\b)(\w+)",
+    re.IGNORECASE,
+)
+
+
+class ComandoNaoSuportadoError(ValueError):
+    """Trecho do script fora do subconjunto de T-SQL que a simulação traduz"""
+
+
+def _palavra(token):
+    return token.texto.upper() if token.tipo == 'palavra' else None
+
+
+def _texto(tokens):
+    return "".join(t.texto for t in tokens).strip()
+
+
+def tokenizar(texto):
+    return [Token(m.lastgroup, m.group()) for m in _TOKEN.finditer(texto)]
+
+
+def dividir_lotes(script):
+    """Blocos do script separados por linhas 'GO'"""
+    return [lote for lote in re.split(r"^\s*GO\s*;?\s*$", script, flags=re.IGNORECASE | re.MULTILINE)
+            if lote.strip()]
+
+
+class _Analisador:
+    """Instruções de um bloco: simples, BEGIN...END, WHILE, IF/ELSE e BREAK"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.posicao = 0
+        self.rotulo = None
+
+    def _pular(self):
+        """Avança espaços, comentários e ';' (o último comentário vira o rótulo)"""
+        while self.posicao < len(self.tokens):
+            token = self.tokens[self.posicao]
+            if token.tipo == 'comentario' and token.texto.startswith('--'):
+                self.rotulo = token.texto[2:].strip() or self.rotulo
+            elif token.tipo not in ('espaco', 'comentario') and token.texto != ';':
+                return token
+            self.posicao += 1
+        return None
+
+    def instrucoes(self, ate_end=False):
+        lista = []
+        while True:
+            token = self._pular()
+            if token is None:
+                if ate_end:
+                    raise ComandoNaoSuportadoError("BEGIN sem END correspondente")
+                return lista
+            if _palavra(token) == 'END':
+                if not ate_end:
+                    raise ComandoNaoSuportadoError("END sem BEGIN correspondente")
+                self.posicao += 1
+                return lista
+            lista.append(self.instrucao())
+
+    def instrucao(self):
+        token = self._pular()
+        palavra = _palavra(token)
+        proxima = self._proxima_palavra()
+        if palavra == 'BEGIN' and proxima not in ('TRAN', 'TRANSACTION'):
+            self.posicao += 1
+            return self.instrucoes(ate_end=True)
+        if palavra == 'WHILE':
+            self.posicao += 1
+            return Laco(self._condicao(), self.instrucao())
+        if palavra == 'IF':
+            self.posicao += 1
+            condicao, corpo = self._condicao(), self.instrucao()
+            senao = None
+            if _palavra(self._pular() or Token('espaco', '')) == 'ELSE':
+                self.posicao += 1
+                senao = self.instrucao()
+            return Condicional(condicao, corpo, senao)
+        if palavra == 'BREAK':
+            self.posicao += 1
+            return Interromper()
+        rotulo, self.rotulo = self.rotulo, None
+        return Instrucao(self._ate_fim_instrucao(), rotulo)
+
+    def _proxima_palavra(self):
+        for token in self.tokens[self.posicao + 1:]:
+            if token.tipo not in ('espaco', 'comentario'):
+                return _palavra(token)
+        return None
+
+    def _condicao(self):
+        """Tokens até a primeira palavra de início de instrução fora de parênteses"""
+        inicio, profundidade = self.posicao, 0
+        while self.posicao < len(self.tokens):
+            token = self.tokens[self.posicao]
+            if token.texto == '(':
+                profundidade += 1
+            elif token.texto == ')':
+                profundidade -= 1
+            elif profundidade == 0 and _palavra(token) in INICIO_INSTRUCAO:
+                return self.tokens[inicio:self.posicao]
+            self.posicao += 1
+        raise ComandoNaoSuportadoError("IF/WHILE sem instrução")
+
+    def _ate_fim_instrucao(self):
+        """
+        Tokens até ';', END do bloco (os END de CASE não contam) ou o início da
+        próxima instrução (o ';' é opcional no T-SQL)
+        """
+        inicio, profundidade, casos = self.posicao, 0, 0
+        primeira = _palavra(self.tokens[inicio])
+        while self.posicao < len(self.tokens):
+            token = self.tokens[self.posicao]
+            palavra = _palavra(token)
+            if self.posicao > inicio and profundidade == 0 and self._inicia_instrucao(primeira, palavra):
+                break
+            if token.texto == '(':
+                profundidade += 1
+            elif token.texto == ')':
+                profundidade -= 1
+            elif palavra == 'CASE':
+                casos += 1
+            elif palavra == 'END':
+                if casos == 0 and profundidade == 0:
+                    break
+                casos -= 1
+            elif token.texto == ';' and profundidade == 0:
+                fim = self.posicao
+                self.posicao += 1
+                return self.tokens[inicio:fim]
+            self.posicao += 1
+        return self.tokens[inicio:self.posicao]
+
+
+    def _inicia_instrucao(self, primeira, palavra):
+        """`palavra` começa outra instrução dentro da instrução iniciada por `primeira`?"""
+        if palavra not in INICIO_INSTRUCAO:
+            return False
+        if palavra == 'SET':  # UPDATE ... SET
+            return primeira != 'UPDATE'
+        if palavra == 'SELECT':  # INSERT ... SELECT, SELECT ... UNION SELECT
+            return primeira != 'INSERT' and self._palavra_anterior() not in ('UNION', 'ALL', 'EXCEPT', 'INTERSECT')
+        return True
+
+    def _palavra_anterior(self):
+        for token in reversed(self.tokens[:self.posicao]):
+            if token.tipo not in ('espaco', 'comentario'):
+                return _palavra(token)
+        return None
+
+
+def analisar_script(script):
+    """Script T-SQL → lista de blocos (GO), cada um uma lista de instruções"""
+    return [_Analisador(tokenizar(lote)).instrucoes() for lote in dividir_lotes(script)]
+
+
+def _posicoes_nivel_zero(tokens, palavras):
+    """Índices dos tokens com as `palavras` fora de parênteses"""
+    posicoes, profundidade = [], 0
+    for i, token in enumerate(tokens):
+        if token.texto == '(':
+            profundidade += 1
+        elif token.texto == ')':
+            profundidade -= 1
+        elif profundidade == 0 and _palavra(token) in palavras:
+            posicoes.append(i)
+    return posicoes
+
+
+def _dividir_virgulas(tokens):
+    """Itens separados por vírgula fora de parênteses e de CASE"""
+    itens, atual, profundidade, casos = [], [], 0, 0
+    for token in tokens:
+        palavra = _palavra(token)
+        if token.texto == '(':
+            profundidade += 1
+        elif token.texto == ')':
+            profundidade -= 1
+        elif palavra == 'CASE':
+            casos += 1
+        elif palavra == 'END' and casos:
+            casos -= 1
+        elif token.texto == ',' and profundidade == 0 and casos == 0:
+            itens.append(atual)
+            atual = []
+            continue
+        atual.append(token)
+    itens.append(atual)
+    return itens
+
+
+def _significativos(tokens):
+    return [t for t in tokens if t.tipo not in ('espaco', 'comentario')]
+
+
+def _itens_from(tokens):
+    """
+    Tabelas do FROM: [{'tipo', 'referencia', 'apelido', 'condicao'}], com o tipo
+    de JOIN (None na primeira) e a condição do ON como texto
+    """
+    itens = [{'tipo': None, 'tokens': []}]
+    prefixo, profundidade = [], 0
+    for token in tokens:
+        palavra = _palavra(token)
+        if profundidade == 0 and palavra in TIPOS_JUNCAO:
+            prefixo.append(palavra)
+            continue
+        if profundidade == 0 and palavra == 'JOIN':
+            tipo = " ".join(p for p in prefixo if p != 'OUTER') or 'INNER'
+            itens.append({'tipo': tipo, 'tokens': []})
+            prefixo = []
+            continue
+        if token.texto == '(':
+            profundidade += 1
+        elif token.texto == ')':
+            profundidade -= 1
+        itens[-1]['tokens'].append(token)
+
+    for item in itens:
+        item_tokens = item.pop('tokens')
+        on = _posicoes_nivel_zero(item_tokens, {'ON'})
+        referencia = item_tokens[:on[0]] if on else item_tokens
+        item['condicao'] = _texto(item_tokens[on[0] + 1:]) if on else None
+        posicoes = [k for k, t in enumerate(referencia) if t.tipo not in ('espaco', 'comentario')]
+        item['apelido'] = referencia[posicoes[-1]].texto
+        item['referencia'] = _texto(referencia)
+        # Nome da tabela sem o apelido (e sem o AS)
+        nome = [t for t in referencia[:posicoes[-1]]]
+        while nome and (nome[-1].tipo == 'espaco' or _palavra(nome[-1]) == 'AS'):
+            nome.pop()
+        item['tabela'] = _texto(nome) if len(posicoes) > 1 else item['apelido']
+    return itens
+
+
+def _traduzir_update(tokens):
+    """
+    UPDATE [TOP (n)] alias SET alias.col = ... FROM ... JOIN Tabela alias ON ... WHERE ...
+    → UPDATE Tabela AS alias SET col = ... FROM <demais tabelas> WHERE <ON do alvo> AND ...
+    (TOP n vira um filtro por rowid com LIMIT n sobre a mesma consulta)
+    """
+    sig = [k for k, t in enumerate(tokens) if t.tipo not in ('espaco', 'comentario')]
+    k = 1
+    limite = None
+    if _palavra(tokens[sig[k]]) == 'TOP':
+        fim = next(n for n in range(k, len(sig)) if tokens[sig[n]].texto == ')')
+        limite = _texto(tokens[sig[k + 2]:sig[fim]])
+        k = fim + 1
+    alvo = tokens[sig[k]].texto
+    corpo = tokens[sig[k] + 1:]
+
+    posicoes_from = _posicoes_nivel_zero(corpo, {'FROM'})
+    if not posicoes_from:
+        if limite is not None:
+            raise ComandoNaoSuportadoError("UPDATE TOP sem FROM")
+        return _texto(tokens)
+    posicao_set = _posicoes_nivel_zero(corpo, {'SET'})[0]
+    posicao_from = posicoes_from[0]
+    posicoes_where = [p for p in _posicoes_nivel_zero(corpo, {'WHERE'}) if p > posicao_from]
+    posicao_where = posicoes_where[0] if posicoes_where else len(corpo)
+    origem = corpo[posicao_from + 1:posicao_where]
+    filtro = _texto(corpo[posicao_where + 1:]) if posicoes_where else None
+
+    # SET alias.col = ... → SET col = ... (o SQLite não aceita o apelido à esquerda)
+    atribuicoes = []
+    for item in _dividir_virgulas(corpo[posicao_set + 1:posicao_from]):
+        significativos = [n for n, t in enumerate(item) if t.tipo not in ('espaco', 'comentario')]
+        if (len(significativos) > 2 and item[significativos[0]].texto == alvo
+                and item[significativos[1]].texto == '.'):
+            item = item[significativos[2]:]
+        atribuicoes.append(_texto(item))
+
+    tabelas = _itens_from(origem)
+    indice_alvo = next((n for n, t in enumerate(tabelas) if t['apelido'] == alvo), None)
+    if indice_alvo is None:
+        raise ComandoNaoSuportadoError(f"UPDATE {alvo}: apelido não encontrado no FROM")
+    tabela_alvo = tabelas.pop(indice_alvo)
+    if tabela_alvo['tipo'] not in (None, 'INNER', 'CROSS'):
+        raise ComandoNaoSuportadoError(f"UPDATE {alvo}: só INNER JOIN na tabela atualizada")
+    condicoes = [tabela_alvo['condicao']] if tabela_alvo['condicao'] else []
+    if indice_alvo == 0 and tabelas:
+        # A próxima tabela passa a ser a primeira do FROM: o ON dela vai para o WHERE
+        if tabelas[0]['tipo'] not in ('INNER', 'CROSS'):
+            raise ComandoNaoSuportadoError(f"UPDATE {alvo}: JOIN externo logo após a tabela atualizada")
+        if tabelas[0]['condicao']:
+            condicoes.append(tabelas[0]['condicao'])
+    if filtro:
+        condicoes.append(filtro)
+    if limite is not None:
+        consulta = f"SELECT {alvo}.rowid FROM {_texto(origem)}" + (f" WHERE {filtro}" if filtro else "")
+        condicoes.append(f"{alvo}.rowid IN ({consulta} LIMIT {limite})")
+
+    sql = f"UPDATE {tabela_alvo['tabela']} AS {alvo}\nSET " + ",\n    ".join(atribuicoes)
+    for n, tabela in enumerate(tabelas):
+        if n == 0:
+            sql += f"\nFROM {tabela['referencia']}"
+        else:
+            sql += f"\n{tabela['tipo']} JOIN {tabela['referencia']} ON {tabela['condicao'] or '1 = 1'}"
+    if condicoes:
+        sql += "\nWHERE " + "\n  AND ".join(f"({condicao})" for condicao in condicoes)
+    return sql
+
+
+class Simulacao:
+    """
+    Executa um script T-SQL traduzido em uma conexão SQLite, medindo cada comando.
+    `medicoes`: por comando (INSERTs seguidos na mesma tabela somados), na ordem.
+    """
+
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.variaveis = {}
+        self.linhas_afetadas = 0  # @@ROWCOUNT
+        self.medicoes = {}
+        self.resultados = []
+        self.mensagens = []
+        self._estatisticas_pendentes = True
+        self._contagens = {}
+
+    # --- tradução de trechos -------------------------------------------------
+
+    def traduzir(self, tokens):
+        """Tokens T-SQL → texto SQLite (variáveis já substituídas pelos valores)"""
+        saida = []
+        sig = [t for t in tokens if t.tipo != 'comentario']
+        i = 0
+        while i < len(sig):
+            token = sig[i]
+            palavra = _palavra(token)
+            if token.tipo == 'texto':
+                saida.append(token.texto.lstrip('Nn'))
+            elif token.tipo == 'colchete':
+                saida.append('"' + token.texto[1:-1] + '"')
+            elif palavra == '@@ROWCOUNT':
+                saida.append(str(self.linhas_afetadas))
+            elif token.tipo == 'palavra' and token.texto.startswith('@'):
+                saida.append(_literal_sqlite(self.variaveis.get(token.texto.upper())))
+            elif token.tipo == 'palavra' and token.texto.startswith('#'):
+                saida.append(f'"{token.texto}"')
+            elif palavra == 'DBO' and i + 1 < len(sig) and sig[i + 1].texto == '.':
+                i += 1
+            elif palavra == 'OBJECT_ID':
+                fim = next(j for j in range(i, len(sig)) if sig[j].texto == ')')
+                nome = next(t.texto for t in sig[i:fim] if t.tipo == 'texto').lstrip('Nn').strip("'")
+                catalogo = 'sqlite_master'
+                if nome.lower().startswith('tempdb..'):
+                    nome, catalogo = nome[len('tempdb..'):], 'sqlite_temp_master'
+                nome = nome.split('.')[-1].strip('[]')
+                saida.append(f"(SELECT 1 FROM {catalogo} WHERE name = '{nome}')")
+                i = fim
+            elif palavra in FUNCOES_EQUIVALENTES:
+                equivalente = FUNCOES_EQUIVALENTES[palavra]
+                saida.append(equivalente)
+                if equivalente in SEM_PARENTESES:
+                    # GETDATE() → CURRENT_TIMESTAMP (sem os parênteses)
+                    j = i + 1
+                    while j < len(sig) and sig[j].tipo == 'espaco':
+                        j += 1
+                    if j + 1 < len(sig) and sig[j].texto == '(' and sig[j + 1].texto == ')':
+                        i = j + 1
+            elif token.texto == '+' and 'texto' in (_vizinho(sig, i, -1), _vizinho(sig, i, 1)):
+                saida.append('||')  # 'n=' + CAST(@n AS VARCHAR): concatenação no T-SQL
+            else:
+                saida.append(token.texto)
+            i += 1
+        return "".join(saida).strip()
+
+    def _avaliar(self, tokens):
+        return self.conexao.execute(f"SELECT {self.traduzir(tokens)}").fetchone()[0]
+
+    def _verdadeiro(self, tokens):
+        return bool(self._avaliar([Token('outro', 'CASE WHEN ')] + list(tokens) + [Token('outro', ' THEN 1 ELSE 0 END')]))
+
+    # --- execução ------------------------------------------------------------
+
+    def executar_script(self, script):
+        for bloco in analisar_script(script):
+            # Variáveis valem só dentro do bloco (entre GOs), como no SQL Server
+            self.variaveis = {}
+            self.executar(bloco)
+
+    def executar(self, instrucoes):
+        for instrucao in instrucoes:
+            if isinstance(instrucao, list):
+                self.executar(instrucao)
+            elif isinstance(instrucao, Interromper):
+                raise _Interrupcao()
+            elif isinstance(instrucao, Laco):
+                for _ in range(LIMITE_ITERACOES):
+                    if not self._verdadeiro(instrucao.condicao):
+                        break
+                    try:
+                        self.executar([instrucao.corpo])
+                    except _Interrupcao:
+                        break
+                else:
+                    raise ComandoNaoSuportadoError(f"WHILE com mais de {LIMITE_ITERACOES} iterações")
+            elif isinstance(instrucao, Condicional):
+                if self._verdadeiro(instrucao.condicao):
+                    self.executar([instrucao.corpo])
+                elif instrucao.senao is not None:
+                    self.executar([instrucao.senao])
+            else:
+                self._executar_instrucao(instrucao)
+
+    def _executar_instrucao(self, instrucao):
+        sig = _significativos(instrucao.tokens)
+        if not sig:
+            return
+        palavra = _palavra(sig[0])
+        segunda = _palavra(sig[1]) if len(sig) > 1 else None
+
+        if palavra == 'DECLARE':
+            for item in _dividir_virgulas(instrucao.tokens[instrucao.tokens.index(sig[0]) + 1:]):
+                nome = _significativos(item)[0].texto.upper()
+                igual = next((j for j, t in enumerate(item) if t.texto == '='), None)
+                self.variaveis[nome] = self._avaliar(item[igual + 1:]) if igual is not None else None
+            return
+        if palavra == 'SET':
+            if sig[1].texto.startswith('@'):
+                tokens = instrucao.tokens
+                igual = next(j for j, t in enumerate(tokens) if t.texto == '=')
+                self.variaveis[sig[1].texto.upper()] = self._avaliar(tokens[igual + 1:])
+            return  # SET NOCOUNT ON, SET XACT_ABORT ON...
+        if palavra == 'PRINT':
+            tokens = instrucao.tokens
+            self.mensagens.append(str(self._avaliar(tokens[tokens.index(sig[0]) + 1:])))
+            return
+        if palavra in ('USE', 'GO') or (palavra == 'BEGIN' and segunda in ('TRAN', 'TRANSACTION')):
+            return
+        if palavra in ('COMMIT', 'ROLLBACK'):
+            return
+
+        tokens = instrucao.tokens
+        if palavra == 'CREATE' and segunda == 'TABLE' and sig[2].texto.startswith('#'):
+            sql = "CREATE TEMP TABLE " + self.traduzir(tokens[tokens.index(sig[2]):])
+        elif palavra == 'UPDATE':
+            sql = _traduzir_update(tokenizar(self.traduzir(tokens)))
+        elif palavra == 'SELECT' and segunda == 'TOP':
+            fim = 2 + (3 if sig[2].texto == '(' else 1)
+            limite = _texto(sig[2:fim]).strip('() ')
+            sql = "SELECT " + self.traduzir(tokens[tokens.index(sig[fim - 1]) + 1:]) + f" LIMIT {limite}"
+        else:
+            sql = self.traduzir(tokens)
+
+        medicao = self._medicao(instrucao, palavra, sig)
+        if palavra in ('UPDATE', 'DELETE', 'SELECT') or (palavra == 'INSERT' and 'SELECT' in
+                                                         {_palavra(t) for t in sig}):
+            self._analisar_plano(sql, _texto(instrucao.tokens), medicao)
+
+        inicio = time.perf_counter()
+        try:
+            cursor = self.conexao.execute(sql)
+        except sqlite3.Error as e:
+            raise ComandoNaoSuportadoError(f"{e} em '{_primeira_linha(instrucao.tokens)}'") from e
+        linhas = cursor.fetchall() if cursor.description else None
+        medicao['segundos'] += time.perf_counter() - inicio
+        medicao['execucoes'] += 1
+
+        if linhas is not None:
+            self.linhas_afetadas = len(linhas)
+            medicao['linhas_afetadas'] += len(linhas)
+            self.resultados.append({
+                'comando': _primeira_linha(instrucao.tokens),
+                'colunas': [d[0] for d in cursor.description],
+                'linhas': [list(linha) for linha in linhas[:LIMITE_LINHAS_RESULTADO]],
+            })
+        else:
+            self.linhas_afetadas = max(cursor.rowcount, 0)
+            medicao['linhas_afetadas'] += self.linhas_afetadas
+        if palavra in ('CREATE', 'INSERT', 'DROP'):
+            self._estatisticas_pendentes = True
+
+    def _medicao(self, instrucao, palavra, sig):
+        """Medição do comando; INSERTs na mesma tabela acumulam na mesma entrada"""
+        if palavra == 'INSERT':
+            tabela = sig[2].texto if _palavra(sig[1]) == 'INTO' else sig[1].texto
+            chave, descricao = ('INSERT', tabela), f"INSERT INTO {tabela}"
+        else:
+            chave, descricao = id(instrucao), _primeira_linha(instrucao.tokens)
+        if chave not in self.medicoes:
+            self.medicoes[chave] = {
+                'rotulo': instrucao.rotulo, 'comando': descricao, 'execucoes': 0,
+                'linhas_afetadas': 0, 'segundos': 0.0, 'varreduras': [], 'alertas': [],
+            }
+        return self.medicoes[chave]
+
+    def _analisar_plano(self, sql, original, medicao):
+        """Varreduras completas no plano e predicados que impedem o seek"""
+        if self._estatisticas_pendentes:
+            self.conexao.execute("ANALYZE temp")
+            self._estatisticas_pendentes = False
+        apelidos = {apelido: tabela.strip('"') for tabela, apelido in APELIDOS.findall(sql)}
+        temporarias = {linha[0] for linha in self.conexao.execute("SELECT name FROM sqlite_temp_master")}
+        for _, _, _, detalhe in self.conexao.execute(f"EXPLAIN QUERY PLAN {sql}"):
+            partes = detalhe.split()
+            if len(partes) < 2 or partes[0] != 'SCAN' or partes[1] in ('CONSTANT', '(subquery', 'sqlite_master',
+                                                                         'sqlite_temp_master'):
+                continue
+            tabela = apelidos.get(partes[1], partes[1])
+            if tabela in temporarias or tabela.startswith('#') or tabela.startswith('temp.'):
+                continue
+            if self._linhas_tabela(tabela) < LINHAS_MINIMAS_VARREDURA:
+                continue  # tabela de apoio (Filiais): a varredura é o plano certo
+            if tabela not in medicao['varreduras']:
+                medicao['varreduras'].append(tabela)
+
+        padroes = {}
+        for coluna, padrao in LIKE_CURINGA_INICIAL.findall(original):
+            padroes.setdefault(coluna, []).append(padrao)
+        alertas = [
+            f"LIKE com curinga no início em {coluna}: {lista[0]}"
+            + (f" e mais {len(lista) - 1} padrões" if len(lista) > 1 else "")
+            for coluna, lista in padroes.items()
+        ]
+        # Filtros: depois do primeiro FROM ou WHERE (o SET do UPDATE fica de fora)
+        posicao_filtro = re.search(r"\b(?:FROM|WHERE)\b", original, re.IGNORECASE)
+        if posicao_filtro:
+            alertas += [f"função sobre a coluna no filtro: {trecho})"
+                        for trecho in FUNCAO_SOBRE_COLUNA.findall(original[posicao_filtro.start():])]
+        for alerta in dict.fromkeys(alertas):
+            if alerta not in medicao['alertas']:
+                medicao['alertas'].append(alerta)
+
+
+    def _linhas_tabela(self, tabela):
+        if tabela not in self._contagens:
+            self._contagens[tabela] = self.conexao.execute(f'SELECT COUNT(*) FROM "{tabela}"').fetchone()[0]
+        return self._contagens[tabela]
+
+
+class _Interrupcao(Exception):
+    """BREAK dentro de um WHILE"""
+
+
+def _vizinho(tokens, i, passo):
+    """Tipo do token significativo antes (passo -1) ou depois (passo 1) de i"""
+    i += passo
+    while 0 <= i < len(tokens) and tokens[i].tipo == 'espaco':
+        i += passo
+    return tokens[i].tipo if 0 <= i < len(tokens) else None
+
+
+def _literal_sqlite(valor):
+    if valor is None:
+        return 'NULL'
+    if isinstance(valor, str):
+        return "'" + valor.replace("'", "''") + "'"
+    return repr(valor)
+
+
+def _primeira_linha(tokens):
+    texto = _texto([t for t in tokens if t.tipo != 'comentario'])
+    primeira = texto.split('\n', 1)[0].strip()
+    return primeira[:100] + ('...' if len(primeira) > 100 else '')
+
+
+# --- banco substituto --------------------------------------------------------
+
+def _filiais(registro=None):
+    """Linhas de Filiais: do cadastro exportado ou do mapeamento fixo por Id"""
+    if registro is not None:
+        return [(f.id, f.nome) for f in registro.filiais]
+    nomes = {}
+    for cidade, filial_id in MAPEAMENTO_IDS.items():
+        nomes.setdefault(filial_id, cidade.title())
+    nomes.setdefault(FILIAL_PADRAO_ID, 'Filial padrão')
+    return sorted(nomes.items())
+
+
+def _documentos_validos(clientes):
+    documentos, _ = normalizar_documentos(clientes['cpf_cnpj'])
+    validos = clientes.assign(documento=documentos['documento'], tipo_pessoa=documentos['tipo_pessoa'])
+    validos = validos[validos['documento'].notna()]
+    return validos.drop_duplicates(subset='documento')[['nome', 'documento', 'tipo_pessoa']]
+
+
+def montar_banco(clientes, extras=None, semente=0, cadastrados=PROPORCAO_CADASTRADOS, registro=None):
+    """
+    Banco SQLite em memória com o esquema substituto. `clientes`: DataFrame com
+    'nome' e 'cpf_cnpj' (planilha); uma fração `cadastrados` deles entra no
+    banco, mais `extras` clientes sintéticos que só existem no banco.
+    """
+    rng = np.random.default_rng(semente)
+    pessoas = _documentos_validos(clientes)
+    pessoas = pessoas[rng.random(len(pessoas)) < cadastrados]
+    if extras:
+        pessoas = pd.concat([pessoas, _documentos_validos(gerar_clientes(extras, semente + 1))])
+        pessoas = pessoas.drop_duplicates(subset='documento')
+    pessoas = pessoas.iloc[rng.permutation(len(pessoas))].reset_index(drop=True)
+
+    # Cpf/Cnpj como a aplicação grava (com máscara), parte só com dígitos
+    sem_mascara = rng.random(len(pessoas)) < PROPORCAO_DOCUMENTO_SEM_MASCARA
+    gravado = formatar_documentos(pessoas['documento']).where(~sem_mascara, pessoas['documento'])
+
+    conexao = sqlite3.connect(':memory:', isolation_level=None)
+    conexao.executescript(ESQUEMA)
+    filiais = _filiais(registro)
+    conexao.executemany("INSERT INTO Filiais (Id, Nome) VALUES (?, ?)", filiais)
+
+    fisica = (pessoas['tipo_pessoa'] == 'Fisica').to_numpy()
+    ids = np.arange(1, len(pessoas) + 1)
+    conexao.executemany(
+        "INSERT INTO PessoasFisicas (Id, Nome, Cpf) VALUES (?, ?, ?)",
+        zip(ids[fisica].tolist(), pessoas['nome'][fisica].astype(str), gravado[fisica]),
+    )
+    conexao.executemany(
+        "INSERT INTO PessoasJuridicas (Id, RazaoSocial, Cnpj) VALUES (?, ?, ?)",
+        zip(ids[~fisica].tolist(), pessoas['nome'][~fisica].astype(str), gravado[~fisica]),
+    )
+
+    ids_filiais = np.array([filial_id for filial_id, _ in filiais])
+    filial = rng.choice(ids_filiais, len(pessoas)).astype(object)
+    filial[rng.random(len(pessoas)) < PROPORCAO_SEM_FILIAL] = None
+    ativo = (rng.random(len(pessoas)) >= PROPORCAO_INATIVOS).astype(int)
+    conexao.executemany(
+        "INSERT INTO Clientes (Id, TipoPessoa, PessoaFisicaId, PessoaJuridicaId, FilialId, Ativo) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        zip(ids.tolist(), pessoas['tipo_pessoa'],
+            np.where(fisica, ids, None).tolist(), np.where(fisica, None, ids).tolist(),
+            [None if f is None else int(f) for f in filial], ativo.tolist()),
+    )
+    conexao.execute("ANALYZE")
+    return conexao
+
+
+def copiar_banco(conexao, destino=':memory:'):
+    """Cópia do banco substituto: em memória (uma por script simulado) ou em arquivo"""
+    copia = sqlite3.connect(destino, isolation_level=None)
+    conexao.backup(copia)
+    return copia
+
+
+def ler_script(caminho):
+    caminho = Path(caminho)
+    abrir = gzip.open if caminho.suffix == '.gz' else open
+    with abrir(caminho, 'rt', encoding='utf-8-sig') as f:
+        return f.read()
+
+
+def simular(conexao, script):
+    """
+    Executa o script sobre `conexao` (alterada) e retorna o relatório: comandos,
+    clientes alterados por filial, resultados dos SELECTs e tempo total
+    """
+    conexao.execute('CREATE TEMP TABLE "_ClientesAntes" AS SELECT Id, FilialId, Filial FROM Clientes')
+    simulacao = Simulacao(conexao)
+    inicio = time.perf_counter()
+    simulacao.executar_script(script)
+    segundos = time.perf_counter() - inicio
+
+    por_filial = conexao.execute("""
+        SELECT 'FilialId', c.FilialId, f.Nome, COUNT(*)
+        FROM Clientes c
+        INNER JOIN "_ClientesAntes" a ON a.Id = c.Id
+        LEFT JOIN Filiais f ON f.Id = c.FilialId
+        WHERE c.FilialId IS NOT a.FilialId
+        GROUP BY c.FilialId, f.Nome
+        UNION ALL
+        SELECT 'Filial', NULL, c.Filial, COUNT(*)
+        FROM Clientes c
+        INNER JOIN "_ClientesAntes" a ON a.Id = c.Id
+        WHERE c.Filial IS NOT a.Filial
+        GROUP BY c.Filial
+        ORDER BY 1, 4 DESC
+    """).fetchall()
+    conexao.execute('DROP TABLE "_ClientesAntes"')
+
+    comandos = [
+        dict(medicao, segundos=round(medicao['segundos'], 4)) for medicao in simulacao.medicoes.values()
+    ]
+    return {
+        'segundos': round(segundos, 4),
+        'comandos': comandos,
+        'alterados_por_filial': [
+            {'coluna': coluna, 'filial_id': filial_id, 'filial': nome, 'clientes': quantidade}
+            for coluna, filial_id, nome, quantidade in por_filial
+        ],
+        'clientes_alterados': sum(linha[3] for linha in por_filial),
+        'varreduras_completas': sorted({t for c in comandos for t in c['varreduras']}),
+        'alertas': sum(len(c['alertas']) for c in comandos),
+        'resultados': simulacao.resultados,
+        'mensagens': simulacao.mensagens,
+    }
+
+
+def imprimir_relatorio(nome, relatorio):
+    print(f"\n=== SIMULAÇÃO: {nome} ===")
+    print(f"⏱️  {relatorio['segundos']:.3f} s, {relatorio['clientes_alterados']} alterações de filial em Clientes")
+    for comando in relatorio['comandos']:
+        rotulo = f"{comando['rotulo']}\n      " if comando['rotulo'] else ""
+        execucoes = f" em {comando['execucoes']} execuções" if comando['execucoes'] > 1 else ""
+        print(f"  - {rotulo}{comando['comando']}")
+        print(f"      {comando['linhas_afetadas']} linhas{execucoes}, {comando['segundos']:.4f} s")
+        for tabela in comando['varreduras']:
+            print(f"      ⚠️  Varredura completa de {tabela}")
+        for alerta in comando['alertas']:
+            print(f"      ⚠️  {alerta}")
+
+    print("\nClientes alterados por filial:")
+    if not relatorio['alterados_por_filial']:
+        print("  (nenhum)")
+    for linha in relatorio['alterados_por_filial']:
+        filial = f"{linha['filial_id']} ({linha['filial']})" if linha['coluna'] == 'FilialId' else linha['filial']
+        print(f"  {linha['coluna']} = {filial}: {linha['clientes']} clientes")
+    if relatorio['mensagens']:
+        print("\nMensagens (PRINT):")
+        for mensagem in relatorio['mensagens']:
+            print(f"  {mensagem}")
+
+
+def imprimir_comparacao(relatorios):
+    print("\n=== COMPARAÇÃO ===")
+    # Caminhos relativos ao diretório comum: scripts com o mesmo nome em pastas diferentes
+    base = os.path.commonpath([os.path.abspath(caminho) for caminho in relatorios])
+    if len(relatorios) > 1 and os.path.isfile(base):
+        base = os.path.dirname(base)
+    print(f"{'script':<40} {'tempo (s)':>10} {'alterados':>10} {'varreduras':>11} {'alertas':>8}")
+    for caminho, relatorio in relatorios.items():
+        nome = os.path.relpath(os.path.abspath(caminho), base)
+        print(f"{nome[-40:]:<40} {relatorio['segundos']:>10.3f} {relatorio['clientes_alterados']:>10} "
+              f"{len(relatorio['varreduras_completas']):>11} {relatorio['alertas']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Executa scripts de filiais em um banco SQLite substituto")
+    parser.add_argument('scripts', nargs='*', help='Scripts .sql (ou .sql.gz) gerados')
+    parser.add_argument('--planilha', default=None,
+                        help='Planilha usada na geração: os clientes do banco vêm dela (padrão: sintéticos)')
+    parser.add_argument('-n', '--linhas', type=int, default=LINHAS_PADRAO,
+                        help='Clientes sintéticos quando não há --planilha (padrão: 10000)')
+    parser.add_argument('--semente', type=int, default=0,
+                        help='Semente dos dados sintéticos (a mesma de planilha_sintetica.py)')
+    parser.add_argument('--extras', type=int, default=None,
+                        help='Clientes que só existem no banco (padrão: tantos quanto os da planilha)')
+    parser.add_argument('--cadastrados', type=float, default=PROPORCAO_CADASTRADOS,
+                        help='Fração dos clientes da planilha cadastrados no banco (padrão: 0.95)')
+    parser.add_argument('--filiais', default=None,
+                        help='Exportação da tabela Filiais (.json/.csv); padrão: filiais.json, se existir')
+    parser.add_argument('--json', help='Grava os relatórios neste arquivo JSON')
+    parser.add_argument('--salvar-banco', metavar='ARQUIVO', default=None,
+                        help='Grava o banco substituto (antes dos scripts) em um arquivo SQLite')
+    opcoes = parser.parse_args(argv)
+    if not opcoes.scripts and not opcoes.salvar_banco:
+        parser.error("informe os scripts a simular ou --salvar-banco")
+
+    try:
+        if opcoes.planilha:
+            clientes = ler_planilha(opcoes.planilha)
+        else:
+            clientes = gerar_clientes(opcoes.linhas, opcoes.semente)
+        extras = len(clientes) if opcoes.extras is None else opcoes.extras
+
+        inicio = time.perf_counter()
+        banco = montar_banco(clientes, extras, opcoes.semente, opcoes.cadastrados,
+                             carregar_registro(opcoes.filiais))
+        totais = {tabela: banco.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+                  for tabela in ('Filiais', 'PessoasFisicas', 'PessoasJuridicas', 'Clientes')}
+        print(f"🗄️  Banco substituto montado em {time.perf_counter() - inicio:.2f} s: "
+              + ", ".join(f"{tabela} {total}" for tabela, total in totais.items()))
+
+        if opcoes.salvar_banco:
+            Path(opcoes.salvar_banco).unlink(missing_ok=True)
+            copiar_banco(banco, opcoes.salvar_banco).close()
+            print(f"🗄️  Banco substituto gravado em '{opcoes.salvar_banco}' "
+                  f"(aplicação direta: --conexao sqlite:{opcoes.salvar_banco})")
+
+        relatorios = {}
+        for caminho in opcoes.scripts:
+            relatorio = simular(copiar_banco(banco), ler_script(caminho))
+            relatorios[caminho] = relatorio
+            imprimir_relatorio(caminho, relatorio)
+        if len(relatorios) > 1:
+            imprimir_comparacao(relatorios)
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        return 1
+
+    if opcoes.json:
+        with open(opcoes.json, 'w', encoding='utf-8') as f:
+            json.dump({'banco': totais, 'scripts': relatorios}, f, ensure_ascii=False, indent=2, default=str)
+        print(f"\n✅ Relatório gravado em '{opcoes.json}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""
+Geração de SQL por documento (CPF/CNPJ) para atualizar as filiais dos clientes
+- Cria uma tabela temporária com os pares documento → filial da planilha
+- Carrega os pares em INSERTs de várias linhas (lotes de até 1000, limite do SQL Server)
+- Atualiza Clientes com um JOIN pelos índices de PessoasFisicas.Cpf / PessoasJuridicas.Cnpj,
+  em vez de varrer as tabelas com CASE WHEN ... LIKE '%cidade%'
+"""
+
+import pandas as pd
+
+from documentos import normalizar_documentos
+from escritor_sql import EscritorSql
+
+TABELA_TEMPORARIA = "#FiliaisPlanilha"
+TABELA_REMOVIDOS = "#FiliaisRemovidas"
+TAMANHO_LOTE_INSERT = 1000
+
+# Coluna de destino em Clientes → tipo da coluna na tabela temporária
+TIPOS_COLUNA = {
+    'FilialId': 'INT',
+    'Filial': 'NVARCHAR(100)',
+}
+
+
+def formatar_documentos(documento):
+    """000.000.000-00 para CPF e 00.000.000/0000-00 para CNPJ"""
+    formatado = documento.str.replace(
+        r'^(\d{3})(\d{3})(\d{3})(\d{2})$', r'\1.\2.\3-\4', regex=True
+    )
+    return formatado.str.replace(
+        r'^(\d{2})(\d{3})(\d{3})(\d{4})(\d{2})$', r'\1.\2.\3/\4-\5', regex=True
+    )
+
+
+def montar_pares(cpf_cnpj, filial):
+    """
+    Monta o DataFrame documento → filial usado na tabela temporária.
+    Retorna (pares, rejeitados): CPF/CNPJ inválidos vão para o relatório de
+    rejeitados (documentos.normalizar_documentos), linhas sem filial são
+    descartadas e, para documentos repetidos, vale a primeira ocorrência.
+    """
+    documentos, rejeitados = normalizar_documentos(cpf_cnpj)
+    pares = documentos.assign(filial=filial)
+    pares = pares.dropna(subset=['documento', 'filial'])
+    pares = pares.drop_duplicates(subset='documento', keep='first')
+
+    pares['documento_formatado'] = formatar_documentos(pares['documento'])
+    return pares.reset_index(drop=True), rejeitados
+
+
+def concatenar_pares(blocos_pares):
+    """
+    Junta os (pares, rejeitados) montados bloco a bloco, mantendo a primeira
+    ocorrência de cada documento
+    """
+    if not blocos_pares:
+        return montar_pares(pd.Series(dtype=object), pd.Series(dtype=object))
+    pares = pd.concat([p for p, _ in blocos_pares], ignore_index=True)
+    rejeitados = pd.concat([r for _, r in blocos_pares], ignore_index=True)
+    return pares.drop_duplicates(subset='documento', keep='first').reset_index(drop=True), rejeitados
+
+
+def literal_texto(valor):
+    """Texto como literal Unicode do T-SQL: N'...' com as aspas dobradas"""
+    return "N'" + str(valor).replace("'", "''") + "'"
+
+
+def literal_contem(valor):
+    """
+    Padrão do LIKE que contém `valor` em qualquer posição ('%...%'), com os
+    curingas do próprio valor ([, % e _) escapados entre colchetes
+    """
+    texto = str(valor).replace('[', '[[]').replace('%', '[%]').replace('_', '[_]')
+    return literal_texto('%' + texto + '%')
+
+
+def texto_comentario(valor):
+    """
+    Valor para um comentário de linha (-- ...): quebras de linha viram espaços,
+    senão o restante do valor sairia do comentário e rodaria como SQL
+    """
+    return " ".join(str(valor).splitlines())
+
+
+def _literal(valor):
+    if isinstance(valor, str):
+        return literal_texto(valor)
+    return str(int(valor))
+
+
+def gerar_sql_por_documento(pares, coluna='FilialId', tamanho_lote=TAMANHO_LOTE_INSERT,
+                            titulo="Atualizar filiais dos clientes por CPF/CNPJ da planilha"):
+    """Script completo de escrever_sql_por_documento() como texto"""
+    with EscritorSql() as escritor:
+        escrever_sql_por_documento(escritor, pares, coluna, tamanho_lote, titulo)
+        return escritor.conteudo()
+
+
+def escrever_sql_por_documento(escritor, pares, coluna='FilialId', tamanho_lote=TAMANHO_LOTE_INSERT,
+                               titulo="Atualizar filiais dos clientes por CPF/CNPJ da planilha",
+                               removidos=None):
+    """
+    Escreve o script completo no EscritorSql: tabela temporária, INSERTs em lotes
+    e os UPDATEs por JOIN (PF e PJ). `pares` vem de montar_pares(); `coluna` é
+    FilialId (valores numéricos) ou Filial (nomes).
+    `removidos` (modo delta): pares da carga anterior que saíram da planilha; a
+    coluna volta a NULL somente nos clientes que ainda têm a filial daquela carga.
+    """
+    if coluna not in TIPOS_COLUNA:
+        raise ValueError(f"Coluna de destino inválida: {coluna}")
+    tamanho_lote = min(max(int(tamanho_lote), 1), TAMANHO_LOTE_INSERT)
+    remover = removidos is not None and len(removidos) > 0
+
+    cabecalho = f"-- {titulo}\n-- Total de documentos: {len(pares)}\n"
+    if removidos is not None:
+        cabecalho += f"-- Documentos removidos da planilha: {len(removidos)}\n"
+    escritor.escrever(cabecalho + "SET NOCOUNT ON;\n\n")
+    _escrever_tabela_temporaria(escritor, TABELA_TEMPORARIA, pares, coluna, tamanho_lote)
+
+    escritor.escrever("\n")
+    # Só os clientes cuja filial muda: a contagem de linhas é a de alterados,
+    # sem log nem triggers para quem já está na filial certa
+    _escrever_updates(
+        escritor, TABELA_TEMPORARIA, coluna, f"s.{coluna}",
+        condicao_extra=f" AND (c.{coluna} IS NULL OR c.{coluna} <> s.{coluna})",
+        comentarios=("-- Pessoas Físicas (seek no índice de PessoasFisicas.Cpf)",
+                     "-- Pessoas Jurídicas (seek no índice de PessoasJuridicas.Cnpj)"),
+    )
+
+    if remover:
+        escritor.escrever("\n\n")
+        _escrever_tabela_temporaria(escritor, TABELA_REMOVIDOS, removidos, coluna, tamanho_lote)
+        escritor.escrever("\n")
+        _escrever_updates(
+            escritor, TABELA_REMOVIDOS, coluna, "NULL", condicao_extra=f" AND c.{coluna} = s.{coluna}",
+            comentarios=("-- Pessoas Físicas que saíram da planilha (só se a filial não mudou desde a última carga)",
+                         "-- Pessoas Jurídicas que saíram da planilha (só se a filial não mudou desde a última carga)"),
+        )
+
+    escritor.escrever(f"\n\nDROP TABLE {TABELA_TEMPORARIA};\n")
+    if remover:
+        escritor.escrever(f"DROP TABLE {TABELA_REMOVIDOS};\n")
+    escritor.fim_lote()
+
+
+def _escrever_tabela_temporaria(escritor, tabela, pares, coluna, tamanho_lote):
+    """CREATE TABLE da tabela temporária e um INSERT por lote de pares"""
+    escritor.escrever(f"""IF OBJECT_ID('tempdb..{tabela}') IS NOT NULL DROP TABLE {tabela};
+CREATE TABLE {tabela} (
+    Documento VARCHAR(14) NOT NULL PRIMARY KEY,
+    DocumentoFormatado VARCHAR(18) NOT NULL,
+    TipoPessoa VARCHAR(10) NOT NULL,
+    {coluna} {TIPOS_COLUNA[coluna]} NOT NULL
+);
+""")
+    escritor.fim_lote()
+
+    # Um INSERT por lote, montado e gravado antes de passar ao próximo
+    for inicio in range(0, len(pares), tamanho_lote):
+        lote = pares.iloc[inicio:inicio + tamanho_lote]
+        linhas = [
+            f"('{doc}', '{fmt}', '{tipo}', {_literal(filial)})"
+            for doc, fmt, tipo, filial in zip(
+                lote['documento'], lote['documento_formatado'], lote['tipo_pessoa'], lote['filial']
+            )
+        ]
+        escritor.escrever(
+            f"INSERT INTO {tabela} (Documento, DocumentoFormatado, TipoPessoa, {coluna}) VALUES\n    "
+            + ",\n    ".join(linhas)
+            + ";\n"
+        )
+        escritor.fim_lote()
+
+
+def _escrever_updates(escritor, tabela, coluna, valor, comentarios, condicao_extra=''):
+    """UPDATEs de Clientes por JOIN da tabela temporária com PF (Cpf) e PJ (Cnpj)"""
+    escritor.atualizar(
+        coluna, valor,
+        f"""FROM {tabela} s
+INNER JOIN PessoasFisicas pf ON pf.Cpf IN (s.DocumentoFormatado, s.Documento)
+INNER JOIN Clientes c ON c.PessoaFisicaId = pf.Id""",
+        "s.TipoPessoa = 'Fisica' AND c.TipoPessoa = 'Fisica' AND c.Ativo = 1" + condicao_extra,
+        comentario=comentarios[0],
+    )
+    escritor.escrever("\n\n")
+    escritor.atualizar(
+        coluna, valor,
+        f"""FROM {tabela} s
+INNER JOIN PessoasJuridicas pj ON pj.Cnpj IN (s.DocumentoFormatado, s.Documento)
+INNER JOIN Clientes c ON c.PessoaJuridicaId = pj.Id""",
+        "s.TipoPessoa = 'Juridica' AND c.TipoPessoa = 'Juridica' AND c.Ativo = 1" + condicao_extra,
+        comentario=comentarios[1],
+    )
+
+
+def consulta_verificacao(coluna='FilialId'):
+    """SELECT de conferência da distribuição de clientes ativos por filial"""
+    if coluna == 'FilialId':
+        return """-- Verificar resultado
+SELECT '=== FILIAIS ATUALIZADAS ===' as Info;
+SELECT 
+    f.Nome as Filial,
+    COUNT(*) as TotalClientes
+FROM Clientes c
+INNER JOIN Filiais f ON c.FilialId = f.Id
+WHERE c.Ativo = 1
+GROUP BY f.Id, f.Nome
+ORDER BY f.Nome;"""
+    return """-- Verificar resultado
+SELECT '=== FILIAIS ATUALIZADAS ===' as Info;
+SELECT 
+    c.Filial,
+    COUNT(*) as TotalClientes
+FROM Clientes c
+WHERE c.Ativo = 1
+GROUP BY c.Filial
+ORDER BY c.Filial;"""
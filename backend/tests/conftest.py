@@ -0,0 +1,6 @@
+"""Os scripts do backend são módulos soltos: os testes os importam pelo nome"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,18 @@
+import pandas as pd
+
+from estatisticas_filiais import EstatisticasFiliais
+
+
+def test_comentario_sql_sem_quebra_de_linha_nas_filiais():
+    planilha = pd.DataFrame({
+        'nome': ['Ana', 'Bruno', 'Carla'],
+        'cpf_cnpj': ['529.982.247-25', None, '11222333000181'],
+        'filial': ['Rio\nUPDATE Clientes SET FilialId = 0; --'] * 2 + ['SP\r\nDROP TABLE Clientes'],
+    })
+
+    comentario = EstatisticasFiliais.calcular(planilha).comentario_sql()
+
+    # Toda linha do cabeçalho continua sendo comentário
+    assert all(linha.startswith('--') for linha in comentario.splitlines())
+    assert 'Rio UPDATE Clientes SET FilialId = 0; --: 2 clientes' in comentario
+    assert 'SP DROP TABLE Clientes: 1 clientes' in comentario
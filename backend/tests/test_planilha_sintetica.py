@@ -0,0 +1,39 @@
+import pytest
+
+from documentos import normalizar_documentos
+from leitura_planilha import ler_planilha
+from planilha_sintetica import gerar_clientes, gerar_planilha
+
+COLUNAS = ['nome', 'cpf_cnpj', 'telefone', 'email', 'data_cadastro', 'filial']
+
+
+@pytest.mark.parametrize('linhas', [0, 1, 3, 10, 100])
+def test_gerar_clientes_poucas_linhas(linhas):
+    clientes = gerar_clientes(linhas, semente=1)
+
+    assert list(clientes.columns) == COLUNAS
+    assert len(clientes) == linhas
+    # Documentos e vazios passam pela normalização sem erro
+    documentos, rejeitados = normalizar_documentos(clientes['cpf_cnpj'])
+    assert len(documentos) == linhas
+    assert len(rejeitados) <= linhas
+
+
+def test_gerar_clientes_reprodutivel():
+    assert gerar_clientes(50, semente=3).equals(gerar_clientes(50, semente=3))
+
+
+def test_documentos_invalidos_trocam_o_ultimo_digito():
+    clientes = gerar_clientes(2_000, semente=1)
+    _, rejeitados = normalizar_documentos(clientes['cpf_cnpj'])
+
+    assert (rejeitados['motivo'] == 'digito_verificador').any()
+
+
+def test_gerar_planilha_pequena(tmp_path):
+    caminho = tmp_path / 'clientes.xlsx'
+    gerar_planilha(caminho, 10, semente=1)
+
+    planilha = ler_planilha(caminho)
+    assert len(planilha) == 10
+    assert list(planilha.columns) == ['nome', 'cpf_cnpj', 'filial']
@@ -0,0 +1,23 @@
+import json
+
+import pytest
+
+from gerar_query_filiais_simples import ARQUIVO_SQL, gerar_query_filiais
+from planilha_sintetica import gerar_planilha
+from simulacao_sql import main
+
+
+@pytest.mark.parametrize('por_documento', [False, True])
+def test_simulacao_planilha_pequena(tmp_path, monkeypatch, por_documento):
+    monkeypatch.chdir(tmp_path)
+    planilha = tmp_path / 'clientes.xlsx'
+    gerar_planilha(planilha, 10, semente=1)
+    gerar_query_filiais(planilha, por_documento=por_documento, medir_memoria=False)
+
+    relatorio = tmp_path / 'simulacao.json'
+    assert main([ARQUIVO_SQL, '--planilha', str(planilha), '--json', str(relatorio)]) == 0
+
+    resultado = json.loads(relatorio.read_text(encoding='utf-8'))
+    # Banco com os clientes da planilha e os extras sintéticos (poucas linhas também)
+    assert resultado['banco']['Clientes'] > 0
+    assert resultado['scripts'][ARQUIVO_SQL]['comandos']
@@ -0,0 +1,24 @@
+from mapeamento_filiais import criar_mapeador_ids
+from planilha_sintetica import gerar_clientes
+from simulacao_sql import montar_banco, simular
+from sql_filiais import gerar_sql_por_documento, montar_pares
+
+
+def _linhas_atualizadas(relatorio):
+    return sum(c['linhas_afetadas'] for c in relatorio['comandos'] if 'UPDATE' in c['comando'])
+
+
+def test_update_por_documento_conta_so_alterados():
+    clientes = gerar_clientes(500, semente=2)
+    _, filial_id, _ = criar_mapeador_ids().mapear(clientes['filial'])
+    pares, _ = montar_pares(clientes['cpf_cnpj'], filial_id)
+    script = gerar_sql_por_documento(pares)
+    banco = montar_banco(clientes, extras=500, semente=2)
+
+    primeira = simular(banco, script)
+    assert primeira['clientes_alterados'] > 0
+    assert _linhas_atualizadas(primeira) == primeira['clientes_alterados']
+
+    # Clientes já na filial certa não são regravados
+    segunda = simular(banco, script)
+    assert _linhas_atualizadas(segunda) == 0
@@ -0,0 +1,123 @@
+"""
+Varredura recursiva de arquivos com padrões no estilo .gitignore
+- os.scandir com uma pilha explícita: os caminhos saem à medida que são
+  encontrados, sem listar e ordenar a árvore inteira antes
+- Diretórios excluídos (bin/, obj/, ...) são podados sem serem percorridos
+- Padrões: '*' e '?' não atravessam '/', '**' atravessa diretórios, [Bb] casa
+  um caractere do conjunto, '/' no fim casa só diretórios, '/' no início ou no
+  meio ancora o padrão na raiz da varredura, '!' reinclui; vale o último padrão
+  que casar (como no .gitignore)
+"""
+
+import os
+import re
+from collections import namedtuple
+from pathlib import Path
+
+Pattern = namedtuple("Pattern", ["regex", "dir_only", "negated"])
+
+
+def _translate(glob):
+    """Trecho de glob (sem '!' nem '/' final) → regex sobre o caminho relativo"""
+    parts = []
+    i = 0
+    while i < len(glob):
+        if glob.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif glob.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif glob[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif glob[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif glob[i] == "[" and "]" in glob[i + 2:]:
+            end = glob.index("]", i + 2)
+            chars = glob[i + 1:end]
+            if chars.startswith("!"):
+                chars = "^" + chars[1:]
+            parts.append(f"[{chars}]")
+            i = end + 1
+        else:
+            parts.append(re.escape(glob[i]))
+            i += 1
+    return "".join(parts)
+
+
+def compile_pattern(line):
+    """Uma linha no formato .gitignore → Pattern (None para linha vazia ou comentário)"""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    # Sem '/' o padrão casa o nome em qualquer nível da árvore
+    anchored = "/" in line
+    line = line.lstrip("/")
+    prefix = "" if anchored else "(?:.*/)?"
+    return Pattern(re.compile(prefix + _translate(line) + r"\Z"), dir_only, negated)
+
+
+class PatternSet:
+    """Lista de padrões avaliada como um .gitignore: o último que casar decide"""
+
+    def __init__(self, lines=()):
+        self.patterns = [p for p in map(compile_pattern, lines) if p is not None]
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(f.read().splitlines())
+
+    def extend(self, lines):
+        self.patterns.extend(p for p in map(compile_pattern, lines) if p is not None)
+        return self
+
+    def matches(self, relpath, is_dir=False):
+        """True se o caminho relativo (com '/') estiver selecionado pelos padrões"""
+        selected = False
+        for pattern in self.patterns:
+            if pattern.dir_only and not is_dir:
+                continue
+            if pattern.regex.match(relpath):
+                selected = not pattern.negated
+        return selected
+
+
+def scan(roots, include, exclude):
+    """
+    Gera os arquivos sob `roots` (diretórios ou arquivos) que casam com `include`
+    e não casam com `exclude` (PatternSets). Não segue links simbólicos para
+    diretórios; diretórios sem permissão de leitura são ignorados.
+    """
+    for root in roots:
+        root = Path(root)
+        if root.is_file():
+            if include.matches(root.name) and not exclude.matches(root.name):
+                yield root
+            continue
+
+        stack = [(str(root), "")]
+        while stack:
+            directory, prefix = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            subdirectories = []
+            with entries:
+                for entry in entries:
+                    relpath = prefix + entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if not exclude.matches(relpath, is_dir=True):
+                            subdirectories.append((entry.path, relpath + "/"))
+                    elif include.matches(relpath) and not exclude.matches(relpath):
+                        yield Path(entry.path)
+            # Pilha em ordem inversa: subdiretórios visitados na ordem do scandir
+            stack.extend(reversed(subdirectories))